@@ -0,0 +1,137 @@
+"""Runtime configuration, read from environment variables with sensible defaults."""
+import os
+from typing import List
+
+
+def _get_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Invalid value for {name}: {value!r}, using {default}")
+        return default
+
+
+def _get_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        print(f"Invalid value for {name}: {value!r}, using {default}")
+        return default
+
+
+def _get_int_list(name: str, default: List[int]) -> List[int]:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return [int(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        print(f"Invalid value for {name}: {value!r}, using {default}")
+        return default
+
+
+def _get_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Song catalog
+CATALOG_PATH = os.getenv("CATALOG_PATH", "songs.json")  # Source catalog JSON
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", "songs.snapshot")  # Compiled catalog snapshot
+
+# Preview URL resolution
+PREVIEW_CONCURRENCY = _get_int("PREVIEW_CONCURRENCY", 8)  # Max parallel Deezer lookups per game
+PREVIEW_TIMEOUT = _get_float("PREVIEW_TIMEOUT", 5.0)  # Seconds before a single lookup is abandoned
+PREVIEW_CACHE_SIZE = _get_int("PREVIEW_CACHE_SIZE", 10000)  # Max cached preview URLs
+PREVIEW_CACHE_DEFAULT_TTL = _get_float("PREVIEW_CACHE_DEFAULT_TTL", 600.0)  # TTL for URLs without an expiry
+PREVIEW_CACHE_EXPIRY_MARGIN = _get_float("PREVIEW_CACHE_EXPIRY_MARGIN", 60.0)  # Drop URLs this long before they expire
+PREVIEW_CACHE_NEGATIVE_TTL = _get_float("PREVIEW_CACHE_NEGATIVE_TTL", 300.0)  # TTL for songs without a preview
+
+# Shared outbound HTTP client
+HTTP_MAX_CONNECTIONS = _get_int("HTTP_MAX_CONNECTIONS", 100)  # Total pooled connections
+HTTP_MAX_KEEPALIVE_CONNECTIONS = _get_int("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)  # Idle connections kept open
+HTTP_KEEPALIVE_EXPIRY = _get_float("HTTP_KEEPALIVE_EXPIRY", 30.0)  # Seconds an idle connection is kept
+HTTP_TIMEOUT = _get_float("HTTP_TIMEOUT", 10.0)  # Read/write/pool timeout in seconds
+HTTP_CONNECT_TIMEOUT = _get_float("HTTP_CONNECT_TIMEOUT", 5.0)  # Connect timeout in seconds
+HTTP2_ENABLED = _get_bool("HTTP2_ENABLED", True)  # Use HTTP/2 when the h2 package is installed
+
+# Response serialization
+SONG_JSON_CACHE_SIZE = _get_int("SONG_JSON_CACHE_SIZE", 20000)  # Encoded songs kept for /api/songs responses
+
+# Song filtering
+FILTER_CACHE_SIZE = _get_int("FILTER_CACHE_SIZE", 256)  # Resolved song pools kept in memory
+FACET_CACHE_SIZE = _get_int("FACET_CACHE_SIZE", 1024)  # Facet count responses kept, one per distinct filter combination
+HARD_MODE_CANDIDATES = _get_int("HARD_MODE_CANDIDATES", 512)  # Songs ranked by similarity for each hard-mode question
+
+# Artist playlists
+ARTIST_PLAYLIST_MIN_SONGS = _get_int("ARTIST_PLAYLIST_MIN_SONGS", 5)  # Songs an artist needs to get a playlist
+ARTIST_PLAYLIST_COUNT = _get_int("ARTIST_PLAYLIST_COUNT", 20)  # Artist playlists listed by /api/playlists/artists
+
+# Custom playlists
+CUSTOM_PLAYLIST_DB_PATH = os.getenv("CUSTOM_PLAYLIST_DB_PATH", "playlists.db")  # SQLite database for user-created playlists
+CUSTOM_PLAYLIST_MAX = _get_int("CUSTOM_PLAYLIST_MAX", 1000)  # Custom playlists that can exist at once
+CUSTOM_PLAYLIST_MAX_PER_CLIENT = _get_int("CUSTOM_PLAYLIST_MAX_PER_CLIENT", 10)  # Custom playlists one client can own at once
+CUSTOM_PLAYLIST_TTL = _get_float("CUSTOM_PLAYLIST_TTL", 30 * 24 * 3600.0)  # Seconds a custom playlist exists after its creation
+CUSTOM_PLAYLIST_MIN_SONGS = _get_int("CUSTOM_PLAYLIST_MIN_SONGS", 10)  # Distinct songs a custom playlist must match
+PLAYLIST_POOL_CACHE_SIZE = _get_int("PLAYLIST_POOL_CACHE_SIZE", 256)  # Compiled artist and custom playlist pools kept, least recently used evicted
+
+# Game sessions
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")  # "memory" (single worker) or "sqlite" (shared)
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.db")  # SQLite database for the sqlite store
+SESSION_IDLE_TIMEOUT = _get_float("SESSION_IDLE_TIMEOUT", 3600.0)  # Seconds of inactivity before a session expires
+SESSION_MAX_COUNT = _get_int("SESSION_MAX_COUNT", 10000)  # Max stored sessions, least recently active evicted first (0 = no cap)
+SESSION_SWEEP_INTERVAL = _get_float("SESSION_SWEEP_INTERVAL", 60.0)  # Seconds between expiry sweeps
+GAME_TICK_INTERVAL = _get_float("GAME_TICK_INTERVAL", 1.0)  # Seconds between timer updates on the game WebSocket
+
+# Pre-generated games
+GAME_POOL_SIZE = _get_int("GAME_POOL_SIZE", 3)  # Ready games kept per playlist, song count and difficulty (0 disables the pool)
+GAME_POOL_SONG_COUNTS = _get_int_list("GAME_POOL_SONG_COUNTS", [5])  # Song counts games are pre-generated for
+GAME_POOL_HARD_MODE = _get_bool("GAME_POOL_HARD_MODE", False)  # Also pre-generate hard-mode games
+GAME_POOL_REFRESH_MARGIN = _get_float("GAME_POOL_REFRESH_MARGIN", 120.0)  # Rebuild games this long before their previews expire
+GAME_POOL_INTERVAL = _get_float("GAME_POOL_INTERVAL", 30.0)  # Seconds between pool refills
+GAME_POOL_MAX_BACKOFF = _get_float("GAME_POOL_MAX_BACKOFF", 600.0)  # Longest wait before retrying settings whose games failed to build
+SEEDED_GAME_CACHE_SIZE = _get_int("SEEDED_GAME_CACHE_SIZE", 256)  # Question sets of seeded games kept for reuse
+
+# Leaderboards
+LEADERBOARD_DB_PATH = os.getenv("LEADERBOARD_DB_PATH", "leaderboards.db")  # SQLite database for submitted scores
+LEADERBOARD_FLUSH_INTERVAL = _get_float("LEADERBOARD_FLUSH_INTERVAL", 2.0)  # Seconds between batched score writes
+LEADERBOARD_MAX_PENDING = _get_int("LEADERBOARD_MAX_PENDING", 10000)  # Unwritten scores buffered before new ones are dropped
+LEADERBOARD_SYNC_INTERVAL = _get_float("LEADERBOARD_SYNC_INTERVAL", 2.0)  # Seconds between reads of scores submitted on other workers
+LEADERBOARD_TOP_SIZE = _get_int("LEADERBOARD_TOP_SIZE", 100)  # Best entries kept per board, the most a leaderboard request can list
+
+# Game analytics
+ANALYTICS_ENABLED = _get_bool("ANALYTICS_ENABLED", True)  # Record game events for the analytics endpoints
+ANALYTICS_DB_PATH = os.getenv("ANALYTICS_DB_PATH", "analytics.db")  # SQLite database of game events
+ANALYTICS_FLUSH_INTERVAL = _get_float("ANALYTICS_FLUSH_INTERVAL", 2.0)  # Seconds between batched event writes
+ANALYTICS_MAX_PENDING = _get_int("ANALYTICS_MAX_PENDING", 50000)  # Unwritten events buffered before new ones are dropped
+
+# Multiplayer rooms
+ROOM_MAX_PLAYERS = _get_int("ROOM_MAX_PLAYERS", 50)  # Players allowed in one room
+ROOM_MAX_COUNT = _get_int("ROOM_MAX_COUNT", 1000)  # Open rooms per worker; creating more is rejected
+ROOM_REVEAL_SECONDS = _get_float("ROOM_REVEAL_SECONDS", 3.0)  # Pause after each answer reveal
+ROOM_IDLE_TIMEOUT = _get_float("ROOM_IDLE_TIMEOUT", 1800.0)  # Seconds of inactivity before a room is removed
+ROOM_LEADERBOARD_SIZE = _get_int("ROOM_LEADERBOARD_SIZE", 10)  # Players included in broadcast leaderboards
+
+# Daily challenge
+DAILY_CHALLENGE_NUM_SONGS = _get_int("DAILY_CHALLENGE_NUM_SONGS", 10)  # Questions in the daily challenge
+
+# HTTP caching
+STATS_CACHE_MAX_AGE = _get_int("STATS_CACHE_MAX_AGE", 300)  # Seconds clients may reuse /api/stats responses
+CATALOG_CACHE_MAX_AGE = _get_int("CATALOG_CACHE_MAX_AGE", 60)  # Seconds clients may reuse song, playlist and artist listings before revalidating
+STATIC_CACHE_MAX_AGE = _get_int("STATIC_CACHE_MAX_AGE", 3600)  # Seconds clients may reuse unversioned static files
+STATIC_IMMUTABLE_MAX_AGE = _get_int("STATIC_IMMUTABLE_MAX_AGE", 31536000)  # Seconds content-hashed static files are cached
+
+# Response compression
+COMPRESSION_ENABLED = _get_bool("COMPRESSION_ENABLED", True)  # Compress text and JSON responses
+COMPRESSION_MIN_SIZE = _get_int("COMPRESSION_MIN_SIZE", 1024)  # Smallest response body (bytes) worth compressing
+COMPRESSION_GZIP_LEVEL = _get_int("COMPRESSION_GZIP_LEVEL", 6)  # gzip level, 1 (fastest) to 9 (smallest)
+COMPRESSION_BROTLI_QUALITY = _get_int("COMPRESSION_BROTLI_QUALITY", 4)  # brotli quality, 0 to 11
+BROTLI_ENABLED = _get_bool("BROTLI_ENABLED", True)  # Prefer brotli when the brotli package is installed
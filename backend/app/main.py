@@ -1,16 +1,61 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from app.routes import game_routes, playlist_routes, preview_routes, song_routes, stats_routes
+from app import config
+from app.routes import (analytics_routes, artist_routes, game_routes, leaderboard_routes, playlist_routes, preview_routes,
+                        room_routes, song_routes, stats_routes)
+from app.services.analytics_service import analytics_service
+from app.services.game_service import game_service
+from app.services.http_client import create_http_client
+from app.services.leaderboard_service import leaderboard_service
+from app.services.playlist_service import playlist_service
+from app.services.room_service import room_service
+from app.services.song_service import song_service
+from app.utils.middleware import (CacheControlMiddleware, CachePolicy, CompressionMiddleware, fixed_policy,
+                                  static_policy)
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources on startup and release them on shutdown."""
+    http_client = create_http_client()
+    song_service.set_http_client(http_client)
+    session_expiry = asyncio.create_task(game_service.run_session_expiry())
+    game_pool = asyncio.create_task(game_service.run_game_pool())
+    room_expiry = asyncio.create_task(room_service.run_room_expiry())
+    leaderboard_writer = asyncio.create_task(leaderboard_service.writer.run())
+    leaderboard_sync = asyncio.create_task(leaderboard_service.run_sync())
+    analytics_writer = asyncio.create_task(analytics_service.writer.run())
+    try:
+        yield
+    finally:
+        # Let the writers flush pending scores and events before the database is closed
+        leaderboard_sync.cancel()
+        leaderboard_writer.cancel()
+        analytics_writer.cancel()
+        await asyncio.gather(leaderboard_sync, leaderboard_writer, analytics_writer, return_exceptions=True)
+        leaderboard_service.close()
+        playlist_service.close()
+        room_expiry.cancel()
+        game_pool.cancel()
+        session_expiry.cancel()
+        song_service.set_http_client(None)
+        await http_client.aclose()
+        game_service.sessions.close()
+
+
 # Create the FastAPI app
 app = FastAPI(
     title="Music Guesser API",
     description="API for the Music Guesser game",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -21,6 +66,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Catalog listings change only when the catalog does, so clients cache them briefly and
+# revalidate with ETags; random picks must never be cached
+catalog_cache = CachePolicy(f"public, max-age={config.CATALOG_CACHE_MAX_AGE}, must-revalidate", etag=True)
+app.add_middleware(
+    CacheControlMiddleware,
+    rules=[
+        ("/api/songs/random", fixed_policy(CachePolicy("no-store"))),
+        ("/api/songs", fixed_policy(catalog_cache)),
+        ("/api/playlists/custom", fixed_policy(CachePolicy("no-cache", etag=True))),
+        ("/api/playlists", fixed_policy(catalog_cache)),
+        ("/api/artists", fixed_policy(catalog_cache)),
+        ("/static", static_policy(
+            immutable=CachePolicy(f"public, max-age={config.STATIC_IMMUTABLE_MAX_AGE}, immutable"),
+            default=CachePolicy(f"public, max-age={config.STATIC_CACHE_MAX_AGE}")
+        )),
+    ],
+)
+
+# Added last so it wraps everything else and compresses the final response
+if config.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=config.COMPRESSION_MIN_SIZE,
+        gzip_level=config.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=config.COMPRESSION_BROTLI_QUALITY,
+        brotli_enabled=config.BROTLI_ENABLED,
+    )
+
 static_dir = Path("static")
 static_dir.mkdir(exist_ok=True)
 
@@ -32,7 +105,11 @@ app.include_router(game_routes.router)
 app.include_router(song_routes.router)
 app.include_router(preview_routes.router)
 app.include_router(playlist_routes.router)
+app.include_router(artist_routes.router)
 app.include_router(stats_routes.router)
+app.include_router(room_routes.router)
+app.include_router(leaderboard_routes.router)
+app.include_router(analytics_routes.router)
 
 @app.get("/")
 async def root():
@@ -53,10 +130,10 @@ async def health_check():
 # Handle 404 errors
 @app.exception_handler(404)
 async def not_found_exception_handler(request, exc):
-    return {
+    return JSONResponse(status_code=404, content={
         "detail": "The requested resource was not found",
         "path": str(request.url)
-    }
+    })
 
 
 if __name__ == "__main__":
@@ -0,0 +1,22 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ArtistSummary(BaseModel):
+    artist_id: int  # Deezer artist ID, as in Song.Contributors
+    name: str
+    song_count: int  # Songs in the catalog the artist is credited on
+    picture_url: Optional[str] = None
+    fans: Optional[int] = None
+    top_genres: Optional[List[str]] = None
+
+
+class ArtistSong(BaseModel):
+    song_id: int
+    name: str
+    role: str  # Contributor role, e.g. "Main" or "Featured"
+
+
+class ArtistDetails(ArtistSummary):
+    songs: List[ArtistSong]
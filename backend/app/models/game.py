@@ -1,5 +1,5 @@
 import uuid
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional, Tuple
 
 from pydantic import BaseModel
 
@@ -11,6 +11,8 @@ class GameSettings(BaseModel):
     playlist_id: Optional[str] = None  # ID of a predefined playlist
     start_year: Optional[int] = None  # Start year for filtering
     end_year: Optional[int] = None  # End year for filtering
+    seed: Optional[int] = None  # Makes the game reproducible: same seed and settings, same questions
+    difficulty: Literal["normal", "hard"] = "normal"  # "hard" picks wrong answers similar to the right one
 
 
 class GameOption(BaseModel):
@@ -32,23 +34,52 @@ class GameQuestion(BaseModel):
 
 
 class GameSession(BaseModel):
+    """A game as stored: references into the catalog, not question payloads.
+
+    Question ``i`` plays song ``song_ids[i]`` with the options
+    ``option_ids[i]``, of which ``correct_indexes[i]`` is right. Full
+    ``GameQuestion`` objects are rebuilt from the catalog when sent out.
+    """
     session_id: str
-    questions: List[GameQuestion]
+    # Tuples, so copies of a session can share them
+    song_ids: Tuple[int, ...]
+    option_ids: Tuple[Tuple[int, ...], ...]
+    correct_indexes: Tuple[int, ...]
+    time_limit: int = 15  # Seconds per question
     current_question: int = 0
     score: int = 0
     total_questions: int
     started_at: float  # Unix timestamp
+    seed: Optional[int] = None  # Seed the questions were generated from, if any
+    playlist_id: Optional[str] = None  # Playlist the game was created from, if any
+    submitted: bool = False  # Whether the score was recorded on the leaderboards
 
     @classmethod
-    def create(cls, questions: List[GameQuestion]):
+    def create(cls, questions: List[GameQuestion], seed: Optional[int] = None, playlist_id: Optional[str] = None):
         return cls(
             session_id=str(uuid.uuid4()),
-            questions=questions,
+            song_ids=tuple(question.song_id for question in questions),
+            option_ids=tuple(tuple(option.song_id for option in question.options) for question in questions),
+            correct_indexes=tuple(question.correct_option_index for question in questions),
+            time_limit=questions[0].time_limit if questions else GameQuestion.model_fields["time_limit"].default,
             total_questions=len(questions),
-            started_at=0  # Will be set when the game starts
+            started_at=0,  # Will be set when the game starts
+            seed=seed,
+            playlist_id=playlist_id
         )
 
 
+class GameSessionResponse(BaseModel):
+    """A game session with its full questions, as returned when it is created."""
+    session_id: str
+    questions: List[GameQuestion]
+    current_question: int = 0
+    score: int = 0
+    total_questions: int
+    started_at: float
+    seed: Optional[int] = None
+
+
 class GameResponse(BaseModel):
     session_id: str
     current_question: int
@@ -0,0 +1,40 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class ScoreSubmission(BaseModel):
+    session_id: str  # A completed game session
+    player_name: str
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int  # 1-based, ties share a rank
+    player_name: str
+    score: int
+    submitted_at: float  # Unix timestamp
+
+
+class Leaderboard(BaseModel):
+    scope: str  # "global" or a playlist ID
+    period: str  # "daily", "weekly" or "all-time"
+    period_key: str  # e.g. "2024-01-31", "2024-W05" or "all"
+    total_entries: int
+    entries: List[LeaderboardEntry]
+
+
+class BoardRank(BaseModel):
+    scope: str
+    period: str
+    rank: int
+    total_entries: int
+
+
+class SubmissionResult(BaseModel):
+    score: int
+    ranks: List[BoardRank]  # Rank on every board the score was added to
+
+
+class ScoreRank(BaseModel):
+    rank: int  # Rank a score would have on the board
+    total_entries: int
@@ -0,0 +1,65 @@
+from typing import List, Optional
+
+from app.models.game import GameSettings
+from pydantic import BaseModel
+
+
+class CreateRoomRequest(BaseModel):
+    host_name: str  # Display name of the player creating the room
+    settings: GameSettings = GameSettings()
+
+
+class JoinRoomRequest(BaseModel):
+    name: str  # Display name of the joining player
+
+
+class PlayerScore(BaseModel):
+    player_id: str  # Public ID, safe to show to other players
+    name: str
+    score: int
+    rank: int  # 1-based, ties share a rank
+
+
+class RoomInfo(BaseModel):
+    room_id: str
+    host_id: str  # Public player ID of the host
+    state: str  # "waiting", "playing" or "finished"
+    current_question: int
+    total_questions: int
+    player_count: int
+    leaderboard: List[PlayerScore]
+
+
+class RoomJoinResponse(BaseModel):
+    room_id: str
+    player_id: str  # Public ID, as listed in leaderboards
+    player_token: str  # Secret that connects this player to the room's WebSocket; only sent to them
+    room: RoomInfo
+
+
+class RoomOption(BaseModel):
+    song_id: int
+    name: str
+
+
+class RoomQuestion(BaseModel):
+    """A question as broadcast to a room: the answer stays on the server until the reveal."""
+    question_index: int
+    total_questions: int
+    preview_url: str
+    blurred_cover_url: str
+    options: List[RoomOption]
+    time_limit: int
+    song_color: str = ""
+
+
+class RoomResult(BaseModel):
+    """The reveal after a question, shared by every player."""
+    question_index: int
+    correct_option_index: int
+    clear_cover_url: str = ""
+    artists: str = ""
+    answered: int  # Players who answered in time
+    correct: int  # Players who answered correctly
+    leaderboard: List[PlayerScore]
+    next_question_index: Optional[int] = None
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
 from pydantic import BaseModel
 
@@ -35,6 +35,31 @@ class Song(BaseModel):
     AlbumGenres: Optional[List[str]] = None
 
 
+class SongSearchHit(BaseModel):
+    """A song matched by a search or autocomplete query."""
+    song_id: int
+    name: str
+    artists: str
+    matched_field: str  # "name", "artists" or "album"
+    score: float
+
+
+class PlaylistFilters(BaseModel):
+    """Song selection rules of a custom playlist. Every rule that is set must match."""
+    genres: Optional[List[str]] = None
+    genre_match: Literal["any", "all"] = "any"  # Songs need any or all of the genres
+    start_year: Optional[int] = None
+    end_year: Optional[int] = None
+    tempos: Optional[List[str]] = None  # Tempo classes ("very-fast", "fast", "medium", "slow"), any of them
+    durations: Optional[List[str]] = None  # Duration classes ("short", "medium-length", "long"), any of them
+    bpm_buckets: Optional[List[str]] = None  # BPM ranges as listed by /api/stats/facets ("120-139"), any of them
+    include_tags: Optional[List[str]] = None  # Songs need at least one of these tags
+    exclude_tags: Optional[List[str]] = None  # Songs with any of these tags are left out
+    explicit: Optional[bool] = None  # Only explicit (True) or only clean (False) songs
+    min_rank: Optional[int] = None  # Deezer rank bounds, inclusive
+    max_rank: Optional[int] = None
+
+
 class Playlist(BaseModel):
     """A predefined playlist with specific filters for song selection."""
     id: str
@@ -43,9 +68,23 @@ class Playlist(BaseModel):
     genres: Optional[List[str]] = None
     start_year: Optional[int] = None
     end_year: Optional[int] = None
+    artist_id: Optional[int] = None  # Only songs this artist is credited on
+    filters: Optional[PlaylistFilters] = None  # Set on custom playlists
+    song_count: Optional[int] = None  # Distinct songs a custom playlist currently matches
     cover_image: Optional[str] = None
 
 
+class CreatePlaylistRequest(BaseModel):
+    name: str
+    description: str = ""
+    filters: PlaylistFilters
+
+
+class CreatedPlaylist(BaseModel):
+    playlist: Playlist
+    delete_token: str  # Needed to delete the playlist later
+
+
 class Artist(BaseModel):
     ArtistId: int
     Name: str
@@ -0,0 +1,201 @@
+"""Compact in-memory representation of catalog songs."""
+import re
+import sys
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Deezer cover URLs differ only by an image hash and the size
+COVER_URL_PREFIX = "https://cdn-images.dzcdn.net/images/cover/"
+COVER_URL_SUFFIX = "-000000-80-0-0.jpg"
+COVER_SIZES = {"CoverSmall": 56, "CoverMedium": 250, "CoverBig": 500, "CoverXL": 1000}
+
+_COVER_URL_PATTERN = re.compile(
+    re.escape(COVER_URL_PREFIX) + r"([0-9a-f]{32})/(\d+)x\2" + re.escape(COVER_URL_SUFFIX)
+)
+
+Covers = Union[bytes, Tuple[Optional[str], ...], None]
+
+
+def _cover_url(cover_hash: bytes, size: int) -> str:
+    return f"{COVER_URL_PREFIX}{cover_hash.hex()}/{size}x{size}{COVER_URL_SUFFIX}"
+
+
+def pack_covers(small: Optional[str], medium: Optional[str], big: Optional[str], xl: Optional[str]) -> Covers:
+    """Compress the four cover URLs of a song.
+
+    Standard Deezer covers are stored as their 16-byte image hash. Anything
+    else is kept verbatim so no URL is ever lost.
+    """
+    urls = (small, medium, big, xl)
+    if not any(urls):
+        return None
+
+    cover_hash = None
+    for url, size in zip(urls, COVER_SIZES.values()):
+        if url is None:
+            continue
+        match = _COVER_URL_PATTERN.fullmatch(url)
+        if not match or int(match.group(2)) != size or (cover_hash and match.group(1) != cover_hash):
+            return urls
+        cover_hash = match.group(1)
+
+    if any(url is None for url in urls):
+        return urls
+    return bytes.fromhex(cover_hash)
+
+
+class StringInterner:
+    """Deduplicates repeated strings and string tuples while a catalog is loaded."""
+
+    def __init__(self):
+        self._tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    def string(self, value: Optional[str]) -> Optional[str]:
+        return sys.intern(value) if value is not None else None
+
+    def strings(self, values: Optional[Sequence[str]]) -> Optional[Tuple[str, ...]]:
+        if values is None:
+            return None
+        key = tuple(sys.intern(value) for value in values)
+        return self._tuples.setdefault(key, key)
+
+
+class SongRecord:
+    """The slim, immutable subset of a Song used by the game and stats paths.
+
+    Attribute names match the ``Song`` model so records can be used wherever
+    only these fields are read. ``row`` is the song's row in the catalog
+    snapshot, from which the full ``Song`` can be rebuilt on demand.
+    """
+
+    __slots__ = (
+        "row",
+        "SongId",
+        "Name",
+        "Artists",
+        "Color",
+        "DarkColor",
+        "DeezerID",
+        "ISRC",
+        "Tags",
+        "AlbumGenres",
+        "year",
+        "_covers",
+    )
+
+    def __init__(
+        self,
+        row: int,
+        SongId: int,
+        Name: str,
+        Artists: str,
+        Color: str,
+        DarkColor: str,
+        DeezerID: Optional[int],
+        ISRC: Optional[str],
+        Tags: Optional[Tuple[str, ...]],
+        AlbumGenres: Optional[Tuple[str, ...]],
+        year: Optional[int],
+        covers: Covers
+    ):
+        self.row = row
+        self.SongId = SongId
+        self.Name = Name
+        self.Artists = Artists
+        self.Color = Color
+        self.DarkColor = DarkColor
+        self.DeezerID = DeezerID
+        self.ISRC = ISRC
+        self.Tags = Tags
+        self.AlbumGenres = AlbumGenres
+        self.year = year  # Release year, parsed from ReleaseDate or Tags
+        self._covers = covers
+
+    def __repr__(self) -> str:
+        return f"SongRecord(SongId={self.SongId}, Name={self.Name!r})"
+
+    def _cover(self, index: int, size: int) -> Optional[str]:
+        covers = self._covers
+        if covers is None:
+            return None
+        if isinstance(covers, bytes):
+            return _cover_url(covers, size)
+        return covers[index]
+
+    @property
+    def CoverSmall(self) -> Optional[str]:
+        return self._cover(0, COVER_SIZES["CoverSmall"])
+
+    @property
+    def CoverMedium(self) -> Optional[str]:
+        return self._cover(1, COVER_SIZES["CoverMedium"])
+
+    @property
+    def CoverBig(self) -> Optional[str]:
+        return self._cover(2, COVER_SIZES["CoverBig"])
+
+    @property
+    def CoverXL(self) -> Optional[str]:
+        return self._cover(3, COVER_SIZES["CoverXL"])
+
+
+def parse_release_year(release_date: Optional[str], tags: Optional[Sequence[str]]) -> Optional[int]:
+    """Extract the release year of a song.
+
+    Tries to get it from the ReleaseDate field first (format: YYYY-MM-DD),
+    then from Tags (format: "year:YYYY").
+    """
+    if release_date and len(release_date) >= 4:
+        try:
+            return int(release_date[:4])
+        except ValueError:
+            pass
+
+    if tags:
+        for tag in tags:
+            if tag.startswith("year:"):
+                try:
+                    return int(tag[5:])
+                except ValueError:
+                    pass
+
+    return None
+
+
+def build_song_records(
+    columns: Dict[str, List],
+    get_covers: Callable[[int], Tuple[Optional[str], ...]],
+    first_row: int = 0,
+    interner: Optional[StringInterner] = None
+) -> List[SongRecord]:
+    """Create records from decoded catalog columns, interning repeated strings.
+
+    ``columns`` holds the snapshot's record columns, including the derived
+    ReleaseYear and CoverHash, from row ``first_row`` on. ``get_covers``
+    returns the raw cover URLs of a row and is only called for songs whose
+    covers couldn't be hashed. Pass the same ``interner`` when building the
+    catalog in several chunks.
+    """
+    interner = interner or StringInterner()
+    records = []
+    for row, values in enumerate(zip(
+        columns["SongId"], columns["Name"], columns["Artists"], columns["Color"], columns["DarkColor"],
+        columns["DeezerID"], columns["ISRC"], columns["Tags"], columns["AlbumGenres"],
+        columns["ReleaseYear"], columns["CoverHash"],
+    ), first_row):
+        (song_id, name, artists, color, dark_color, deezer_id, isrc, tags, album_genres,
+         year, cover_hash) = values
+        records.append(SongRecord(
+            row=row,
+            SongId=song_id,
+            Name=name,
+            Artists=interner.string(artists),
+            Color=interner.string(color),
+            DarkColor=interner.string(dark_color),
+            DeezerID=deezer_id,
+            ISRC=isrc,
+            Tags=interner.strings(tags),
+            AlbumGenres=interner.strings(album_genres),
+            year=year,
+            covers=bytes.fromhex(cover_hash) if cover_hash else pack_covers(*get_covers(row))
+        ))
+    return records
@@ -0,0 +1,29 @@
+"""Routes for gameplay analytics."""
+from app.services.analytics_service import analytics_service
+from fastapi import APIRouter, Query
+
+router = APIRouter(
+    prefix="/api/analytics",
+    tags=["analytics"]
+)
+
+
+@router.get("/hardest-songs")
+async def get_hardest_songs(
+    limit: int = Query(20, ge=1, le=100),
+    min_answers: int = Query(5, ge=1)
+):
+    """Get the songs players most often fail to recognize."""
+    return await analytics_service.get_hardest_songs(limit, min_answers)
+
+
+@router.get("/genre-answer-times")
+async def get_genre_answer_times():
+    """Get mean answer time and accuracy per genre."""
+    return await analytics_service.get_answer_times_by_genre()
+
+
+@router.get("/playlist-popularity")
+async def get_playlist_popularity():
+    """Get games created and completed per playlist."""
+    return await analytics_service.get_playlist_popularity()
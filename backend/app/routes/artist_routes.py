@@ -0,0 +1,51 @@
+"""Routes for artist lookups."""
+from typing import List
+
+from app.models.artist import ArtistDetails, ArtistSong, ArtistSummary
+from app.services.artist_index import ArtistEntry
+from app.services.song_service import song_service
+from fastapi import APIRouter, HTTPException, Query
+
+router = APIRouter(
+    prefix="/api/artists",
+    tags=["artists"]
+)
+
+
+def artist_summary(artist: ArtistEntry) -> ArtistSummary:
+    details = artist.details
+    return ArtistSummary(
+        artist_id=artist.artist_id,
+        name=artist.name,
+        song_count=len(artist.songs),
+        picture_url=details.PictureMedium if details else None,
+        fans=details.NbFans if details else None,
+        top_genres=details.TopGenres if details else None
+    )
+
+
+@router.get("", response_model=List[ArtistSummary])
+async def find_artists(name: str = Query(..., min_length=1, max_length=100), limit: int = Query(20, ge=1, le=100)):
+    """Find artists whose name starts with the given text."""
+    return [artist_summary(artist) for artist in song_service.artist_index.find(name, limit)]
+
+
+@router.get("/top", response_model=List[ArtistSummary])
+async def get_top_artists(limit: int = Query(20, ge=1, le=100), min_songs: int = Query(1, ge=1)):
+    """Get the artists with the most songs in the catalog."""
+    return [artist_summary(artist) for artist in song_service.artist_index.top(limit, min_songs)]
+
+
+@router.get("/{artist_id}", response_model=ArtistDetails)
+async def get_artist(artist_id: int):
+    """Get an artist and the songs they are credited on."""
+    artist = song_service.artist_index.get(artist_id)
+    if not artist:
+        raise HTTPException(status_code=404, detail="Artist not found")
+    return ArtistDetails(
+        **artist_summary(artist).model_dump(),
+        songs=[
+            ArtistSong(song_id=song.SongId, name=song.Name, role=role)
+            for song, role in zip(artist.songs, artist.roles)
+        ]
+    )
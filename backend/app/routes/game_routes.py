@@ -1,8 +1,11 @@
 from typing import List, Optional
 
-from app.models.game import AnswerRequest, AnswerResponse, GameResponse, GameSession, GameSettings, GameSummary
+from app.models.game import AnswerRequest, AnswerResponse, GameResponse, GameSessionResponse, GameSettings, GameSummary
+from app.services.game_channel import GameChannel
 from app.services.game_service import game_service
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from app.services.playlist_service import PlaylistNotFoundError
+from app.utils.serialization import model_response
+from fastapi import APIRouter, Depends, HTTPException, WebSocket
 
 router = APIRouter(
     prefix="/api/game",
@@ -10,48 +13,56 @@ router = APIRouter(
 )
 
 
-@router.post("/create", response_model=GameSession)
+@router.post("/create", response_model=GameSessionResponse)
 async def create_game(settings: GameSettings):
     """Create a new game session with the specified settings."""
     try:
-        return await game_service.create_game(settings)
+        return model_response(await game_service.create_game(settings))
+    except PlaylistNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create game: {str(e)}")
 
 
+@router.post("/daily", response_model=GameSessionResponse)
+async def create_daily_challenge():
+    """Create a session for today's daily challenge, the same questions for every player."""
+    try:
+        return model_response(await game_service.create_daily_challenge())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create daily challenge: {str(e)}")
+
+
 @router.post("/start/{session_id}", response_model=GameResponse)
-async def start_game(session_id: str, background_tasks: BackgroundTasks):
+async def start_game(session_id: str):
     """Start a game session and get the first question."""
     # Start the game
-    session = game_service.start_game(session_id)
+    session = await game_service.start_game(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Game session not found")
 
-    # Schedule cleanup of old sessions
-    background_tasks.add_task(game_service.cleanup_old_sessions)
-
     # Get the game response
-    response = game_service.get_game_response(session_id)
+    response = await game_service.get_game_response(session_id)
     if not response:
         raise HTTPException(status_code=404, detail="Failed to get game state")
 
-    return response
+    return model_response(response)
 
 
 @router.get("/state/{session_id}", response_model=GameResponse)
 async def get_game_state(session_id: str):
     """Get the current state of a game session."""
-    response = game_service.get_game_response(session_id)
+    response = await game_service.get_game_response(session_id)
     if not response:
         raise HTTPException(status_code=404, detail="Game session not found or invalid state")
 
-    return response
+    return model_response(response)
 
 
 @router.post("/answer", response_model=AnswerResponse)
 async def answer_question(answer: AnswerRequest):
     """Submit an answer to the current question."""
-    response = game_service.answer_question(
+    response = await game_service.answer_question(
         answer.session_id,
         answer.question_index,
         answer.selected_option_index
@@ -60,14 +71,21 @@ async def answer_question(answer: AnswerRequest):
     if not response:
         raise HTTPException(status_code=404, detail="Game session not found or invalid answer")
 
-    return response
+    return model_response(response)
 
 
 @router.get("/summary/{session_id}", response_model=GameSummary)
 async def get_game_summary(session_id: str):
     """Get a summary of a completed game."""
-    summary = game_service.get_game_summary(session_id)
+    summary = await game_service.get_game_summary(session_id)
     if not summary:
         raise HTTPException(status_code=404, detail="Game session not found")
 
-    return summary
\ No newline at end of file
+    return model_response(summary)
+
+
+@router.websocket("/ws/{session_id}")
+async def game_channel(websocket: WebSocket, session_id: str):
+    """Play a game session over a WebSocket: questions, timer ticks and results are pushed,
+    answers are sent on the same connection."""
+    await GameChannel(websocket, session_id, game_service).run()
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""Routes for leaderboards."""
+from typing import Optional
+
+from app import config
+from app.models.leaderboard import Leaderboard, ScoreRank, ScoreSubmission, SubmissionResult
+from app.services.leaderboard_service import PERIODS, leaderboard_service
+from app.utils.serialization import model_response
+from fastapi import APIRouter, HTTPException, Query
+
+router = APIRouter(
+    prefix="/api/leaderboards",
+    tags=["leaderboards"]
+)
+
+
+def _check_period(period: str) -> None:
+    if period not in PERIODS:
+        raise HTTPException(status_code=400, detail=f"Unknown period, expected one of: {', '.join(PERIODS)}")
+
+
+@router.get("", response_model=Leaderboard)
+async def get_leaderboard(
+    period: str = "all-time",
+    playlist_id: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=config.LEADERBOARD_TOP_SIZE)
+):
+    """Get the top scores of the global leaderboard, or of a predefined playlist's, for a period."""
+    _check_period(period)
+    leaderboard = leaderboard_service.get_leaderboard(period, playlist_id, limit)
+    if leaderboard is None:
+        raise HTTPException(status_code=404, detail="Leaderboard not found")
+    return model_response(leaderboard)
+
+
+@router.get("/rank", response_model=ScoreRank)
+async def get_rank(score: int, period: str = "all-time", playlist_id: Optional[str] = None):
+    """Get the rank a score would have on a leaderboard."""
+    _check_period(period)
+    rank = leaderboard_service.get_rank(score, period, playlist_id)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="Leaderboard not found")
+    return model_response(rank)
+
+
+@router.post("/submit", response_model=SubmissionResult)
+async def submit_score(submission: ScoreSubmission):
+    """Add the score of a finished game to the leaderboards."""
+    try:
+        result = await leaderboard_service.submit(submission.session_id, submission.player_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not result:
+        raise HTTPException(status_code=404, detail="Game session not found")
+
+    return model_response(result)
@@ -1,9 +1,9 @@
 """Routes for playlist operations."""
 from typing import List
 
-from app.models.song import Playlist
+from app.models.song import CreatePlaylistRequest, CreatedPlaylist, Playlist
 from app.services.playlist_service import playlist_service
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 
 router = APIRouter(
     prefix="/api/playlists",
@@ -17,6 +17,40 @@ async def get_playlists():
     return playlist_service.get_all_playlists()
 
 
+@router.get("/artists", response_model=List[Playlist])
+async def get_artist_playlists():
+    """Get "guess the song from this artist" playlists for the artists with the most songs."""
+    return playlist_service.get_artist_playlists()
+
+
+@router.get("/custom", response_model=List[Playlist])
+async def get_custom_playlists():
+    """Get all user-created playlists."""
+    return playlist_service.get_custom_playlists()
+
+
+@router.post("/custom", response_model=CreatedPlaylist)
+async def create_custom_playlist(request: CreatePlaylistRequest, http_request: Request):
+    """Create a playlist from filter rules. Keep the returned token to delete it later."""
+    client = http_request.client.host if http_request.client else ""
+    try:
+        playlist, delete_token = playlist_service.create_playlist(request.name, request.description, request.filters, client)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return CreatedPlaylist(playlist=playlist, delete_token=delete_token)
+
+
+@router.delete("/custom/{playlist_id}")
+async def delete_custom_playlist(playlist_id: str, delete_token: str):
+    """Delete a user-created playlist with the token returned when it was created."""
+    deleted = playlist_service.delete_playlist(playlist_id, delete_token)
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="Playlist not found")
+    if not deleted:
+        raise HTTPException(status_code=403, detail="Invalid delete token")
+    return {"deleted": True}
+
+
 @router.get("/{playlist_id}", response_model=Playlist)
 async def get_playlist(playlist_id: str):
     """Get a playlist by its ID."""
@@ -0,0 +1,106 @@
+"""Routes for multiplayer rooms."""
+from app.models.room import CreateRoomRequest, JoinRoomRequest, RoomInfo, RoomJoinResponse
+from app.services.playlist_service import PlaylistNotFoundError
+from app.services.room_service import room_service
+from app.utils.serialization import dumps, loads, model_response
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+
+router = APIRouter(
+    prefix="/api/rooms",
+    tags=["rooms"]
+)
+
+# Close code sent when the room or player doesn't exist
+ROOM_NOT_FOUND = 4404
+
+
+@router.post("", response_model=RoomJoinResponse)
+async def create_room(request: CreateRoomRequest):
+    """Create a room with a shared set of questions. The creator joins as the host."""
+    try:
+        room, host = await room_service.create_room(request.host_name, request.settings)
+    except PlaylistNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create room: {str(e)}")
+
+    return model_response(RoomJoinResponse(
+        room_id=room.room_id,
+        player_id=host.player_id,
+        player_token=host.token,
+        room=room_service.room_info(room)
+    ))
+
+
+@router.get("/{room_id}", response_model=RoomInfo)
+async def get_room(room_id: str):
+    """Get the state and leaderboard of a room."""
+    room = room_service.get_room(room_id)
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found")
+
+    return model_response(room_service.room_info(room))
+
+
+@router.post("/{room_id}/join", response_model=RoomJoinResponse)
+async def join_room(room_id: str, request: JoinRoomRequest):
+    """Join a room as a new player."""
+    try:
+        player = room_service.join_room(room_id, request.name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not player:
+        raise HTTPException(status_code=404, detail="Room not found")
+
+    room = room_service.get_room(room_id)
+    return model_response(RoomJoinResponse(
+        room_id=room_id,
+        player_id=player.player_id,
+        player_token=player.token,
+        room=room_service.room_info(room)
+    ))
+
+
+@router.websocket("/ws/{room_id}/{player_token}")
+async def room_channel(websocket: WebSocket, room_id: str, player_token: str):
+    """Play in a room, connecting with the secret token from create or join. The host sends
+    {"type": "start"}; everyone sends {"type": "answer", "question_index": ..., "selected_option_index": ...}.
+    Questions, results and player updates are broadcast to the whole room."""
+    room = room_service.get_room(room_id)
+    player_id = room_service.get_player_id(room, player_token) if room else None
+    if not player_id:
+        await websocket.close(code=ROOM_NOT_FOUND)
+        return
+
+    await websocket.accept()
+    await room_service.connect(room, player_id, websocket)
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                message = loads(text)
+            except ValueError:
+                await websocket.send_text(dumps({"type": "error", "detail": "Invalid JSON"}).decode())
+                continue
+            message_type = message.get("type") if isinstance(message, dict) else None
+
+            if message_type == "start":
+                if not room_service.start_room(room, player_id):
+                    await websocket.send_text(dumps({"type": "error", "detail": "Only the host can start a waiting room"}).decode())
+            elif message_type == "answer":
+                try:
+                    question_index = int(message["question_index"])
+                    selected_option_index = int(message["selected_option_index"])
+                except (KeyError, TypeError, ValueError):
+                    question_index = selected_option_index = -1
+                accepted = room_service.answer(room, player_id, question_index, selected_option_index) is not None
+                reply = {"type": "answered", "question_index": question_index} if accepted else {"type": "error", "detail": "Answer rejected"}
+                await websocket.send_text(dumps(reply).decode())
+            else:
+                await websocket.send_text(dumps({"type": "error", "detail": f"Unknown message type: {message_type!r}"}).decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await room_service.disconnect(room, player_id, websocket)
@@ -1,8 +1,11 @@
 from typing import List, Optional
 
-from app.models.song import Song
+from app.models.song import Song, SongSearchHit
+from app.models.song_record import SongRecord
+from app.services.search_index import MIN_PREFIX_LENGTH, SearchHit
 from app.services.song_service import song_service
-from fastapi import APIRouter, HTTPException, Query
+from app.utils.serialization import dumps, json_array, raw_json_response
+from fastapi import APIRouter, HTTPException, Query, Response
 
 router = APIRouter(
     prefix="/api/songs",
@@ -10,11 +13,38 @@ router = APIRouter(
 )
 
 
+def songs_response(songs: List[SongRecord], **kwargs) -> Response:
+    """Build a JSON array response from the cached per-song encodings."""
+    return raw_json_response(json_array(song_service.get_song_json(song) for song in songs), **kwargs)
+
+
+def hits_response(hits: List[SearchHit]) -> Response:
+    """Encode search hits as a JSON array of SongSearchHit objects."""
+    return raw_json_response(dumps([
+        {"song_id": song.SongId, "name": song.Name, "artists": song.Artists, "matched_field": field, "score": score}
+        for song, field, score in hits
+    ]))
+
+
 @router.get("", response_model=List[dict])
-async def get_songs(limit: int = 10, offset: int = 0):
-    """Get a paginated list of songs."""
-    songs = song_service.songs[offset:offset + limit]
-    return [song.dict() for song in songs]
+async def get_songs(limit: int = 10, offset: int = 0, cursor: Optional[int] = None):
+    """Get a paginated list of songs.
+
+    Pass ``cursor`` (0 for the first page) to page by SongId instead of by
+    offset. The cursor for the next page is returned in the ``X-Next-Cursor``
+    header, which is absent on the last page.
+    """
+    if cursor is None:
+        return songs_response(song_service.songs[offset:offset + limit])
+
+    # Fetch one extra song to know whether there is a next page
+    songs = song_service.get_songs_after(cursor, max(limit, 0) + 1)
+    headers = {}
+    if len(songs) > limit:
+        songs = songs[:limit]
+        if songs:
+            headers["X-Next-Cursor"] = str(songs[-1].SongId)
+    return songs_response(songs, headers=headers)
 
 
 @router.get("/count", response_model=int)
@@ -34,7 +64,26 @@ async def get_random_songs(count: int = 10):
     """Get a list of random songs."""
     count = min(count, 50)  # Limit to 50 songs max
     songs = song_service.get_random_songs(count)
-    return [song.dict() for song in songs]
+    return songs_response(songs)
+
+
+@router.get("/batch", response_model=List[dict])
+async def get_songs_batch(ids: List[int] = Query([], max_length=100)):
+    """Get several songs by ID in a single request (up to 100 IDs)."""
+    songs = song_service.get_songs_by_ids(ids)
+    return songs_response(songs)
+
+
+@router.get("/search", response_model=List[SongSearchHit])
+async def search_songs(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(20, ge=1, le=100)):
+    """Search songs by name, artists or album name, tolerating typos."""
+    return hits_response(song_service.search_songs(q, limit))
+
+
+@router.get("/autocomplete", response_model=List[SongSearchHit])
+async def autocomplete_songs(q: str = Query(..., min_length=MIN_PREFIX_LENGTH, max_length=100), limit: int = Query(10, ge=1, le=50)):
+    """Suggest songs as a name, artist or album is typed."""
+    return hits_response(song_service.autocomplete_songs(q, limit))
 
 
 @router.get("/{song_id}", response_model=dict)
@@ -43,4 +92,4 @@ async def get_song(song_id: int):
     song = song_service.get_song_by_id(song_id)
     if not song:
         raise HTTPException(status_code=404, detail="Song not found")
-    return song.dict()
\ No newline at end of file
+    return raw_json_response(song_service.get_song_json(song))
\ No newline at end of file
@@ -1,35 +1,68 @@
 """Routes for song statistics and analytics."""
-from typing import Dict, List
+from typing import Dict, List, Literal, Optional
 
-from app.services.song_service import song_service
-from fastapi import APIRouter, HTTPException
+from app import config
+from app.models.song import PlaylistFilters
+from app.services.stats_service import stats_service
+from app.utils.http_cache import cached_response
+from fastapi import APIRouter, HTTPException, Query, Request
 
 router = APIRouter(
     prefix="/api/stats",
     tags=["stats"]
 )
 
+# Stats only change with the catalog, so let clients and CDNs keep them and revalidate
+STATS_CACHE_CONTROL = f"public, max-age={config.STATS_CACHE_MAX_AGE}, must-revalidate"
+
 
 @router.get("/years")
-async def get_available_years():
+async def get_available_years(request: Request):
     """Get a list of years that have songs in the database, suitable for filtering."""
-    years = song_service.get_available_years()
-    return {
-        "min_year": min(years) if years else None,
-        "max_year": max(years) if years else None,
-        "years": sorted(years)
-    }
+    return cached_response(request, stats_service.get_payload("years"), STATS_CACHE_CONTROL)
 
 
 @router.get("/decade-counts")
-async def get_decade_counts():
+async def get_decade_counts(request: Request):
     """Get counts of songs by decade."""
-    decades = song_service.get_decade_counts()
-    return decades
+    return cached_response(request, stats_service.get_payload("decade-counts"), STATS_CACHE_CONTROL)
 
 
 @router.get("/genre-distribution")
-async def get_genre_distribution():
+async def get_genre_distribution(request: Request):
     """Get distribution of songs by genre."""
-    genre_distribution = song_service.get_genre_distribution()
-    return genre_distribution
\ No newline at end of file
+    return cached_response(request, stats_service.get_payload("genre-distribution"), STATS_CACHE_CONTROL)
+
+
+@router.get("/facets")
+async def get_facet_counts(
+    request: Request,
+    genres: Optional[List[str]] = Query(None),
+    genre_match: Literal["any", "all"] = "any",
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+    tempos: Optional[List[str]] = Query(None),
+    durations: Optional[List[str]] = Query(None),
+    bpm_buckets: Optional[List[str]] = Query(None),
+    include_tags: Optional[List[str]] = Query(None),
+    exclude_tags: Optional[List[str]] = Query(None),
+    explicit: Optional[bool] = None,
+    min_rank: Optional[int] = None,
+    max_rank: Optional[int] = None
+):
+    """Count songs matching the filters (custom playlist rules), overall and per genre and facet value."""
+    filters = PlaylistFilters(
+        genres=genres,
+        genre_match=genre_match,
+        start_year=start_year,
+        end_year=end_year,
+        tempos=tempos,
+        durations=durations,
+        bpm_buckets=bpm_buckets,
+        include_tags=include_tags,
+        exclude_tags=exclude_tags,
+        explicit=explicit,
+        min_rank=min_rank,
+        max_rank=max_rank
+    )
+    return cached_response(request, stats_service.get_facet_payload(filters), STATS_CACHE_CONTROL)
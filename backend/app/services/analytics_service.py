@@ -0,0 +1,193 @@
+"""Append-only game event log with aggregate queries for difficulty tuning."""
+import asyncio
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app import config
+from app.services.song_service import song_service
+from app.utils.batch_writer import BatchWriter
+
+# (kind, session_id, playlist_id, song_id, correct, latency_ms, score, created_at), as stored
+EventRow = Tuple[str, str, Optional[str], Optional[int], Optional[int], Optional[float], Optional[int], float]
+
+
+class AnalyticsService:
+    """Records game events through a BatchWriter and answers aggregate queries.
+
+    Recording only appends to an in-memory buffer; a background task writes
+    batches to SQLite. Queries open their own connection in a worker thread,
+    which WAL mode lets run alongside the writer.
+    """
+
+    def __init__(
+        self,
+        db_path: str = config.ANALYTICS_DB_PATH,
+        enabled: bool = config.ANALYTICS_ENABLED,
+        flush_interval: float = config.ANALYTICS_FLUSH_INTERVAL,
+        max_pending: int = config.ANALYTICS_MAX_PENDING
+    ):
+        self.db_path = db_path
+        self.enabled = enabled
+        self.writer: BatchWriter[EventRow] = BatchWriter("analytics", self._write_events, max_pending, flush_interval)
+        if enabled:
+            with self._connect() as connection:
+                connection.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS events (
+                        id INTEGER PRIMARY KEY,
+                        kind TEXT NOT NULL,
+                        session_id TEXT NOT NULL,
+                        playlist_id TEXT,
+                        song_id INTEGER,
+                        correct INTEGER,
+                        latency_ms REAL,
+                        score INTEGER,
+                        created_at REAL NOT NULL
+                    )
+                    """
+                )
+                connection.execute("CREATE INDEX IF NOT EXISTS events_kind_song ON events (kind, song_id)")
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _write_events(self, rows: List[EventRow]) -> None:
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO events (kind, session_id, playlist_id, song_id, correct, latency_ms, score, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+        finally:
+            connection.close()
+
+    def _record(self, row: EventRow) -> None:
+        if self.enabled:
+            self.writer.add(row)
+
+    def record_create(self, session_id: str, playlist_id: Optional[str]) -> None:
+        """Record that a game was created."""
+        self._record(("create", session_id, playlist_id, None, None, None, None, time.time()))
+
+    def record_answer(
+        self,
+        session_id: str,
+        playlist_id: Optional[str],
+        song_id: int,
+        correct: bool,
+        latency_ms: Optional[float]
+    ) -> None:
+        """Record an answer (or a timeout) and how long the player took."""
+        self._record(("answer", session_id, playlist_id, song_id, int(correct), latency_ms, None, time.time()))
+
+    def record_complete(self, session_id: str, playlist_id: Optional[str], score: int) -> None:
+        """Record that a game was played to the end."""
+        self._record(("complete", session_id, playlist_id, None, None, None, score, time.time()))
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        connection = self._connect()
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    async def query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        """Run a read query off the event loop."""
+        if not self.enabled:
+            return []
+        return await asyncio.to_thread(self._query, sql, params)
+
+    async def get_hardest_songs(self, limit: int = 20, min_answers: int = 5) -> List[Dict[str, Any]]:
+        """Songs with the lowest share of correct answers."""
+        rows = await self.query(
+            """
+            SELECT song_id, COUNT(*), AVG(correct), AVG(latency_ms)
+            FROM events WHERE kind = 'answer'
+            GROUP BY song_id HAVING COUNT(*) >= ?
+            ORDER BY AVG(correct), COUNT(*) DESC
+            LIMIT ?
+            """,
+            (min_answers, limit)
+        )
+        result = []
+        for song_id, answers, accuracy, mean_latency in rows:
+            song = song_service.get_song_by_id(song_id)
+            result.append({
+                "song_id": song_id,
+                "name": song.Name if song else None,
+                "artists": song.Artists if song else None,
+                "answers": answers,
+                "accuracy": round(accuracy * 100, 1),
+                "mean_answer_ms": round(mean_latency, 1) if mean_latency is not None else None,
+            })
+        return result
+
+    async def get_answer_times_by_genre(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Mean answer time and accuracy per genre.
+
+        Answers are summed per song in SQL, then rolled up to the genres of
+        each song in the catalog (a song counts towards each of its genres).
+        """
+        rows = await self.query(
+            """
+            SELECT song_id, COUNT(*), SUM(correct), COUNT(latency_ms), TOTAL(latency_ms)
+            FROM events WHERE kind = 'answer'
+            GROUP BY song_id
+            """
+        )
+        available = set(song_service.get_available_genres())
+        # genre -> [answers, correct answers, timed answers, total answer time]
+        totals: Dict[str, List[float]] = {}
+        for song_id, answers, correct_total, timed, latency_total in rows:
+            song = song_service.get_song_by_id(song_id)
+            if song is None:
+                continue
+            for genre in song_service.get_song_genres(song):
+                if genre in available:
+                    total = totals.setdefault(genre, [0, 0, 0, 0.0])
+                    total[0] += answers
+                    total[1] += correct_total
+                    total[2] += timed
+                    total[3] += latency_total
+
+        return {
+            genre: {
+                "answers": answers,
+                "accuracy": round(correct_total / answers * 100, 1),
+                "mean_answer_ms": round(latency_total / timed, 1) if timed else None,
+            }
+            for genre, (answers, correct_total, timed, latency_total) in sorted(totals.items())
+        }
+
+    async def get_playlist_popularity(self) -> List[Dict[str, Any]]:
+        """Games created and completed per playlist (None is games without one)."""
+        rows = await self.query(
+            """
+            SELECT playlist_id,
+                   SUM(kind = 'create'),
+                   SUM(kind = 'complete'),
+                   AVG(CASE WHEN kind = 'complete' THEN score END)
+            FROM events WHERE kind IN ('create', 'complete')
+            GROUP BY playlist_id
+            ORDER BY SUM(kind = 'create') DESC
+            """
+        )
+        return [
+            {
+                "playlist_id": playlist_id,
+                "games": created,
+                "completed": completed,
+                "mean_score": round(mean_score, 1) if mean_score is not None else None,
+            }
+            for playlist_id, created, completed, mean_score in rows
+        ]
+
+
+# Create a global instance of the analytics service
+analytics_service = AnalyticsService()
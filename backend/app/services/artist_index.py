@@ -0,0 +1,104 @@
+"""Index of the artists credited on catalog songs."""
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.models.song import Artist
+from app.models.song_record import SongRecord
+from app.services.filter_engine import SongPool, normalize_name
+from app.services.search_index import normalize_text
+
+
+class ArtistEntry:
+    """An artist with the songs they are credited on, in catalog order."""
+
+    __slots__ = ("artist_id", "name", "details", "songs", "roles", "pool")
+
+    def __init__(self, artist_id: int, name: str, details: Optional[Artist]):
+        self.artist_id = artist_id
+        self.name = name
+        self.details = details  # From the catalog's artist list, when the artist is in it
+        self.songs: List[SongRecord] = []
+        self.roles: List[str] = []  # Contributor role on each song
+        self.pool: Optional[SongPool] = None
+
+    @property
+    def fans(self) -> int:
+        return (self.details.NbFans or 0) if self.details else 0
+
+
+class ArtistIndex:
+    """Artists by Deezer ID and by name, built once from song contributors.
+
+    Each artist keeps the pool of songs they are credited on (one per song
+    name), so artist quizzes sample from it directly instead of scanning the
+    catalog. Names from the catalog's artist list are preferred over
+    contributor names.
+    """
+
+    def __init__(
+        self,
+        songs: Sequence[SongRecord],
+        contributors: Sequence[Optional[List[Dict[str, Any]]]],
+        artists: Optional[List[Artist]]
+    ):
+        """Index ``songs``; ``contributors`` holds the Contributors of each song, in the same order."""
+        details_by_id = {artist.DeezerID: artist for artist in artists or () if artist.DeezerID}
+        self.artists: Dict[int, ArtistEntry] = {}
+        # Normalized names of each artist's songs, in order (dicts as ordered sets)
+        name_keys: Dict[int, Dict[str, None]] = {}
+
+        for song, credits in zip(songs, contributors):
+            name_key = normalize_name(song.Name)
+            for credit in credits or ():
+                entry = self.artists.get(credit["id"])
+                if entry is None:
+                    details = details_by_id.get(credit["id"])
+                    entry = ArtistEntry(credit["id"], details.Name if details else credit["name"], details)
+                    self.artists[credit["id"]] = entry
+                    name_keys[credit["id"]] = {}
+                # The catalog repeats some songs, and an artist can be credited twice on one
+                if name_key in name_keys[credit["id"]]:
+                    continue
+                entry.songs.append(song)
+                entry.roles.append(credit["role"])
+                name_keys[credit["id"]][name_key] = None
+
+        # Artist pools are sampled from directly, so they skip the catalog-wide bitmap filter pools carry
+        for artist_id, entry in self.artists.items():
+            entry.pool = SongPool((None, None, None), None, tuple(entry.songs), tuple(name_keys[artist_id]))
+
+        # Most songs first, then most fans
+        self.ranked: List[ArtistEntry] = sorted(
+            self.artists.values(),
+            key=lambda entry: (-len(entry.songs), -entry.fans, entry.name)
+        )
+        # (normalized name, artist ID), sorted for prefix lookups
+        self._names = sorted((normalize_text(entry.name), entry.artist_id) for entry in self.artists.values())
+
+    def __len__(self) -> int:
+        return len(self.artists)
+
+    def get(self, artist_id: int) -> Optional[ArtistEntry]:
+        return self.artists.get(artist_id)
+
+    def find(self, name: str, limit: int = 20) -> List[ArtistEntry]:
+        """Artists whose name starts with ``name`` (case and accent insensitive), most songs first."""
+        prefix = normalize_text(name)
+        names = self._names
+        matches = []
+        for index in range(bisect_left(names, (prefix,)), len(names)):
+            artist_name, artist_id = names[index]
+            if not artist_name.startswith(prefix):
+                break
+            matches.append(self.artists[artist_id])
+        matches.sort(key=lambda entry: (-len(entry.songs), -entry.fans, entry.name))
+        return matches[:limit]
+
+    def top(self, limit: int = 20, min_songs: int = 1) -> List[ArtistEntry]:
+        """Artists with the most songs in the catalog."""
+        result = []
+        for entry in self.ranked:
+            if len(entry.songs) < min_songs or len(result) >= limit:
+                break
+            result.append(entry)
+        return result
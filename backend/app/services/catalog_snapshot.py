@@ -0,0 +1,422 @@
+"""Compiled, memory-mappable snapshot of the song catalog.
+
+``songs.json`` is parsed and validated once and written out as a columnar
+binary file. Opening the snapshot only maps the file and reads a small
+header, so worker processes start quickly and share the same physical pages
+through the OS page cache.
+
+File layout (all integers little-endian)::
+
+    magic        8 bytes   b"SQCATLG\\0"
+    version      uint32    FORMAT_VERSION
+    source_hash  32 bytes  SHA-256 of the source songs.json
+    meta_length  uint32    length of the metadata JSON that follows
+    metadata     JSON      table and column directory
+    columns      ...       column blocks, each aligned to 8 bytes
+
+Column offsets in the metadata are relative to the start of the column data,
+which begins at the first 8-byte boundary after the metadata. Numbers are
+read in native byte order, so snapshots are only valid on little-endian hosts.
+
+Column types:
+
+- ``i64``: int64 per row, ``NULL_INT`` for None
+- ``f64``: float64 per row, NaN for None
+- ``bool``: int8 per row, -1 for None
+- ``str``: int64 offsets (rows + 1) into a UTF-8 blob, plus a uint8 null
+  flag per row
+- ``json``: like ``str``, but the blob is a JSON array of the encoded values
+  and the offsets point at its elements
+"""
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from app.models.song import Artist, Contributor, Song, SongsData
+from app.models.song_record import pack_covers, parse_release_year
+
+MAGIC = b"SQCATLG\0"
+FORMAT_VERSION = 2
+NULL_INT = -(2 ** 63)
+
+_HEADER = struct.Struct("<8sI32sI")
+
+# Column schema of each table: (field name, column type)
+SONG_COLUMNS: List[Tuple[str, str]] = [
+    ("SongId", "i64"),
+    ("Name", "str"),
+    ("Artists", "str"),
+    ("Color", "str"),
+    ("DarkColor", "str"),
+    ("SongMetaId", "json"),
+    ("SpotifyId", "str"),
+    ("DeezerID", "i64"),
+    ("DeezerURL", "str"),
+    ("CoverSmall", "str"),
+    ("CoverMedium", "str"),
+    ("CoverBig", "str"),
+    ("CoverXL", "str"),
+    ("ISRC", "str"),
+    ("BPM", "f64"),
+    ("Duration", "i64"),
+    ("ReleaseDate", "str"),
+    ("AlbumName", "str"),
+    ("Explicit", "bool"),
+    ("Rank", "i64"),
+    ("Tags", "json"),
+    ("Contributors", "json"),
+    ("AlbumGenres", "json"),
+]
+
+# Columns derived from the song fields at build time, so loading doesn't have to
+DERIVED_SONG_COLUMNS: List[Tuple[str, str]] = [
+    ("ReleaseYear", "i64"),  # Parsed from ReleaseDate or the "year:" tag
+    ("CoverHash", "str"),  # Hex image hash when all covers are standard Deezer cover URLs
+]
+
+# Song columns needed to build the in-memory SongRecord index
+SONG_RECORD_COLUMNS: List[str] = [
+    "SongId", "Name", "Artists", "Color", "DarkColor", "DeezerID", "ISRC", "Tags", "AlbumGenres",
+    "ReleaseYear", "CoverHash",
+]
+
+ARTIST_COLUMNS: List[Tuple[str, str]] = [
+    ("ArtistId", "i64"),
+    ("Name", "str"),
+    ("HasPublicSongs", "bool"),
+    ("SongId", "i64"),
+    ("Color", "str"),
+    ("DarkColor", "str"),
+    ("DeezerID", "i64"),
+    ("DeezerURL", "str"),
+    ("PictureSmall", "str"),
+    ("PictureMedium", "str"),
+    ("PictureBig", "str"),
+    ("PictureXL", "str"),
+    ("NbAlbums", "i64"),
+    ("NbFans", "i64"),
+    ("Radio", "bool"),
+    ("TopGenres", "json"),
+    ("Rank", "json"),
+]
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, corrupt or out of date."""
+
+
+def compute_source_hash(path: Union[str, Path]) -> bytes:
+    """SHA-256 digest of a catalog source file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _align(buffer: bytearray) -> None:
+    """Pad a buffer with zero bytes up to the next 8-byte boundary."""
+    buffer.extend(b"\0" * (-len(buffer) % 8))
+
+
+def _encode_column(values: Sequence[Any], column_type: str, buffer: bytearray) -> Dict[str, Any]:
+    """Append one column to the data buffer and return its directory entry."""
+    _align(buffer)
+    entry: Dict[str, Any] = {"type": column_type, "offset": len(buffer)}
+
+    if column_type == "i64":
+        buffer.extend(struct.pack(f"<{len(values)}q", *(NULL_INT if v is None else int(v) for v in values)))
+    elif column_type == "f64":
+        buffer.extend(struct.pack(f"<{len(values)}d", *(math.nan if v is None else float(v) for v in values)))
+    elif column_type == "bool":
+        buffer.extend(struct.pack(f"<{len(values)}b", *(-1 if v is None else int(bool(v)) for v in values)))
+    elif column_type == "str":
+        blob = bytearray()
+        offsets = [0]
+        nulls = bytearray()
+        for value in values:
+            nulls.append(value is None)
+            if value is not None:
+                blob.extend(value.encode("utf-8"))
+            offsets.append(len(blob))
+
+    elif column_type == "json":
+        # The blob is itself a JSON array, so the whole column decodes in one call
+        blob = bytearray(b"[")
+        offsets = []
+        nulls = bytearray()
+        for index, value in enumerate(values):
+            if index:
+                blob.extend(b",")
+            offsets.append(len(blob))
+            nulls.append(value is None)
+            blob.extend(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        offsets.append(len(blob))
+        blob.extend(b"]")
+    else:
+        raise ValueError(f"Unknown column type: {column_type}")
+
+    if column_type in ("str", "json"):
+        buffer.extend(struct.pack(f"<{len(offsets)}q", *offsets))
+        entry["nulls"] = len(buffer)
+        buffer.extend(nulls)
+        _align(buffer)
+        entry["blob"] = len(buffer)
+        entry["blob_length"] = len(blob)
+        buffer.extend(blob)
+
+    return entry
+
+
+def build_snapshot(data: SongsData, source_hash: bytes) -> bytes:
+    """Serialize validated catalog data into the snapshot format."""
+    body = bytearray()
+    tables: Dict[str, Any] = {}
+
+    songs = []
+    for song in data.Songs:
+        row = song.model_dump()
+        row["ReleaseYear"] = parse_release_year(song.ReleaseDate, song.Tags)
+        covers = pack_covers(song.CoverSmall, song.CoverMedium, song.CoverBig, song.CoverXL)
+        row["CoverHash"] = covers.hex() if isinstance(covers, bytes) else None
+        songs.append(row)
+
+    for table, rows, columns in (
+        ("songs", songs, SONG_COLUMNS + DERIVED_SONG_COLUMNS),
+        ("artists", [artist.model_dump() for artist in data.Artists or []], ARTIST_COLUMNS),
+    ):
+        tables[table] = {
+            "rows": len(rows),
+            "columns": {
+                name: _encode_column([row.get(name) for row in rows], column_type, body)
+                for name, column_type in columns
+            },
+        }
+
+    metadata = json.dumps({"tables": tables, "has_artists": data.Artists is not None}).encode("utf-8")
+    prefix = bytearray(_HEADER.pack(MAGIC, FORMAT_VERSION, source_hash, len(metadata)) + metadata)
+    _align(prefix)
+    return bytes(prefix + body)
+
+
+class Column:
+    """Read-only, row-indexed view of one snapshot column."""
+
+    def __init__(self, buffer: memoryview, rows: int, entry: Dict[str, Any]):
+        self.type = entry["type"]
+        self.rows = rows
+        offset = entry["offset"]
+
+        if self.type == "i64":
+            self._values = buffer[offset:offset + rows * 8].cast("q")
+        elif self.type == "f64":
+            self._values = buffer[offset:offset + rows * 8].cast("d")
+        elif self.type == "bool":
+            self._values = buffer[offset:offset + rows].cast("b")
+        else:
+            self._offsets = buffer[offset:offset + (rows + 1) * 8].cast("q")
+            self._nulls = buffer[entry["nulls"]:entry["nulls"] + rows]
+            blob_start = entry["blob"]
+            self._blob = buffer[blob_start:blob_start + entry["blob_length"]]
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, row: int) -> Any:
+        if self.type == "i64":
+            value = self._values[row]
+            return None if value == NULL_INT else value
+        if self.type == "f64":
+            value = self._values[row]
+            return None if math.isnan(value) else value
+        if self.type == "bool":
+            value = self._values[row]
+            return None if value < 0 else bool(value)
+
+        if self._nulls[row]:
+            return None
+        text = str(self._blob[self._offsets[row]:self._offsets[row + 1]], "utf-8")
+        if self.type == "str":
+            return text
+        # Elements of a json column are followed by the array's separating comma
+        return json.loads(text.rstrip(","))
+
+    def __iter__(self) -> Iterator[Any]:
+        """Read the values in row order straight from the buffer."""
+        return (self[row] for row in range(self.rows))
+
+    def to_list(self, start: int = 0, stop: Optional[int] = None) -> List[Any]:
+        """Decode rows ``start`` to ``stop`` (the whole column by default) at once, much faster than row-by-row access."""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        start = min(start, stop)
+        if self.type == "i64":
+            return [None if value == NULL_INT else value for value in self._values[start:stop].tolist()]
+        if self.type == "f64":
+            return [None if value != value else value for value in self._values[start:stop].tolist()]
+        if self.type == "bool":
+            return [None if value < 0 else bool(value) for value in self._values[start:stop].tolist()]
+
+        offsets = self._offsets[start:stop + 1].tolist()
+        base = offsets[0] if offsets else 0
+        blob = bytes(self._blob[base:offsets[-1]]) if offsets else b""
+        if self.type == "json":
+            # The elements keep their separating commas, so the rows form an array once bracketed
+            return json.loads(b"[" + blob.rstrip(b",") + b"]")
+
+        return [
+            None if is_null else blob[offsets[index] - base:offsets[index + 1] - base].decode("utf-8")
+            for index, is_null in enumerate(self._nulls[start:stop].tolist())
+        ]
+
+
+class CatalogSnapshot:
+    """An opened catalog snapshot, backed by an mmap or an in-memory buffer."""
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap], source: str = "<memory>"):
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        self.source = source
+
+        if len(buffer) < _HEADER.size:
+            raise SnapshotError(f"Snapshot {source} is truncated")
+        magic, version, source_hash, meta_length = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{source} is not a catalog snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"Snapshot {source} has format version {version}, expected {FORMAT_VERSION}")
+
+        self.source_hash: bytes = source_hash
+        metadata = json.loads(bytes(self._view[_HEADER.size:_HEADER.size + meta_length]))
+        data_start = _HEADER.size + meta_length
+        data_start += -data_start % 8
+        self._data = self._view[data_start:]
+        self._tables: Dict[str, Any] = metadata["tables"]
+        self._has_artists: bool = metadata["has_artists"]
+        self._columns: Dict[Tuple[str, str], Column] = {}
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> "CatalogSnapshot":
+        """Memory-map a snapshot file."""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, source=str(path))
+
+    @property
+    def version(self) -> str:
+        """Catalog version string, derived from the source file hash."""
+        return self.source_hash.hex()[:16]
+
+    def row_count(self, table: str = "songs") -> int:
+        return self._tables[table]["rows"]
+
+    def column(self, name: str, table: str = "songs") -> Column:
+        """Get a column accessor, creating it on first use."""
+        key = (table, name)
+        column = self._columns.get(key)
+        if column is None:
+            table_meta = self._tables[table]
+            column = Column(self._data, table_meta["rows"], table_meta["columns"][name])
+            self._columns[key] = column
+        return column
+
+    def song_dict(self, row: int) -> Dict[str, Any]:
+        """Read a row as the plain dict a Song model would dump to."""
+        return {name: self.column(name)[row] for name, _ in SONG_COLUMNS}
+
+    def song(self, row: int) -> Song:
+        """Build the Song model for a row without re-validating it."""
+        values = self.song_dict(row)
+        if values["Contributors"] is not None:
+            values["Contributors"] = [Contributor.model_construct(**c) for c in values["Contributors"]]
+        return Song.model_construct(**values)
+
+    def songs(self) -> List[Song]:
+        """Build the Song models for every row without re-validating them."""
+        names = [name for name, _ in SONG_COLUMNS]
+        columns = [self.column(name).to_list() for name in names]
+        contributors_index = names.index("Contributors")
+        construct_song = Song.model_construct
+        construct_contributor = Contributor.model_construct
+
+        songs = []
+        for row in zip(*columns):
+            values = dict(zip(names, row))
+            contributors = row[contributors_index]
+            if contributors is not None:
+                values["Contributors"] = [construct_contributor(**c) for c in contributors]
+            songs.append(construct_song(**values))
+        return songs
+
+    def artist(self, row: int) -> Artist:
+        values = {name: self.column(name, "artists")[row] for name, _ in ARTIST_COLUMNS}
+        return Artist.model_construct(**values)
+
+    def artists(self) -> Optional[List[Artist]]:
+        if not self._has_artists:
+            return None
+        names = [name for name, _ in ARTIST_COLUMNS]
+        columns = [self.column(name, "artists").to_list() for name in names]
+        construct_artist = Artist.model_construct
+        return [construct_artist(**dict(zip(names, row))) for row in zip(*columns)]
+
+
+def write_snapshot(json_path: Union[str, Path], snapshot_path: Union[str, Path]) -> bytes:
+    """Compile a catalog JSON file into a snapshot file and return its contents.
+
+    The file is written to a temporary name and renamed into place, so
+    concurrent builders and readers never see a partial snapshot.
+    """
+    source_hash = compute_source_hash(json_path)
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = SongsData(**json.load(f))
+    contents = build_snapshot(data, source_hash)
+
+    snapshot_path = Path(snapshot_path)
+    tmp_path = snapshot_path.with_name(f"{snapshot_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(contents)
+    os.replace(tmp_path, snapshot_path)
+    return contents
+
+
+def load_snapshot(json_path: Union[str, Path], snapshot_path: Union[str, Path]) -> CatalogSnapshot:
+    """Open the snapshot for a catalog file, (re)building it when stale.
+
+    When the snapshot can't be written (e.g. a read-only filesystem), the
+    compiled catalog is served from memory instead.
+    """
+    source_hash = compute_source_hash(json_path)
+    if Path(snapshot_path).exists():
+        try:
+            snapshot = CatalogSnapshot.open(snapshot_path)
+            if snapshot.source_hash == source_hash:
+                return snapshot
+            print(f"Catalog snapshot {snapshot_path} is out of date, rebuilding")
+        except (SnapshotError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable catalog snapshot: {e}")
+
+    try:
+        write_snapshot(json_path, snapshot_path)
+        return CatalogSnapshot.open(snapshot_path)
+    except OSError as e:
+        print(f"Could not write catalog snapshot {snapshot_path}: {e}")
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = SongsData(**json.load(f))
+        return CatalogSnapshot(build_snapshot(data, source_hash))
+
+
+if __name__ == "__main__":
+    # Build the snapshot ahead of time, e.g. during the Docker image build:
+    #   python -m app.services.catalog_snapshot [songs.json] [songs.snapshot]
+    from app import config
+
+    source = sys.argv[1] if len(sys.argv) > 1 else config.CATALOG_PATH
+    target = sys.argv[2] if len(sys.argv) > 2 else config.CATALOG_SNAPSHOT_PATH
+    write_snapshot(source, target)
+    print(f"Wrote catalog snapshot {target}")
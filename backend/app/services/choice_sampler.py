@@ -0,0 +1,130 @@
+"""Sampling of wrong answer options (distractors) for game questions."""
+import random
+from typing import List, Optional, Set
+
+from app.models.song_record import SongRecord
+from app.services.filter_engine import SongPool, normalize_name
+from app.services.similarity import SimilarityIndex
+
+
+class ChoiceSampler:
+    """Draws distractors with unique names from a precomputed song pool.
+
+    Candidates are picked by rejection sampling: a random song is drawn from
+    the pool and rejected if its normalized name was already used. While the
+    pool holds many more distinct names than needed this costs O(k) expected
+    draws. When too many draws get rejected, or the pool simply has too few
+    distinct names, the remaining options come from an exhaustive pass, first
+    over the pool and then over the fallback pool.
+    """
+
+    def __init__(self, max_draws_per_choice: int = 8):
+        self.max_draws_per_choice = max_draws_per_choice
+
+    def sample(
+        self,
+        pool: SongPool,
+        correct_song: SongRecord,
+        count: int,
+        fallback_pool: Optional[SongPool] = None,
+        rng: Optional[random.Random] = None
+    ) -> List[SongRecord]:
+        """Pick up to ``count`` songs whose names differ from each other and from the correct song."""
+        # Without a dedicated generator, use the module-level one
+        rng = rng or random
+        seen_names: Set[str] = {normalize_name(correct_song.Name)}
+        chosen: List[SongRecord] = []
+
+        if count <= 0:
+            return chosen
+
+        self._draw(pool, count, seen_names, chosen, rng)
+
+        if len(chosen) < count:
+            self._exhaust(pool, count, seen_names, chosen, rng)
+
+        if len(chosen) < count and fallback_pool is not None and fallback_pool is not pool:
+            self._draw(fallback_pool, count, seen_names, chosen, rng)
+            if len(chosen) < count:
+                self._exhaust(fallback_pool, count, seen_names, chosen, rng)
+
+        return chosen
+
+    def sample_similar(
+        self,
+        pool: SongPool,
+        correct_song: SongRecord,
+        count: int,
+        similarity: SimilarityIndex,
+        max_candidates: int,
+        fallback_pool: Optional[SongPool] = None,
+        rng: Optional[random.Random] = None
+    ) -> List[SongRecord]:
+        """Pick up to ``count`` distinct-named songs that are the most similar to the correct song.
+
+        At most ``max_candidates`` songs of the pool (an evenly spread sample
+        when it is larger) are ranked, so the cost doesn't grow with the catalog.
+        Options still missing are filled like ``sample`` does.
+        """
+        rng = rng or random
+        seen_names: Set[str] = {normalize_name(correct_song.Name)}
+        chosen: List[SongRecord] = []
+
+        if count <= 0:
+            return chosen
+
+        songs = pool.songs
+        # Systematic sample: every step-th song from a random offset, one random draw however large the pool
+        step = -(-len(songs) // max_candidates) if max_candidates > 0 else 1
+        indexes = range(rng.randrange(step), len(songs), step) if songs else range(0)
+        by_row = {songs[index].row: index for index in indexes}
+        for row in similarity.rank(correct_song.row, list(by_row)):
+            index = by_row[row]
+            name_key = pool.name_keys[index]
+            if name_key not in seen_names:
+                seen_names.add(name_key)
+                chosen.append(songs[index])
+                if len(chosen) == count:
+                    return chosen
+
+        if fallback_pool is not None and fallback_pool is not pool:
+            self._draw(fallback_pool, count, seen_names, chosen, rng)
+            if len(chosen) < count:
+                self._exhaust(fallback_pool, count, seen_names, chosen, rng)
+
+        return chosen
+
+    def _draw(self, pool: SongPool, count: int, seen_names: Set[str], chosen: List[SongRecord], rng: random.Random) -> None:
+        """Rejection-sample songs with unseen names from the pool."""
+        size = len(pool.songs)
+        needed = count - len(chosen)
+        # Don't bother when the pool can't provide enough new names; counting the
+        # overlap with the few seen names is O(k), unlike a set difference of the pool
+        name_key_set = pool.name_key_set
+        unseen = len(name_key_set) - sum(name_key in name_key_set for name_key in seen_names)
+        if size == 0 or unseen < needed:
+            return
+
+        songs = pool.songs
+        name_keys = pool.name_keys
+        draws_left = self.max_draws_per_choice * needed
+        while len(chosen) < count and draws_left > 0:
+            draws_left -= 1
+            index = rng.randrange(size)
+            name_key = name_keys[index]
+            if name_key not in seen_names:
+                seen_names.add(name_key)
+                chosen.append(songs[index])
+
+    def _exhaust(self, pool: SongPool, count: int, seen_names: Set[str], chosen: List[SongRecord], rng: random.Random) -> None:
+        """Fill the remaining options from every song in the pool with an unseen name."""
+        candidates = {}
+        for song, name_key in zip(pool.songs, pool.name_keys):
+            if name_key not in seen_names and name_key not in candidates:
+                candidates[name_key] = song
+
+        needed = count - len(chosen)
+        picked = rng.sample(list(candidates.items()), min(needed, len(candidates)))
+        for name_key, song in picked:
+            seen_names.add(name_key)
+            chosen.append(song)
@@ -0,0 +1,226 @@
+"""Precomputed filter indexes for selecting songs by genre and release year."""
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.models.song_record import SongRecord
+
+# Bit positions set in each byte value, used to walk bitmaps a byte at a time
+_BYTE_BITS: List[Tuple[int, ...]] = [
+    tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)
+]
+
+PoolKey = Tuple[Optional[Tuple[str, ...]], Optional[int], Optional[int]]
+
+
+def mask_of_positions(positions: Iterable[int], size: int) -> int:
+    """Bitmap of ``size`` bits with the given positions set.
+
+    Bits are set in a bytearray and converted once, where OR-ing
+    ``1 << position`` into an int would copy the whole bitmap every time.
+    """
+    data = bytearray((size + 7) // 8 or 1)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, "little")
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a song name for duplicate detection (case and spacing insensitive)."""
+    return " ".join(name.casefold().split())
+
+
+class SongPool:
+    """An immutable set of songs matching some filter, in catalog order."""
+
+    __slots__ = ("key", "mask", "songs", "name_keys", "name_key_set")
+
+    def __init__(self, key: PoolKey, mask: Optional[int], songs: Tuple[SongRecord, ...], name_keys: Tuple[str, ...]):
+        self.key = key
+        self.mask = mask  # Bitmap of catalog positions, None for pools not built from a filter
+        self.songs = songs
+        self.name_keys = name_keys  # Normalized name of each song in the pool
+        self.name_key_set = frozenset(name_keys)
+
+    def __len__(self) -> int:
+        return len(self.songs)
+
+
+class FilterEngine:
+    """Answers genre and year-range filters with bitmaps over catalog positions.
+
+    Every song gets a position in the catalog. Each genre is stored as a
+    bitmap (a Python int) of the positions tagged with it, and release years
+    are kept sorted with a cumulative bitmap per distinct year, so a year
+    range is two bisections and one mask operation. Resolved pools are
+    memoized by their normalized (genres, start_year, end_year) key.
+
+    Tags, the explicit flag and Deezer ranks are indexed the same way for
+    richer filters (see ``tag_mask``, ``explicit_mask`` and ``rank_mask``).
+    """
+
+    def __init__(
+        self,
+        songs: Sequence[SongRecord],
+        get_genres: Callable[[SongRecord], Sequence[str]],
+        get_year: Callable[[SongRecord], Optional[int]],
+        cache_size: int = 256,
+        get_tags: Optional[Callable[[SongRecord], Sequence[str]]] = None,
+        get_explicit: Optional[Callable[[SongRecord], Optional[bool]]] = None,
+        get_rank: Optional[Callable[[SongRecord], Optional[int]]] = None
+    ):
+        self.songs: Tuple[SongRecord, ...] = tuple(songs)
+        self.all_mask = (1 << len(self.songs)) - 1
+        self.genre_masks: Dict[str, int] = {}
+        self.tag_masks: Dict[str, int] = {}
+        self.explicit_mask = 0  # Songs flagged explicit
+        self.years: List[Optional[int]] = []
+        self.name_keys: Tuple[str, ...] = tuple(normalize_name(song.Name) for song in self.songs)
+        # (rank, position) of songs with a rank, sorted for range lookups
+        self._ranks: List[Tuple[int, int]] = []
+
+        # Positions of the songs having each value, turned into bitmaps once all are known
+        genre_positions: Dict[str, List[int]] = {}
+        tag_positions: Dict[str, List[int]] = {}
+        explicit_positions: List[int] = []
+        year_positions: Dict[int, List[int]] = {}
+        for position, song in enumerate(self.songs):
+            for genre in get_genres(song):
+                genre_positions.setdefault(genre, []).append(position)
+            if get_tags is not None:
+                for tag in get_tags(song):
+                    tag_positions.setdefault(tag, []).append(position)
+            if get_explicit is not None and get_explicit(song):
+                explicit_positions.append(position)
+            if get_rank is not None:
+                rank = get_rank(song)
+                if rank is not None:
+                    self._ranks.append((rank, position))
+
+            year = get_year(song)
+            self.years.append(year)
+            # Songs without a usable year never match a year filter
+            if year:
+                year_positions.setdefault(year, []).append(position)
+
+        self.genre_masks = {genre: self.mask_of_positions(positions) for genre, positions in genre_positions.items()}
+        self.tag_masks = {tag: self.mask_of_positions(positions) for tag, positions in tag_positions.items()}
+        self.explicit_mask = self.mask_of_positions(explicit_positions) if explicit_positions else 0
+        year_masks = {year: self.mask_of_positions(positions) for year, positions in year_positions.items()}
+        self._ranks.sort()
+
+        # Sorted distinct years with the bitmap of songs released up to each one
+        self._sorted_years: List[int] = sorted(year_masks)
+        self._year_prefix_masks: List[int] = []
+        cumulative = 0
+        for year in self._sorted_years:
+            cumulative |= year_masks[year]
+            self._year_prefix_masks.append(cumulative)
+
+        self._resolve_cached = lru_cache(maxsize=cache_size)(self._resolve)
+
+    @staticmethod
+    def normalize_key(
+        genres: Optional[Sequence[str]] = None,
+        start_year: Optional[int] = None,
+        end_year: Optional[int] = None
+    ) -> PoolKey:
+        """Build the cache key for a filter, ignoring genre order and duplicates."""
+        genre_key = tuple(sorted(set(genres))) if genres else None
+        return (genre_key, start_year or None, end_year or None)
+
+    def genre_mask(self, genres: Sequence[str]) -> int:
+        """Bitmap of songs tagged with any of the given genres."""
+        mask = 0
+        for genre in genres:
+            mask |= self.genre_masks.get(genre, 0)
+        return mask
+
+    def all_genres_mask(self, genres: Sequence[str]) -> int:
+        """Bitmap of songs tagged with every one of the given genres."""
+        mask = self.all_mask
+        for genre in genres:
+            mask &= self.genre_masks.get(genre, 0)
+        return mask
+
+    def tag_mask(self, tags: Sequence[str]) -> int:
+        """Bitmap of songs with any of the given tags."""
+        mask = 0
+        for tag in tags:
+            mask |= self.tag_masks.get(tag, 0)
+        return mask
+
+    def rank_mask(self, min_rank: Optional[int] = None, max_rank: Optional[int] = None) -> int:
+        """Bitmap of songs whose rank is within the (inclusive) range; songs without a rank never match."""
+        low = bisect_left(self._ranks, (min_rank,)) if min_rank is not None else 0
+        high = bisect_right(self._ranks, (max_rank, len(self.songs))) if max_rank is not None else len(self._ranks)
+        return self.mask_of_positions(position for _, position in self._ranks[low:high])
+
+    def mask_of_positions(self, positions: Iterable[int]) -> int:
+        """Bitmap with the given positions set."""
+        return mask_of_positions(positions, len(self.songs))
+
+    def year_mask(self, start_year: Optional[int] = None, end_year: Optional[int] = None) -> int:
+        """Bitmap of songs released within the (inclusive) year range."""
+        years = self._sorted_years
+        prefix_masks = self._year_prefix_masks
+
+        # Index of the last year <= end_year
+        high = bisect_right(years, end_year) - 1 if end_year else len(years) - 1
+        if high < 0:
+            return 0
+        # Index of the first year >= start_year
+        low = bisect_left(years, start_year) if start_year else 0
+        if low > high:
+            return 0
+
+        mask = prefix_masks[high]
+        if low > 0:
+            mask &= ~prefix_masks[low - 1]
+        return mask
+
+    def iter_positions(self, mask: int) -> Iterator[int]:
+        """Yield the catalog positions set in a bitmap, in ascending order."""
+        data = mask.to_bytes((len(self.songs) + 7) // 8 or 1, "little")
+        for byte_index, byte in enumerate(data):
+            if byte:
+                base = byte_index * 8
+                for bit in _BYTE_BITS[byte]:
+                    yield base + bit
+
+    def pool_for_mask(self, key: PoolKey, mask: int) -> SongPool:
+        """Materialize the songs whose positions are set in a bitmap."""
+        positions = list(self.iter_positions(mask))
+        songs = self.songs
+        name_keys = self.name_keys
+        return SongPool(
+            key,
+            mask,
+            tuple(songs[position] for position in positions),
+            tuple(name_keys[position] for position in positions)
+        )
+
+    def resolve(
+        self,
+        genres: Optional[Sequence[str]] = None,
+        start_year: Optional[int] = None,
+        end_year: Optional[int] = None
+    ) -> SongPool:
+        """Get the pool of songs matching the filter, computing it at most once."""
+        return self._resolve_cached(self.normalize_key(genres, start_year, end_year))
+
+    def _resolve(self, key: PoolKey) -> SongPool:
+        genres, start_year, end_year = key
+        mask = self.all_mask
+
+        if genres:
+            mask &= self.genre_mask(genres)
+
+        if start_year or end_year:
+            mask &= self.year_mask(start_year, end_year)
+
+        return self.pool_for_mask(key, mask)
+
+    def clear_cache(self) -> None:
+        """Forget all memoized pools."""
+        self._resolve_cached.cache_clear()
@@ -0,0 +1,155 @@
+"""Push channel streaming a game session to a client over a WebSocket."""
+import asyncio
+from typing import Any, Dict, Optional
+
+from app import config
+from app.services.game_service import GameService
+from app.utils.serialization import dumps, loads
+from fastapi import WebSocket, WebSocketDisconnect
+
+# Close code sent when the session doesn't exist
+SESSION_NOT_FOUND = 4404
+
+
+class GameChannel:
+    """Runs one game session over a WebSocket, replacing the start/state/answer requests.
+
+    Client messages::
+
+        {"type": "start"}
+        {"type": "answer", "question_index": 0, "selected_option_index": 2}
+
+    Server messages::
+
+        {"type": "question", "data": GameResponse}
+        {"type": "tick", "question_index": 0, "time_remaining": 12}
+        {"type": "result", "question_index": 0, "data": AnswerResponse}
+        {"type": "summary", "data": GameSummary}
+        {"type": "error", "detail": "..."}
+
+    Once the game is started, the server sends a tick every ``tick_interval``
+    seconds and submits a timeout answer itself when a question's time runs
+    out. Connecting to a game that is already running resumes it at the
+    current question.
+    """
+
+    def __init__(self, websocket: WebSocket, session_id: str, games: GameService, tick_interval: float = config.GAME_TICK_INTERVAL):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.games = games
+        self.tick_interval = tick_interval
+        self._send_lock = asyncio.Lock()  # The ticker and the receive loop both send
+        self._ticker: Optional[asyncio.Task] = None
+
+    async def run(self) -> None:
+        """Serve the channel until the client disconnects or the game ends."""
+        session = await self.games.sessions.aget(self.session_id)
+        if session is None:
+            await self.websocket.close(code=SESSION_NOT_FOUND)
+            return
+
+        await self.websocket.accept()
+        try:
+            if session.started_at > 0:
+                await self._begin()
+            while True:
+                text = await self.websocket.receive_text()
+                try:
+                    message = loads(text)
+                except ValueError:
+                    await self._send("error", detail="Invalid JSON")
+                    continue
+                if not await self._handle(message):
+                    break
+        except WebSocketDisconnect:
+            pass
+        finally:
+            if self._ticker is not None:
+                self._ticker.cancel()
+
+    async def _send(self, message_type: str, **fields: Any) -> None:
+        async with self._send_lock:
+            await self.websocket.send_text(dumps({"type": message_type, **fields}).decode())
+
+    async def _handle(self, message: Dict[str, Any]) -> bool:
+        """Process a client message. Returns False once the channel should close."""
+        message_type = message.get("type") if isinstance(message, dict) else None
+
+        if message_type == "start":
+            if self._ticker is not None:
+                await self._send("error", detail="Game already started")
+                return True
+            if not await self.games.start_game(self.session_id):
+                await self._send("error", detail="Game session not found")
+                return False
+            await self._begin()
+            return True
+
+        if message_type == "answer":
+            try:
+                question_index = int(message["question_index"])
+                selected_option_index = int(message["selected_option_index"])
+            except (KeyError, TypeError, ValueError):
+                await self._send("error", detail="Invalid answer")
+                return True
+            return await self._answer(question_index, selected_option_index)
+
+        await self._send("error", detail=f"Unknown message type: {message_type!r}")
+        return True
+
+    async def _begin(self) -> None:
+        """Send the current question and start the timer."""
+        if await self._send_question():
+            self._ticker = asyncio.create_task(self._tick())
+
+    async def _send_question(self) -> bool:
+        response = await self.games.get_game_response(self.session_id)
+        if response is None:
+            await self._send_summary()
+            return False
+        await self._send("question", data=response.model_dump(mode="json"))
+        return True
+
+    async def _send_summary(self) -> None:
+        summary = await self.games.get_game_summary(self.session_id)
+        if summary is not None:
+            await self._send("summary", data=summary.model_dump(mode="json"))
+        await self.websocket.close()
+
+    async def _answer(self, question_index: int, selected_option_index: int, timed_out: bool = False) -> bool:
+        """Apply an answer and push its result and what comes next."""
+        result = await self.games.answer_question(self.session_id, question_index, selected_option_index)
+        if result is None:
+            # Stale or duplicate answers are rejected; a timeout losing the race to a real answer is fine
+            if not timed_out:
+                await self._send("error", detail="Game session not found or invalid answer")
+            return True
+
+        await self._send("result", question_index=question_index, data=result.model_dump(mode="json"))
+        if result.game_complete:
+            if self._ticker is not None and self._ticker is not asyncio.current_task():
+                self._ticker.cancel()
+            await self._send_summary()
+            return False
+
+        await self._send_question()
+        return True
+
+    async def _tick(self) -> None:
+        """Push the time remaining and time out questions nobody answered."""
+        try:
+            while True:
+                await asyncio.sleep(self.tick_interval)
+                timer = await self.games.get_timer(self.session_id)
+                if timer is None or timer[1] is None:
+                    return
+
+                question_index, time_remaining = timer
+                await self._send("tick", question_index=question_index, time_remaining=time_remaining)
+                if time_remaining <= 0:
+                    # -1 is the timeout answer, always wrong
+                    if not await self._answer(question_index, -1, timed_out=True):
+                        return
+        except (WebSocketDisconnect, RuntimeError):
+            # The client went away between ticks
+            pass
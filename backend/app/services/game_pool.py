@@ -0,0 +1,131 @@
+"""Pool of pre-generated games, kept ready for the most common game settings."""
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from app.models.game import GameQuestion
+
+# (genres, start_year, end_year, num_songs, num_choices, difficulty, pool_playlist_id), with the filter part
+# normalized; pool_playlist_id is set for playlists that have their own song pool instead of filters
+GameKey = Tuple[Optional[Tuple[str, ...]], Optional[int], Optional[int], int, int, str, Optional[str]]
+
+
+class PooledGame:
+    """The questions of a ready-made game and when its preview URLs stop being valid."""
+
+    __slots__ = ("questions", "expires_at")
+
+    def __init__(self, questions: List[GameQuestion], expires_at: float):
+        self.questions = questions
+        self.expires_at = expires_at
+
+
+class GamePool:
+    """Bounded per-settings queues of games built ahead of time.
+
+    A background producer (``run``) keeps up to ``size`` games ready for each
+    target key. Games whose preview URLs are about to expire are dropped and
+    rebuilt, so a game taken from the pool can always be played through.
+    Taking a game removes it, so no two sessions ever share questions.
+
+    A key whose build fails, or yields a game that is already expiring (e.g.
+    preview lookups failing during a Deezer outage), isn't retried until a
+    backoff delay has passed, doubling with each failure up to ``max_backoff``.
+    """
+
+    def __init__(self, size: int = 4, refresh_margin: float = 120.0, backoff: float = 30.0, max_backoff: float = 600.0):
+        self.size = size
+        # Games expiring within this many seconds are no longer handed out
+        self.refresh_margin = refresh_margin
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._games: Dict[GameKey, Deque[PooledGame]] = {}
+        self._targets: List[GameKey] = []
+        # Keys whose last build failed: (consecutive failures, time of the next attempt)
+        self._failures: Dict[GameKey, Tuple[int, float]] = {}
+
+    def set_targets(self, keys: Iterable[GameKey]) -> None:
+        """Set the keys the producer keeps games ready for."""
+        self._targets = list(dict.fromkeys(keys))
+        for key in list(self._games):
+            if key not in self._targets:
+                del self._games[key]
+        self._failures = {key: failure for key, failure in self._failures.items() if key in self._targets}
+
+    @property
+    def targets(self) -> List[GameKey]:
+        return list(self._targets)
+
+    def available(self, key: GameKey) -> int:
+        """Number of games currently pooled for a key."""
+        games = self._games.get(key)
+        return len(games) if games else 0
+
+    def take(self, key: GameKey) -> Optional[List[GameQuestion]]:
+        """Remove and return the questions of a ready game, or None when the pool is empty."""
+        games = self._games.get(key)
+        if not games:
+            return None
+
+        cutoff = time.time() + self.refresh_margin
+        while games:
+            game = games.popleft()
+            if game.expires_at > cutoff:
+                return game.questions
+        return None
+
+    def put(self, key: GameKey, game: PooledGame) -> None:
+        """Add a game to a key's queue, unless it is already full."""
+        games = self._games.setdefault(key, deque())
+        if len(games) < self.size:
+            games.append(game)
+
+    def _drop_expiring(self, key: GameKey) -> None:
+        games = self._games.get(key)
+        if not games:
+            return
+        cutoff = time.time() + self.refresh_margin
+        fresh = [game for game in games if game.expires_at > cutoff]
+        if len(fresh) != len(games):
+            self._games[key] = deque(fresh)
+
+    def _record_failure(self, key: GameKey) -> None:
+        failures = self._failures.get(key, (0, 0.0))[0] + 1
+        delay = min(self.max_backoff, self.backoff * 2 ** (failures - 1))
+        self._failures[key] = (failures, time.time() + delay)
+
+    async def replenish(self, build: Callable[[GameKey], Awaitable[PooledGame]]) -> int:
+        """Refill every target key up to the pool size. Returns the number of games built."""
+        built = 0
+        for key in self._targets:
+            self._drop_expiring(key)
+            failure = self._failures.get(key)
+            if failure is not None and failure[1] > time.time():
+                continue
+            while self.available(key) < self.size:
+                try:
+                    game = await build(key)
+                except Exception as e:
+                    print(f"Error pre-generating game for {key}: {e}")
+                    self._record_failure(key)
+                    break
+                if game.expires_at <= time.time() + self.refresh_margin:
+                    # Some previews couldn't be resolved; don't pool the game or retry right away
+                    self._record_failure(key)
+                    break
+                self._failures.pop(key, None)
+                self.put(key, game)
+                built += 1
+        return built
+
+    async def run(self, build: Callable[[GameKey], Awaitable[PooledGame]], interval: float) -> None:
+        """Keep the pool filled until cancelled."""
+        while True:
+            try:
+                built = await self.replenish(build)
+                if built:
+                    print(f"Pre-generated {built} games")
+            except Exception as e:
+                print(f"Error replenishing game pool: {e}")
+            await asyncio.sleep(interval)
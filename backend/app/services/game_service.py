@@ -1,207 +1,504 @@
+import asyncio
 import random
 import time
 import uuid
+from collections import OrderedDict
+from datetime import date, datetime, timezone
 from typing import Dict, List, Optional, Tuple
 
+from app import config
 from app.models.game import (
     AnswerResponse,
     GameOption,
     GameQuestion,
     GameResponse,
     GameSession,
+    GameSessionResponse,
     GameSettings,
     GameSummary,
 )
-from app.models.song import Song
-from app.services.playlist_service import playlist_service
+from app.models.song_record import SongRecord
+from app.services.analytics_service import analytics_service
+from app.services.filter_engine import FilterEngine
+from app.services.game_pool import GameKey, GamePool, PooledGame
+from app.services.playlist_service import PlaylistNotFoundError, playlist_service
+from app.services.session_store import SessionStore, create_session_store
 from app.services.song_service import song_service
 
 
 class GameService:
-    def __init__(self):
+    def __init__(
+        self,
+        session_store: Optional[SessionStore] = None,
+        session_idle_timeout: float = config.SESSION_IDLE_TIMEOUT,
+        preview_concurrency: int = config.PREVIEW_CONCURRENCY,
+        preview_timeout: float = config.PREVIEW_TIMEOUT,
+        game_pool: Optional[GamePool] = None,
+        seeded_game_cache_size: int = config.SEEDED_GAME_CACHE_SIZE
+    ):
         # Store active game sessions
-        self.active_sessions: Dict[str, GameSession] = {}
+        self.sessions: SessionStore = session_store if session_store is not None else create_session_store()
+        # Sessions without activity for this many seconds are expired
+        self.session_idle_timeout = session_idle_timeout
+        # Limits for preview URL lookups while creating a game
+        self.preview_concurrency = preview_concurrency
+        self.preview_timeout = preview_timeout
+        # Ready-made games for common settings, filled by run_game_pool
+        self.game_pool = game_pool or GamePool(
+            size=config.GAME_POOL_SIZE,
+            refresh_margin=config.GAME_POOL_REFRESH_MARGIN,
+            backoff=config.GAME_POOL_INTERVAL,
+            max_backoff=config.GAME_POOL_MAX_BACKOFF
+        )
+        # Question sets of seeded games, keyed by (catalog version, game key, seed), least recently used first
+        self.seeded_games: "OrderedDict[Tuple[str, GameKey, int], PooledGame]" = OrderedDict()
+        self.seeded_game_cache_size = seeded_game_cache_size
+        self._seeded_in_flight: Dict[Tuple[str, GameKey, int], "asyncio.Future[PooledGame]"] = {}
 
-    async def create_game(self, settings: GameSettings) -> GameSession:
+    async def create_game(self, settings: GameSettings) -> GameSessionResponse:
         """Create a new game session with the specified settings."""
-        # Process playlist if specified
+        questions = await self.generate_questions(settings)
+        return await self.create_session(questions, seed=settings.seed, playlist_id=settings.playlist_id)
+
+    async def generate_questions(self, settings: GameSettings, resolve_previews: bool = True) -> List[GameQuestion]:
+        """Get the questions for a game with the specified settings.
+
+        Games for common settings are taken ready-made from the game pool and
+        seeded games are reused from the seeded game cache; anything else is
+        built on demand. Without ``resolve_previews``, the game is always built
+        (seeded or not) with empty preview URLs, for callers that resolve them
+        later.
+        """
+        genres, start_year, end_year, pool_playlist_id = self._resolve_filters(settings)
+        key = self.game_key(
+            genres, start_year, end_year, settings.num_songs, settings.num_choices, settings.difficulty, pool_playlist_id
+        )
+
+        if not resolve_previews:
+            return await self.build_questions(
+                settings.num_songs,
+                settings.num_choices,
+                genres=genres,
+                start_year=start_year,
+                end_year=end_year,
+                rng=random.Random(settings.seed) if settings.seed is not None else None,
+                difficulty=settings.difficulty,
+                pool_playlist_id=pool_playlist_id,
+                resolve_previews=False
+            )
+
+        if settings.seed is not None:
+            return await self._get_seeded_questions(key, settings.seed)
+
+        questions = self.game_pool.take(key)
+        if questions is None:
+            questions = await self.build_questions(
+                settings.num_songs,
+                settings.num_choices,
+                genres=genres,
+                start_year=start_year,
+                end_year=end_year,
+                difficulty=settings.difficulty,
+                pool_playlist_id=pool_playlist_id
+            )
+        return questions
+
+    async def create_daily_challenge(self, day: Optional[date] = None) -> GameSessionResponse:
+        """Create a session for the daily challenge, the same game for every player on a (UTC) day."""
+        return await self.create_game(GameSettings(
+            num_songs=config.DAILY_CHALLENGE_NUM_SONGS,
+            seed=self.daily_seed(day)
+        ))
+
+    @staticmethod
+    def daily_seed(day: Optional[date] = None) -> int:
+        """Seed of the daily challenge, e.g. 20240131."""
+        day = day or datetime.now(timezone.utc).date()
+        return int(day.strftime("%Y%m%d"))
+
+    async def _get_seeded_questions(self, key: GameKey, seed: int) -> List[GameQuestion]:
+        """Get the questions of a seeded game, generating them only once.
+
+        A seeded game is fully determined by its settings and the catalog, so
+        its questions are cached and shared by every session using them. They
+        are regenerated (identically, with fresh previews) when their preview
+        URLs are about to expire.
+        """
+        cache_key = (song_service.catalog_version, key, seed)
+        cached = self.seeded_games.get(cache_key)
+        if cached is not None and cached.expires_at > time.time() + self.game_pool.refresh_margin:
+            self.seeded_games.move_to_end(cache_key)
+            return cached.questions
+
+        # Concurrent requests for the same game (e.g. the daily challenge) share one build
+        future = self._seeded_in_flight.get(cache_key)
+        if future is None:
+            future = asyncio.ensure_future(self._build_seeded_game(cache_key, key, seed))
+            self._seeded_in_flight[cache_key] = future
+            future.add_done_callback(lambda _: self._seeded_in_flight.pop(cache_key, None))
+        return (await asyncio.shield(future)).questions
+
+    async def _build_seeded_game(self, cache_key: Tuple[str, GameKey, int], key: GameKey, seed: int) -> PooledGame:
+        game = await self._build_game(key, random.Random(seed))
+        self.seeded_games[cache_key] = game
+        self.seeded_games.move_to_end(cache_key)
+        while len(self.seeded_games) > self.seeded_game_cache_size:
+            self.seeded_games.popitem(last=False)
+        return game
+
+    async def create_session(
+        self,
+        questions: List[GameQuestion],
+        seed: Optional[int] = None,
+        playlist_id: Optional[str] = None
+    ) -> GameSessionResponse:
+        """Store a slim session for a set of questions and return it with the full questions."""
+        session = GameSession.create(questions, seed=seed, playlist_id=playlist_id)
+        await self.sessions.aput(session)
+        analytics_service.record_create(session.session_id, playlist_id)
+        return GameSessionResponse(
+            session_id=session.session_id,
+            questions=questions,
+            total_questions=session.total_questions,
+            started_at=session.started_at,
+            seed=seed
+        )
+
+    def _resolve_filters(
+        self,
+        settings: GameSettings
+    ) -> Tuple[Optional[List[str]], Optional[int], Optional[int], Optional[str]]:
+        """Get the genre and year filters of a game, applying its playlist if specified.
+
+        Playlists with their own song pool (artist and custom playlists) replace
+        the filters; their ID is returned last so the pool can be looked up.
+        Raises PlaylistNotFoundError for an unknown playlist.
+        """
         genres = settings.genres
         start_year = settings.start_year
         end_year = settings.end_year
 
         if settings.playlist_id:
             playlist = playlist_service.get_playlist_by_id(settings.playlist_id)
-            if playlist:
-                genres = playlist.genres or genres
-                start_year = playlist.start_year or start_year
-                end_year = playlist.end_year or end_year
-            else:
-                print(f"Playlist not found: {settings.playlist_id}")
-
+            if playlist is None:
+                raise PlaylistNotFoundError(f"Playlist not found: {settings.playlist_id}")
+            if playlist_service.has_own_pool(playlist):
+                return None, None, None, playlist.id
+            genres = playlist.genres or genres
+            start_year = playlist.start_year or start_year
+            end_year = playlist.end_year or end_year
+
+        return genres, start_year, end_year, None
+
+    @staticmethod
+    def game_key(
+        genres: Optional[List[str]],
+        start_year: Optional[int],
+        end_year: Optional[int],
+        num_songs: int,
+        num_choices: int,
+        difficulty: str = "normal",
+        pool_playlist_id: Optional[str] = None
+    ) -> GameKey:
+        """Key identifying interchangeable games in the game pool."""
+        filter_key = FilterEngine.normalize_key(genres, start_year, end_year)
+        return filter_key + (num_songs, num_choices, difficulty, pool_playlist_id)
+
+    async def build_questions(
+        self,
+        num_songs: int,
+        num_choices: int,
+        genres: Optional[List[str]] = None,
+        start_year: Optional[int] = None,
+        end_year: Optional[int] = None,
+        rng: Optional[random.Random] = None,
+        difficulty: str = "normal",
+        pool_playlist_id: Optional[str] = None,
+        resolve_previews: bool = True
+    ) -> List[GameQuestion]:
+        """Pick the songs and options of a game and resolve their previews.
+
+        All sampling goes through ``rng``, so a seeded generator always
+        produces the same questions for the same catalog. With
+        ``pool_playlist_id``, songs come from that playlist's compiled pool.
+        Without ``resolve_previews``, preview URLs are left empty.
+        """
+        pool = playlist_service.get_song_pool(pool_playlist_id) if pool_playlist_id else None
         # Get random songs for the game, filtered by criteria
         game_songs = song_service.get_random_songs(
-            settings.num_songs,
+            num_songs,
             genres=genres,
             start_year=start_year,
-            end_year=end_year
+            end_year=end_year,
+            rng=rng,
+            pool=pool
         )
 
-
         # Ensure we have at least one song
         if not game_songs:
             # Return songs without filtering if no songs match the criteria
-            game_songs = song_service.get_random_songs(settings.num_songs)
+            game_songs = song_service.get_random_songs(num_songs, rng=rng)
+
+        # Sessions refer to songs by ID, so use the record the ID resolves to
+        # (the catalog repeats some songs with slightly different colors)
+        game_songs = [song_service.get_song_by_id(song.SongId) or song for song in game_songs]
 
-        # Create game questions
-        questions = []
+        # Pick the options for each question
+        question_parts: List[Tuple[SongRecord, int, List[SongRecord]]] = []
         for song in game_songs:
             # Get choices for this question, using the same filters
             choices = song_service.get_random_song_choices(
                 song,
-                settings.num_choices,
+                num_choices,
                 genres=genres,
                 start_year=start_year,
-                end_year=end_year
+                end_year=end_year,
+                rng=rng,
+                difficulty=difficulty,
+                pool=pool
             )
 
-            # Make sure we have exactly 4 different song options
-            # First, ensure the correct song is in the list
-            if song not in choices:
-                choices.append(song)
-
-            # Filter out duplicates by name
-            unique_choices = []
-            seen_names = set()
-            for choice in choices:
-                if choice.Name not in seen_names:
-                    seen_names.add(choice.Name)
-                    unique_choices.append(choice)
-
-            # If we don't have enough unique options after filtering, add more random songs
-            while len(unique_choices) < settings.num_choices:
-                additional_songs = song_service.get_random_songs(
-                    settings.num_choices - len(unique_choices),
-                    genres=genres,
-                    start_year=start_year,
-                    end_year=end_year
-                )
-
-                for additional_song in additional_songs:
-                    if additional_song.Name not in seen_names and additional_song.SongId != song.SongId:
-                        seen_names.add(additional_song.Name)
-                        unique_choices.append(additional_song)
-
-                # Break if we can't find any more unique songs
-                if len(unique_choices) < settings.num_choices:
-                    additional_songs = song_service.get_random_songs(
-                        settings.num_choices - len(unique_choices)
-                    )
-                    for additional_song in additional_songs:
-                        if additional_song.Name not in seen_names and additional_song.SongId != song.SongId:
-                            seen_names.add(additional_song.Name)
-                            unique_choices.append(additional_song)
-
-            # Ensure we have exactly 4 options
-            choices = unique_choices[:settings.num_choices]
-
-            # Make sure the correct song is still in the list
-            if song not in choices:
-                choices[-1] = song
-
             # Find the index of the correct option
             correct_index = next(i for i, s in enumerate(choices) if s.SongId == song.SongId)
 
-            # Create option objects
-            options = [
-                GameOption(
-                    song_id=s.SongId,
-                    name=s.Name,
-                    is_correct=(s.SongId == song.SongId)
-                ) for s in choices
-            ]
-
-            # Create the question
-            preview_url = await song_service.get_deezer_preview_url(song)
-            question = GameQuestion(
-                song_id=song.SongId,
-                preview_url=preview_url,
-                blurred_cover_url=song.CoverMedium or "",
-                clear_cover_url=song.CoverBig or song.CoverXL or song.CoverMedium or "",  # Use best available cover
-                correct_option_index=correct_index,
-                options=options,
-                song_color=song.DarkColor or song.Color,  # Prefer DarkColor when available
-                artists=song.Artists  # Add the artists field from the song
-            )
-
-            questions.append(question)
+            question_parts.append((song, correct_index, choices))
 
-        # Create the game session
-        session = GameSession.create(questions)
+        # Resolve all preview URLs for the game concurrently
+        if resolve_previews:
+            preview_urls = await self._resolve_preview_urls([song for song, _, _ in question_parts])
+        else:
+            preview_urls = [""] * len(question_parts)
+
+        # Create the questions
+        return [
+            self._make_question(song, choices, correct_index, preview_url)
+            for (song, correct_index, choices), preview_url in zip(question_parts, preview_urls)
+        ]
+
+    @staticmethod
+    def _make_question(
+        song: SongRecord,
+        choices: List[Optional[SongRecord]],
+        correct_index: int,
+        preview_url: str,
+        time_limit: Optional[int] = None
+    ) -> GameQuestion:
+        """Build the question for a song from catalog records."""
+        question = GameQuestion(
+            song_id=song.SongId,
+            preview_url=preview_url,
+            blurred_cover_url=song.CoverMedium or "",
+            clear_cover_url=song.CoverBig or song.CoverXL or song.CoverMedium or "",  # Use best available cover
+            correct_option_index=correct_index,
+            options=[
+                GameOption(
+                    song_id=s.SongId if s else 0,
+                    name=s.Name if s else "",
+                    is_correct=(index == correct_index)
+                ) for index, s in enumerate(choices)
+            ],
+            song_color=song.DarkColor or song.Color,  # Prefer DarkColor when available
+            artists=song.Artists  # Add the artists field from the song
+        )
+        if time_limit is not None:
+            question.time_limit = time_limit
+        return question
+
+    async def get_question(self, session: GameSession, index: int) -> Optional[GameQuestion]:
+        """Rebuild a stored question from the catalog, with a current preview URL."""
+        song = song_service.get_song_by_id(session.song_ids[index])
+        if song is None:
+            return None
+        choices = [song_service.get_song_by_id(song_id) for song_id in session.option_ids[index]]
+        preview_url = (await self._resolve_preview_urls([song]))[0]
+        return self._make_question(song, choices, session.correct_indexes[index], preview_url, session.time_limit)
+
+    async def get_preview_url(self, song_id: int) -> str:
+        """Resolve the current preview URL of a song, or an empty one if it can't be found."""
+        song = song_service.get_song_by_id(song_id)
+        if song is None:
+            return ""
+        return (await self._resolve_preview_urls([song]))[0]
+
+    def pool_targets(self) -> List[GameKey]:
+        """Settings the game pool keeps games ready for: every playlist, and no filter at all.
+
+        Each target costs ``GAME_POOL_SIZE`` games' worth of preview lookups per
+        worker, so only the configured song counts are covered, and hard mode
+        only when enabled.
+        """
+        filters = [(None, None, None)] + [
+            (playlist.genres, playlist.start_year, playlist.end_year)
+            for playlist in playlist_service.get_all_playlists()
+        ]
+        default_choices = GameSettings().num_choices
+        difficulties = ("normal", "hard") if config.GAME_POOL_HARD_MODE else ("normal",)
+        return [
+            self.game_key(genres, start_year, end_year, num_songs, default_choices, difficulty)
+            for genres, start_year, end_year in filters
+            for num_songs in config.GAME_POOL_SONG_COUNTS
+            for difficulty in difficulties
+        ]
+
+    async def _build_game(self, key: GameKey, rng: Optional[random.Random] = None) -> PooledGame:
+        """Build a game for a key, valid until its first preview URL expires."""
+        genres, start_year, end_year, num_songs, num_choices, difficulty, pool_playlist_id = key
+        questions = await self.build_questions(
+            num_songs,
+            num_choices,
+            genres=list(genres) if genres else None,
+            start_year=start_year,
+            end_year=end_year,
+            rng=rng,
+            difficulty=difficulty,
+            pool_playlist_id=pool_playlist_id
+        )
 
-        # Store the session
-        self.active_sessions[session.session_id] = session
+        now = time.time()
+        expires_at = now + config.PREVIEW_CACHE_DEFAULT_TTL
+        for question in questions:
+            song = song_service.get_song_by_id(question.song_id)
+            if not song or not song.DeezerID:
+                continue
+            preview_expiry = song_service.preview_cache.expires_at(song.DeezerID)
+            # No cache entry means the lookup failed, so the game shouldn't be reused
+            expires_at = min(expires_at, preview_expiry if preview_expiry is not None else now)
+        return PooledGame(questions, expires_at)
+
+    async def run_game_pool(self, interval: float = config.GAME_POOL_INTERVAL) -> None:
+        """Keep the game pool filled until cancelled."""
+        if self.game_pool.size <= 0:
+            return
+        self.game_pool.set_targets(self.pool_targets())
+        await self.game_pool.run(self._build_game, interval)
+
+    async def _resolve_preview_urls(self, songs: List[SongRecord]) -> List[str]:
+        """Fetch preview URLs for several songs concurrently.
+
+        At most ``preview_concurrency`` lookups run at once and each one is
+        abandoned after ``preview_timeout`` seconds. A failed or timed out
+        lookup yields an empty preview instead of failing the whole game.
+        """
+        semaphore = asyncio.Semaphore(max(1, self.preview_concurrency))
+
+        async def resolve(song: SongRecord) -> str:
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(
+                        song_service.get_deezer_preview_url(song),
+                        timeout=self.preview_timeout
+                    )
+                except asyncio.TimeoutError:
+                    print(f"Timed out fetching preview URL for song {song.SongId}")
+                except Exception as e:
+                    print(f"Error fetching preview URL for song {song.SongId}: {e}")
+                return ""
 
-        return session
+        return await asyncio.gather(*(resolve(song) for song in songs))
 
-    def start_game(self, session_id: str) -> Optional[GameSession]:
+    async def start_game(self, session_id: str) -> Optional[GameSession]:
         """Start the game by setting the start time."""
-        if session_id not in self.active_sessions:
-            return None
+        def start(session: GameSession) -> GameSession:
+            session.started_at = time.time()
+            return session
 
-        session = self.active_sessions[session_id]
-        session.started_at = time.time()
-        return session
+        return await self.sessions.aupdate(session_id, start)
 
-    def get_game_response(self, session_id: str) -> Optional[GameResponse]:
+    async def get_game_response(self, session_id: str) -> Optional[GameResponse]:
         """Get the current game state as a response object."""
-        if session_id not in self.active_sessions:
+        session = await self.sessions.aget(session_id)
+        if not session:
             return None
 
-        session = self.active_sessions[session_id]
-
         # Check if we have a valid current question
-        if session.current_question >= len(session.questions):
+        if session.current_question >= session.total_questions:
+            return None
+
+        question = await self.get_question(session, session.current_question)
+        if question is None:
             return None
 
-        question = session.questions[session.current_question]
+        return GameResponse(
+            session_id=session.session_id,
+            current_question=session.current_question,
+            total_questions=session.total_questions,
+            question=question,
+            score=session.score,
+            time_remaining=self._time_remaining(session)
+        )
+
+    async def get_timer(self, session_id: str) -> Optional[Tuple[int, Optional[int]]]:
+        """Get the current question index and its seconds remaining, without building the question."""
+        session = await self.sessions.aget(session_id)
+        if not session or session.current_question >= session.total_questions:
+            return None
+        return session.current_question, self._time_remaining(session)
 
+    @staticmethod
+    def _time_remaining(session: GameSession) -> Optional[int]:
+        """Seconds left for the current question, or None if the game hasn't started."""
         # Calculate time remaining if game has started
         time_remaining = None
         if session.started_at > 0:
             elapsed = time.time() - session.started_at
-            question_time = session.current_question * question.time_limit
+            question_time = session.current_question * session.time_limit
             current_question_elapsed = elapsed - question_time
 
-            if current_question_elapsed < question.time_limit:
-                time_remaining = int(question.time_limit - current_question_elapsed)
+            if current_question_elapsed < session.time_limit:
+                time_remaining = int(session.time_limit - current_question_elapsed)
             else:
                 time_remaining = 0
 
-        return GameResponse(
-            session_id=session.session_id,
-            current_question=session.current_question,
-            total_questions=session.total_questions,
-            question=question,
-            score=session.score,
-            time_remaining=time_remaining
-        )
+        return time_remaining
 
-    def answer_question(self, session_id: str, question_index: int, selected_option_index: int) -> Optional[AnswerResponse]:
-        """Process a player's answer to a question."""
-        if session_id not in self.active_sessions:
-            return None
+    async def answer_question(self, session_id: str, question_index: int, selected_option_index: int) -> Optional[AnswerResponse]:
+        """Process a player's answer to a question.
 
-        session = self.active_sessions[session_id]
+        The answer is checked and applied atomically, so concurrent submissions
+        for the same question can only be counted once.
+        """
+        def apply(session: GameSession) -> Tuple[Optional[AnswerResponse], GameSession, Optional[float]]:
+            # Measured before the answer advances the session to the next question
+            latency = self._question_elapsed(session)
+            return self._apply_answer(session, question_index, selected_option_index), session, latency
 
+        result = await self.sessions.aupdate(session_id, apply)
+        if result is None:
+            return None
+        response, session, latency = result
+        if response is not None:
+            # Queued for the analytics writer; no I/O happens here
+            analytics_service.record_answer(
+                session_id,
+                session.playlist_id,
+                session.song_ids[question_index],
+                response.correct,
+                latency * 1000 if latency is not None else None
+            )
+            if response.game_complete:
+                analytics_service.record_complete(session_id, session.playlist_id, session.score)
+        return response
+
+    @staticmethod
+    def _question_elapsed(session: GameSession) -> Optional[float]:
+        """Seconds spent on the current question so far, or None if the game hasn't started."""
+        if session.started_at <= 0:
+            return None
+        elapsed = time.time() - session.started_at - session.current_question * session.time_limit
+        return min(max(elapsed, 0.0), float(session.time_limit))
+
+    def _apply_answer(self, session: GameSession, question_index: int, selected_option_index: int) -> Optional[AnswerResponse]:
+        """Check an answer against a session and advance it to the next question."""
         # Validate question index
-        if question_index < 0 or question_index >= len(session.questions):
+        if question_index < 0 or question_index >= session.total_questions:
             return None
 
         # Check if this is the current question
         if question_index != session.current_question:
             return None
 
-        question = session.questions[question_index]
+        correct_option_index = session.correct_indexes[question_index]
+        time_limit = session.time_limit
 
         # Special case for timeouts: -1 option index means timeout
         is_correct = False
@@ -210,25 +507,25 @@ class GameService:
             is_correct = False
         else:
             # Check if the selected option is valid
-            if selected_option_index < 0 or selected_option_index >= len(question.options):
+            if selected_option_index < 0 or selected_option_index >= len(session.option_ids[question_index]):
                 return None
 
             # Check if the answer is correct
-            is_correct = question.correct_option_index == selected_option_index
+            is_correct = correct_option_index == selected_option_index
 
         # Update score if correct - add time bonus based on remaining time
         time_remaining = 0
         if session.started_at > 0:
             elapsed = time.time() - session.started_at
-            question_time = session.current_question * question.time_limit
+            question_time = session.current_question * time_limit
             current_question_elapsed = elapsed - question_time
-            time_remaining = max(0, question.time_limit - current_question_elapsed)
+            time_remaining = max(0, time_limit - current_question_elapsed)
 
         # Calculate points: 10 base points + time bonus if correct
         points = 0
         if is_correct:
             # Base points (10) + time bonus (up to 5 more points based on time)
-            points = 10 + int(time_remaining / question.time_limit * 5)
+            points = 10 + int(time_remaining / time_limit * 5)
             session.score += points
 
         # Move to the next question
@@ -240,20 +537,19 @@ class GameService:
 
         return AnswerResponse(
             correct=is_correct,
-            correct_option_index=question.correct_option_index,
+            correct_option_index=correct_option_index,
             score=session.score,
             next_question_index=next_question,
             game_complete=game_complete,
             points_earned=points
         )
 
-    def get_game_summary(self, session_id: str) -> Optional[GameSummary]:
+    async def get_game_summary(self, session_id: str) -> Optional[GameSummary]:
         """Get a summary of the completed game."""
-        if session_id not in self.active_sessions:
+        session = await self.sessions.aget(session_id)
+        if not session:
             return None
 
-        session = self.active_sessions[session_id]
-
         # Calculate accuracy
         accuracy = (session.score / session.total_questions) * 100 if session.total_questions > 0 else 0
 
@@ -264,24 +560,25 @@ class GameService:
             accuracy=accuracy
         )
 
-    def cleanup_old_sessions(self, max_age_seconds: int = 3600) -> None:
-        """Remove old game sessions to free up memory."""
-        current_time = time.time()
-        to_remove = []
-
-        for session_id, session in self.active_sessions.items():
-            # Skip sessions that haven't started
-            if session.started_at == 0:
-                continue
-
-            # Check if the session is too old
-            age = current_time - session.started_at
-            if age > max_age_seconds:
-                to_remove.append(session_id)
-
-        # Remove old sessions
-        for session_id in to_remove:
-            del self.active_sessions[session_id]
+    def expire_sessions(self) -> int:
+        """Remove idle sessions (started or not) and enforce the session cap.
+
+        Returns the number of sessions removed.
+        """
+        removed = self.sessions.expire_idle(time.time() - self.session_idle_timeout)
+        removed += self.sessions.evict_over_limit()
+        return removed
+
+    async def run_session_expiry(self, interval: float = config.SESSION_SWEEP_INTERVAL) -> None:
+        """Periodically expire sessions until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                removed = await asyncio.to_thread(self.expire_sessions)
+                if removed:
+                    print(f"Expired {removed} game sessions")
+            except Exception as e:
+                print(f"Error expiring game sessions: {e}")
 
 
 # Create a global instance of the game service
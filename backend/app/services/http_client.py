@@ -0,0 +1,29 @@
+"""Factory for the shared outbound HTTP client."""
+import importlib.util
+
+import httpx
+from app import config
+
+
+def http2_available() -> bool:
+    """Check whether the optional h2 package needed for HTTP/2 is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create a long-lived, connection-pooled client for outbound API calls.
+
+    The client keeps connections alive between requests so repeated calls to
+    the same host skip the TCP and TLS handshakes. It is meant to be created
+    once per process (see the app lifespan in ``app.main``) and closed on
+    shutdown.
+    """
+    limits = httpx.Limits(
+        max_connections=config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(config.HTTP_TIMEOUT, connect=config.HTTP_CONNECT_TIMEOUT)
+    http2 = config.HTTP2_ENABLED and http2_available()
+
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
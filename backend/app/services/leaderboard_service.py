@@ -0,0 +1,269 @@
+"""Global and per-playlist leaderboards for daily, weekly and all-time scores."""
+import asyncio
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from app import config
+from app.models.game import GameSession
+from app.models.leaderboard import BoardRank, Leaderboard, LeaderboardEntry, ScoreRank, SubmissionResult
+from app.services.game_service import game_service
+from app.services.playlist_service import playlist_service
+from app.utils.batch_writer import BatchWriter
+from app.utils.scoreboard import ScoreIndex
+
+PERIODS = ("daily", "weekly", "all-time")
+GLOBAL_SCOPE = "global"
+
+# (session_id, player_name, score, playlist_id, day, week, submitted_at), as stored
+ScoreRow = Tuple[str, str, int, Optional[str], str, str, float]
+
+
+def period_key(period: str, timestamp: float) -> str:
+    """Key of the period a timestamp falls in (UTC), e.g. "2024-01-31" or "2024-W05"."""
+    if period == "all-time":
+        return "all"
+    moment = datetime.fromtimestamp(timestamp, timezone.utc)
+    if period == "daily":
+        return moment.strftime("%Y-%m-%d")
+    year, week, _ = moment.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class ScoreEntry:
+    """A submitted score as shown on a board."""
+
+    __slots__ = ("player_name", "score", "submitted_at")
+
+    def __init__(self, player_name: str, score: int, submitted_at: float):
+        self.player_name = player_name
+        self.score = score
+        self.submitted_at = submitted_at
+
+
+class LeaderboardService:
+    """Ranks scores on the global board and each predefined playlist's, per period.
+
+    Scores are persisted to SQLite by a background writer. Every worker keeps
+    each current board as a ScoreIndex (score counts plus the best entries,
+    so memory doesn't grow with the number of scores) and tails the shared
+    table for rows written by other workers. A worker's own submissions are
+    ranked immediately; other workers see them after the next write and
+    sync. Daily and weekly boards start over when their UTC period ends.
+    """
+
+    def __init__(
+        self,
+        db_path: str = config.LEADERBOARD_DB_PATH,
+        flush_interval: float = config.LEADERBOARD_FLUSH_INTERVAL,
+        max_pending: int = config.LEADERBOARD_MAX_PENDING,
+        top_size: int = config.LEADERBOARD_TOP_SIZE
+    ):
+        self.db_path = db_path
+        self.top_size = top_size
+        # Written from the writer's worker threads and read by syncs
+        self._connection = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection_lock = threading.Lock()
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scores (
+                session_id TEXT PRIMARY KEY,
+                player_name TEXT NOT NULL,
+                score INTEGER NOT NULL,
+                playlist_id TEXT,
+                day TEXT NOT NULL,
+                week TEXT NOT NULL,
+                submitted_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS scores_day ON scores (day)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS scores_week ON scores (week)")
+
+        # Only the global board and predefined playlists have boards, so clients can't create new ones
+        self.scopes: List[str] = [GLOBAL_SCOPE] + [playlist.id for playlist in playlist_service.get_all_playlists()]
+        # (scope, period) -> (period key, board of ScoreEntry)
+        self._boards: Dict[Tuple[str, str], Tuple[str, ScoreIndex]] = {}
+        # Highest table rowid already on the boards
+        self._last_rowid = 0
+        # Sessions submitted here and ranked already, whose rows the next sync must skip
+        self._local_sessions: Set[str] = set()
+        self.writer: BatchWriter[ScoreRow] = BatchWriter(
+            "leaderboard", self._write_rows, max_pending, flush_interval, on_drop=self._forget_rows
+        )
+        loaded = self._apply(self._fetch_new_rows())
+        if loaded:
+            print(f"Loaded {loaded} leaderboard scores")
+
+    def _write_rows(self, rows: List[ScoreRow]) -> None:
+        with self._connection_lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO scores (session_id, player_name, score, playlist_id, day, week, submitted_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def _forget_rows(self, rows: List[ScoreRow]) -> None:
+        """Stop waiting for rows the writer gave up on; they will never come back from a sync."""
+        for row in rows:
+            self._local_sessions.discard(row[0])
+
+    def _fetch_new_rows(self) -> List[Tuple]:
+        """Read the rows written (by any worker) since the last sync."""
+        with self._connection_lock:
+            return self._connection.execute(
+                "SELECT rowid, session_id, player_name, score, playlist_id, submitted_at "
+                "FROM scores WHERE rowid > ? ORDER BY rowid",
+                (self._last_rowid,)
+            ).fetchall()
+
+    def _apply(self, rows: List[Tuple]) -> int:
+        """Add fetched rows to the boards, except this worker's own submissions. Returns the count added."""
+        added = 0
+        for rowid, session_id, player_name, score, playlist_id, submitted_at in rows:
+            self._last_rowid = max(self._last_rowid, rowid)
+            if session_id in self._local_sessions:
+                self._local_sessions.discard(session_id)
+                continue
+            self._add(ScoreEntry(player_name, score, submitted_at), playlist_id)
+            added += 1
+        return added
+
+    async def sync(self) -> int:
+        """Add the scores other workers have written since the last sync. Returns the count added."""
+        rows = await asyncio.to_thread(self._fetch_new_rows)
+        # Applied on the event loop, like submissions
+        return self._apply(rows)
+
+    async def run_sync(self, interval: float = config.LEADERBOARD_SYNC_INTERVAL) -> None:
+        """Periodically sync the boards with the database until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"Error syncing leaderboards: {e}")
+
+    def _board(self, scope: str, period: str, now: Optional[float] = None) -> ScoreIndex:
+        """Get the board of the current period, starting a new one when the period has changed."""
+        key = period_key(period, now or time.time())
+        current = self._boards.get((scope, period))
+        if current is None or current[0] != key:
+            current = (key, ScoreIndex(self.top_size))
+            self._boards[(scope, period)] = current
+        return current[1]
+
+    def _scopes(self, playlist_id: Optional[str]) -> List[str]:
+        if playlist_id and playlist_id in self.scopes:
+            return [GLOBAL_SCOPE, playlist_id]
+        return [GLOBAL_SCOPE]
+
+    def _add(self, entry: ScoreEntry, playlist_id: Optional[str]) -> List[Tuple[str, str, ScoreIndex]]:
+        """Put a score on every current board it belongs to."""
+        now = time.time()
+        boards = []
+        for scope in self._scopes(playlist_id):
+            for period in PERIODS:
+                if period_key(period, entry.submitted_at) != period_key(period, now):
+                    continue
+                board = self._board(scope, period, now)
+                board.add(entry.score, entry.submitted_at, entry)
+                boards.append((scope, period, board))
+        return boards
+
+    async def submit(self, session_id: str, player_name: str) -> Optional[SubmissionResult]:
+        """Record the score of a completed game session.
+
+        Returns None if the session doesn't exist. Raises ValueError if the
+        game isn't finished or its score was already submitted.
+        """
+        def claim(session: GameSession) -> Tuple[str, int, Optional[str]]:
+            if session.current_question < session.total_questions:
+                return "incomplete", 0, None
+            if session.submitted:
+                return "duplicate", 0, None
+            session.submitted = True
+            return "ok", session.score, session.playlist_id
+
+        claimed = await game_service.sessions.aupdate(session_id, claim)
+        if claimed is None:
+            return None
+        status, score, playlist_id = claimed
+        if status == "incomplete":
+            raise ValueError("Game is not finished")
+        if status == "duplicate":
+            raise ValueError("Score already submitted")
+
+        if playlist_id not in self.scopes:
+            playlist_id = None
+        name = player_name.strip()[:32] or "Player"
+        submitted_at = time.time()
+        boards = self._add(ScoreEntry(name, score, submitted_at), playlist_id)
+        queued = self.writer.add((
+            session_id,
+            name,
+            score,
+            playlist_id,
+            period_key("daily", submitted_at),
+            period_key("weekly", submitted_at),
+            submitted_at
+        ))
+        if queued:
+            self._local_sessions.add(session_id)
+
+        return SubmissionResult(
+            score=score,
+            ranks=[
+                BoardRank(scope=scope, period=period, rank=board.rank_of_score(score), total_entries=len(board))
+                for scope, period, board in boards
+            ]
+        )
+
+    def get_leaderboard(self, period: str = "all-time", playlist_id: Optional[str] = None, limit: int = 10) -> Optional[Leaderboard]:
+        """Get the top ``limit`` scores of a board, or None if there is no board for the playlist."""
+        scope = playlist_id or GLOBAL_SCOPE
+        if scope not in self.scopes:
+            return None
+        board = self._board(scope, period)
+        entries = [
+            LeaderboardEntry(
+                rank=rank,
+                player_name=entry.player_name,
+                score=score,
+                submitted_at=entry.submitted_at
+            )
+            for entry, score, rank in board.top(limit)
+        ]
+        return Leaderboard(
+            scope=scope,
+            period=period,
+            period_key=period_key(period, time.time()),
+            total_entries=len(board),
+            entries=entries
+        )
+
+    def get_rank(self, score: int, period: str = "all-time", playlist_id: Optional[str] = None) -> Optional[ScoreRank]:
+        """Get the rank a score would have on a board, or None if there is no board for the playlist."""
+        scope = playlist_id or GLOBAL_SCOPE
+        if scope not in self.scopes:
+            return None
+        board = self._board(scope, period)
+        return ScoreRank(rank=board.rank_of_score(score), total_entries=len(board))
+
+    def close(self) -> None:
+        with self._connection_lock:
+            self._connection.close()
+
+
+# Create a global instance of the leaderboard service
+leaderboard_service = LeaderboardService()
@@ -1,7 +1,26 @@
-"""Service for managing predefined playlists."""
-from typing import Dict, List, Optional
+"""Service for managing predefined, artist and custom playlists."""
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app import config
+from app.models.song import Playlist, PlaylistFilters
+from app.services.artist_index import ArtistEntry
+from app.services.filter_engine import SongPool
+from app.services.song_service import song_service
+from pydantic import ValidationError
+
+# Artist playlists have IDs like "artist-27" (the Deezer artist ID)
+ARTIST_PLAYLIST_PREFIX = "artist-"
+CUSTOM_PLAYLIST_PREFIX = "custom-"
+
+class PlaylistNotFoundError(Exception):
+    """Raised when a game asks for a playlist that doesn't exist."""
 
-from app.models.song import Playlist
 
 # Predefined playlists
 PLAYLISTS: List[Playlist] = [
@@ -46,19 +65,281 @@ PLAYLISTS: List[Playlist] = [
 
 
 class PlaylistService:
-    """Service for managing predefined playlists."""
+    """Service for managing playlists.
+
+    Predefined playlists filter by genre and year. Artist playlists and
+    user-created custom playlists have their own song pool instead, which
+    is compiled once from the catalog's bitmap indexes and cached per
+    catalog version (the ``pool_cache_size`` most recently used), so games
+    on them cost no more than on any other playlist. Custom playlists live in SQLite, which every worker reads
+    them from, so a playlist created on one worker is usable on all. Each
+    client can own a few at a time, and they expire ``ttl`` seconds after
+    creation.
+    """
 
-    def __init__(self):
+    def __init__(
+        self,
+        db_path: str = config.CUSTOM_PLAYLIST_DB_PATH,
+        max_custom: int = config.CUSTOM_PLAYLIST_MAX,
+        max_per_client: int = config.CUSTOM_PLAYLIST_MAX_PER_CLIENT,
+        ttl: float = config.CUSTOM_PLAYLIST_TTL,
+        min_songs: int = config.CUSTOM_PLAYLIST_MIN_SONGS,
+        pool_cache_size: int = config.PLAYLIST_POOL_CACHE_SIZE
+    ):
         self.playlists: Dict[str, Playlist] = {p.id: p for p in PLAYLISTS}
+        self.max_custom = max_custom
+        self.max_per_client = max_per_client
+        self.ttl = ttl
+        # Distinct song names a custom playlist needs to make a game
+        self.min_songs = min_songs
+        # (catalog version, playlist ID) -> compiled pool, least recently used first
+        self._pools: "OrderedDict[Tuple[str, str], SongPool]" = OrderedDict()
+        self.pool_cache_size = pool_cache_size
+
+        self._connection = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection_lock = threading.Lock()
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS playlists (
+                playlist_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                description TEXT NOT NULL,
+                filters TEXT NOT NULL,
+                delete_token TEXT NOT NULL,
+                client TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS playlists_client ON playlists (client)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS playlists_created_at ON playlists (created_at)")
+
+    def _cutoff(self) -> float:
+        """Creation time before which custom playlists have expired."""
+        return time.time() - self.ttl
+
+    @staticmethod
+    def _row_playlist(row: Tuple) -> Optional[Playlist]:
+        playlist_id, name, description, filters = row
+        try:
+            parsed = PlaylistFilters.model_validate_json(filters)
+        except ValidationError:
+            print(f"Skipping custom playlist {playlist_id} with invalid filters")
+            return None
+        return Playlist(id=playlist_id, name=name, description=description, filters=parsed)
+
+    def _get_custom_playlist(self, playlist_id: str) -> Optional[Playlist]:
+        with self._connection_lock:
+            row = self._connection.execute(
+                "SELECT playlist_id, name, description, filters FROM playlists WHERE playlist_id = ? AND created_at > ?",
+                (playlist_id, self._cutoff())
+            ).fetchone()
+        return self._row_playlist(row) if row else None
 
     def get_all_playlists(self) -> List[Playlist]:
         """Get all available playlists."""
         return list(self.playlists.values())
 
     def get_playlist_by_id(self, playlist_id: str) -> Optional[Playlist]:
-        """Get a playlist by its ID."""
-        return self.playlists.get(playlist_id)
+        """Get a playlist by its ID: predefined, custom, or for an artist with enough songs."""
+        playlist = self.playlists.get(playlist_id)
+        if playlist is None and playlist_id.startswith(CUSTOM_PLAYLIST_PREFIX):
+            playlist = self._get_custom_playlist(playlist_id)
+            if playlist is not None:
+                playlist = self._with_song_count(playlist)
+        if playlist is None and playlist_id.startswith(ARTIST_PLAYLIST_PREFIX):
+            artist_id = playlist_id[len(ARTIST_PLAYLIST_PREFIX):]
+            # isdigit() alone accepts Unicode digits such as "²" that int() rejects
+            is_id = artist_id.isascii() and artist_id.isdigit()
+            artist = song_service.artist_index.get(int(artist_id)) if is_id else None
+            if artist is not None and len(artist.songs) >= config.ARTIST_PLAYLIST_MIN_SONGS:
+                playlist = self._artist_playlist(artist)
+        return playlist
+
+    def get_artist_playlists(self, limit: int = config.ARTIST_PLAYLIST_COUNT) -> List[Playlist]:
+        """Get "guess the song" playlists for the artists with the most songs."""
+        artists = song_service.artist_index.top(limit, min_songs=config.ARTIST_PLAYLIST_MIN_SONGS)
+        return [self._artist_playlist(artist) for artist in artists]
+
+    @staticmethod
+    def _artist_playlist(artist: ArtistEntry) -> Playlist:
+        return Playlist(
+            id=f"{ARTIST_PLAYLIST_PREFIX}{artist.artist_id}",
+            name=artist.name,
+            description=f"Guess the song from {artist.name}",
+            artist_id=artist.artist_id,
+            cover_image=artist.details.PictureBig if artist.details else None,
+        )
+
+    def get_custom_playlists(self) -> List[Playlist]:
+        """Get all custom playlists that haven't expired, oldest first."""
+        with self._connection_lock:
+            rows = self._connection.execute(
+                "SELECT playlist_id, name, description, filters FROM playlists WHERE created_at > ? ORDER BY created_at",
+                (self._cutoff(),)
+            ).fetchall()
+        playlists = [self._row_playlist(row) for row in rows]
+        return [self._with_song_count(playlist) for playlist in playlists if playlist is not None]
+
+    def _with_song_count(self, playlist: Playlist) -> Playlist:
+        return playlist.model_copy(update={"song_count": len(self._pool_for(playlist).name_key_set)})
+
+    @staticmethod
+    def has_own_pool(playlist: Playlist) -> bool:
+        """Whether a playlist's songs come from its own pool rather than genre and year filters."""
+        return playlist.artist_id is not None or playlist.filters is not None
+
+    def get_song_pool(self, playlist_id: str) -> Optional[SongPool]:
+        """Get the song pool of an artist or custom playlist by its ID."""
+        # Checked before looking the playlist up, so cached pools cost no query
+        cache_key = (song_service.catalog_version, playlist_id)
+        pool = self._pools.get(cache_key)
+        if pool is not None:
+            self._pools.move_to_end(cache_key)
+            return pool
+
+        if playlist_id.startswith(CUSTOM_PLAYLIST_PREFIX):
+            playlist = self._get_custom_playlist(playlist_id)
+        else:
+            playlist = self.get_playlist_by_id(playlist_id)
+        if playlist is None or not self.has_own_pool(playlist):
+            return None
+        return self._pool_for(playlist)
+
+    def _pool_for(self, playlist: Playlist) -> SongPool:
+        """Get the pool of a playlist that has its own, compiling it once per catalog version."""
+        cache_key = (song_service.catalog_version, playlist.id)
+        pool = self._pools.get(cache_key)
+        if pool is not None:
+            self._pools.move_to_end(cache_key)
+            return pool
+
+        if playlist.filters is not None:
+            pool = self.compile_filters(playlist.filters)
+        else:
+            artist = song_service.artist_index.get(playlist.artist_id)
+            pool = artist.pool if artist else song_service.filter_engine.pool_for_mask((None, None, None), 0)
+        self._cache_pool(playlist.id, pool)
+        return pool
+
+    def _cache_pool(self, playlist_id: str, pool: SongPool) -> None:
+        version = song_service.catalog_version
+        if self._pools and next(iter(self._pools))[0] != version:
+            # The catalog changed, pools of the previous one are stale
+            self._pools.clear()
+        self._pools[(version, playlist_id)] = pool
+        self._pools.move_to_end((version, playlist_id))
+        while len(self._pools) > self.pool_cache_size:
+            self._pools.popitem(last=False)
+
+    @staticmethod
+    def filter_mask(filters: PlaylistFilters) -> int:
+        """Combine the catalog's bitmap indexes into the bitmap of songs matching every rule."""
+        engine = song_service.filter_engine
+        facet_index = song_service.facet_index
+        mask = engine.all_mask
+        if filters.genres:
+            if filters.genre_match == "all":
+                mask &= engine.all_genres_mask(filters.genres)
+            else:
+                mask &= engine.genre_mask(filters.genres)
+        if filters.start_year or filters.end_year:
+            mask &= engine.year_mask(filters.start_year, filters.end_year)
+        if filters.tempos:
+            mask &= facet_index.mask("tempo", filters.tempos)
+        if filters.durations:
+            mask &= facet_index.mask("duration", filters.durations)
+        if filters.bpm_buckets:
+            mask &= facet_index.mask("bpm", filters.bpm_buckets)
+        if filters.include_tags:
+            mask &= engine.tag_mask(filters.include_tags)
+        if filters.exclude_tags:
+            mask &= ~engine.tag_mask(filters.exclude_tags)
+        if filters.explicit is not None:
+            mask &= engine.explicit_mask if filters.explicit else ~engine.explicit_mask
+        if filters.min_rank is not None or filters.max_rank is not None:
+            mask &= engine.rank_mask(filters.min_rank, filters.max_rank)
+        return mask
+
+    @staticmethod
+    def compile_filters(filters: PlaylistFilters) -> SongPool:
+        """Materialize the pool of songs matching every rule."""
+        engine = song_service.filter_engine
+        key = engine.normalize_key(filters.genres, filters.start_year, filters.end_year)
+        return engine.pool_for_mask(key, PlaylistService.filter_mask(filters))
+
+    def create_playlist(self, name: str, description: str, filters: PlaylistFilters, client: str) -> Tuple[Playlist, str]:
+        """Create a custom playlist for a client (e.g. its IP address). Returns it with the token needed to delete it.
+
+        Raises ValueError when the filters match too few songs for a game or
+        the client's or the global playlist limit is reached.
+        """
+        name = name.strip()[:64]
+        if not name:
+            raise ValueError("Playlist name is required")
+
+        # Compiling is a few bitmap operations, so a useless playlist is rejected right away
+        pool = self.compile_filters(filters)
+        if len(pool.name_key_set) < self.min_songs:
+            raise ValueError(
+                f"Only {len(pool.name_key_set)} songs match these filters, at least {self.min_songs} are needed"
+            )
+
+        playlist_id = f"{CUSTOM_PLAYLIST_PREFIX}{uuid.uuid4().hex[:12]}"
+        delete_token = secrets.token_urlsafe(16)
+        description = description.strip()[:280]
+        now = time.time()
+        with self._connection_lock:
+            # Checked and inserted in one write transaction, so workers can't race past the limits
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                expired = self._connection.execute(
+                    "SELECT playlist_id FROM playlists WHERE created_at <= ?", (now - self.ttl,)
+                ).fetchall()
+                self._connection.execute("DELETE FROM playlists WHERE created_at <= ?", (now - self.ttl,))
+                (total,) = self._connection.execute("SELECT COUNT(*) FROM playlists").fetchone()
+                (owned,) = self._connection.execute(
+                    "SELECT COUNT(*) FROM playlists WHERE client = ?", (client,)
+                ).fetchone()
+                if total >= self.max_custom:
+                    raise ValueError("Too many custom playlists, try again later")
+                if owned >= self.max_per_client:
+                    raise ValueError(f"At most {self.max_per_client} custom playlists can be created at a time")
+                self._connection.execute(
+                    "INSERT INTO playlists (playlist_id, name, description, filters, delete_token, client, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (playlist_id, name, description, filters.model_dump_json(), delete_token, client, now)
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        for (expired_id,) in expired:
+            self._pools.pop((song_service.catalog_version, expired_id), None)
+        playlist = Playlist(id=playlist_id, name=name, description=description, filters=filters)
+        self._cache_pool(playlist_id, pool)
+        return self._with_song_count(playlist), delete_token
+
+    def delete_playlist(self, playlist_id: str, delete_token: str) -> Optional[bool]:
+        """Delete a custom playlist. Returns None if it doesn't exist and False if the token is wrong."""
+        with self._connection_lock:
+            row = self._connection.execute(
+                "SELECT delete_token FROM playlists WHERE playlist_id = ? AND created_at > ?",
+                (playlist_id, self._cutoff())
+            ).fetchone()
+            if row is None:
+                return None
+            if not secrets.compare_digest(row[0], delete_token):
+                return False
+            self._connection.execute("DELETE FROM playlists WHERE playlist_id = ?", (playlist_id,))
+        self._pools.pop((song_service.catalog_version, playlist_id), None)
+        return True
+
+    def close(self) -> None:
+        with self._connection_lock:
+            self._connection.close()
 
 
 # Create a global instance of the playlist service
-playlist_service = PlaylistService()
\ No newline at end of file
+playlist_service = PlaylistService()
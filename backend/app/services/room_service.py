@@ -0,0 +1,321 @@
+"""Multiplayer rooms: many players answering one shared set of questions."""
+import asyncio
+import secrets
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from app import config
+from app.models.game import GameQuestion, GameSettings
+from app.models.room import PlayerScore, RoomInfo, RoomOption, RoomQuestion, RoomResult
+from app.services.game_service import game_service
+from app.utils.scoreboard import Scoreboard
+from app.utils.serialization import dumps
+from fastapi import WebSocket
+
+# Values of PlayerState.answers: 0 is unanswered, otherwise the selected option + 1
+UNANSWERED = 0
+# Most options a room question can have, so every answer fits in one byte
+MAX_CHOICES = 255
+
+
+class PlayerState:
+    """Score and answers of one player, one byte per question.
+
+    ``player_id`` is public and appears in leaderboards; ``token`` is the
+    player's secret for the room's WebSocket and is only sent to them.
+    """
+
+    __slots__ = ("player_id", "token", "name", "joined", "score", "answers")
+
+    def __init__(self, player_id: str, token: str, name: str, joined: int, total_questions: int):
+        self.player_id = player_id
+        self.token = token
+        self.name = name
+        self.joined = joined  # Join order, breaks score ties
+        self.score = 0
+        self.answers = bytearray(total_questions)
+
+
+class Room:
+    """A shared game. Questions are generated once; only per-player state grows with the room."""
+
+    __slots__ = (
+        "room_id",
+        "host_id",
+        "questions",
+        "players",
+        "tokens",
+        "scoreboard",
+        "connections",
+        "state",
+        "current_question",
+        "question_started_at",
+        "preview_url",
+        "answered",
+        "all_answered",
+        "runner",
+        "last_active",
+    )
+
+    def __init__(self, room_id: str, questions: List[GameQuestion]):
+        self.room_id = room_id
+        self.host_id = ""
+        # Previews are resolved when each question is played, as rooms can wait long enough for URLs to expire
+        self.questions = questions
+        self.players: Dict[str, PlayerState] = {}  # By public player ID
+        self.tokens: Dict[str, str] = {}  # Secret player token -> public player ID
+        self.scoreboard = Scoreboard()
+        self.connections: Dict[str, WebSocket] = {}
+        self.state = "waiting"  # "waiting", "playing" or "finished"
+        self.current_question = 0
+        self.question_started_at = 0.0
+        self.preview_url = ""  # Preview of the current question
+        self.answered = 0  # Players who answered the current question
+        self.all_answered = asyncio.Event()
+        self.runner: Optional[asyncio.Task] = None
+        self.last_active = time.time()
+
+
+class RoomService:
+    """Creates rooms and runs their games, broadcasting to every connected player.
+
+    Every broadcast is serialized once and the same text is sent to each
+    connection. Rooms live in this process's memory, so all players of a
+    room must reach the same worker.
+    """
+
+    def __init__(
+        self,
+        max_players: int = config.ROOM_MAX_PLAYERS,
+        max_rooms: int = config.ROOM_MAX_COUNT,
+        reveal_seconds: float = config.ROOM_REVEAL_SECONDS,
+        idle_timeout: float = config.ROOM_IDLE_TIMEOUT,
+        leaderboard_size: int = config.ROOM_LEADERBOARD_SIZE
+    ):
+        self.rooms: Dict[str, Room] = {}
+        self.max_players = max_players
+        self.max_rooms = max_rooms
+        # Pause between a question's reveal and the next question
+        self.reveal_seconds = reveal_seconds
+        self.idle_timeout = idle_timeout
+        # Players included in broadcast leaderboards
+        self.leaderboard_size = leaderboard_size
+
+    async def create_room(self, host_name: str, settings: GameSettings) -> Tuple[Room, PlayerState]:
+        """Create a room with a fresh set of questions and join its host. Returns the room and the host.
+
+        Raises ValueError when too many rooms are open or the settings don't fit a room.
+        """
+        if len(self.rooms) >= self.max_rooms:
+            raise ValueError("Too many open rooms, try again later")
+        if not 1 <= settings.num_choices <= MAX_CHOICES:
+            raise ValueError(f"Rooms support 1 to {MAX_CHOICES} choices per question")
+
+        questions = await game_service.generate_questions(settings, resolve_previews=False)
+        room = Room(uuid.uuid4().hex[:8], questions)
+        self.rooms[room.room_id] = room
+        host = self._add_player(room, host_name)
+        room.host_id = host.player_id
+        return room, host
+
+    def get_room(self, room_id: str) -> Optional[Room]:
+        return self.rooms.get(room_id)
+
+    @staticmethod
+    def get_player_id(room: Room, token: str) -> Optional[str]:
+        """Get the public ID of the player a secret token belongs to."""
+        return room.tokens.get(token)
+
+    def join_room(self, room_id: str, name: str) -> Optional[PlayerState]:
+        """Add a player to a room. Returns the new player, or None if the room doesn't exist.
+
+        Raises ValueError when the room is full or already finished.
+        """
+        room = self.rooms.get(room_id)
+        if room is None:
+            return None
+        if room.state == "finished":
+            raise ValueError("The game in this room is over")
+        if len(room.players) >= self.max_players:
+            raise ValueError("Room is full")
+        return self._add_player(room, name)
+
+    def _add_player(self, room: Room, name: str) -> PlayerState:
+        player_id = uuid.uuid4().hex[:8]
+        while player_id in room.players:
+            player_id = uuid.uuid4().hex[:8]
+        token = secrets.token_urlsafe(16)
+        player = PlayerState(player_id, token, name.strip()[:32] or "Player", len(room.players), len(room.questions))
+        room.players[player_id] = player
+        room.tokens[token] = player_id
+        room.scoreboard.set(player_id, 0, player.joined)
+        room.last_active = time.time()
+        return player
+
+    def leaderboard(self, room: Room, count: Optional[int] = None) -> List[PlayerScore]:
+        return [
+            PlayerScore(player_id=player_id, name=room.players[player_id].name, score=score, rank=rank)
+            for player_id, score, rank in room.scoreboard.top(count or self.leaderboard_size)
+        ]
+
+    def room_info(self, room: Room) -> RoomInfo:
+        return RoomInfo(
+            room_id=room.room_id,
+            host_id=room.host_id,
+            state=room.state,
+            current_question=room.current_question,
+            total_questions=len(room.questions),
+            player_count=len(room.players),
+            leaderboard=self.leaderboard(room)
+        )
+
+    def start_room(self, room: Room, player_id: str) -> bool:
+        """Start the game if the host asks and it isn't running yet."""
+        if player_id != room.host_id or room.state != "waiting":
+            return False
+        room.state = "playing"
+        room.runner = asyncio.create_task(self._run(room))
+        return True
+
+    def answer(self, room: Room, player_id: str, question_index: int, selected_option_index: int) -> Optional[int]:
+        """Record a player's answer to the current question. Returns the points earned, or None if rejected."""
+        player = room.players.get(player_id)
+        if (
+            player is None
+            or room.state != "playing"
+            or question_index != room.current_question
+            or room.all_answered.is_set()
+            or player.answers[question_index] != UNANSWERED
+        ):
+            return None
+
+        question = room.questions[question_index]
+        if selected_option_index < 0 or selected_option_index >= len(question.options):
+            return None
+
+        player.answers[question_index] = selected_option_index + 1
+        points = 0
+        if selected_option_index == question.correct_option_index:
+            # Same scoring as single player: 10 base points + up to 5 for speed
+            time_remaining = max(0.0, question.time_limit - (time.time() - room.question_started_at))
+            points = 10 + int(time_remaining / question.time_limit * 5)
+            player.score += points
+            room.scoreboard.set(player_id, player.score, player.joined)
+
+        room.answered += 1
+        room.last_active = time.time()
+        if room.answered >= len(room.connections):
+            room.all_answered.set()
+        return points
+
+    async def connect(self, room: Room, player_id: str, websocket: WebSocket) -> None:
+        room.connections[player_id] = websocket
+        room.last_active = time.time()
+        await self.broadcast(room, "players", data=self.room_info(room).model_dump(mode="json"))
+        if room.state == "playing" and not room.all_answered.is_set():
+            # Late joiners and reconnects get the question in progress
+            await self._send_text(websocket, self._question_message(room))
+
+    async def disconnect(self, room: Room, player_id: str, websocket: WebSocket) -> None:
+        if room.connections.get(player_id) is websocket:
+            del room.connections[player_id]
+            if room.state == "playing" and room.answered >= len(room.connections):
+                # Don't keep the others waiting for someone who left
+                room.all_answered.set()
+            await self.broadcast(room, "players", data=self.room_info(room).model_dump(mode="json"))
+
+    async def broadcast(self, room: Room, message_type: str, **fields) -> None:
+        """Serialize a message once and send it to every connected player."""
+        await self._broadcast_text(room, dumps({"type": message_type, **fields}).decode())
+
+    async def _broadcast_text(self, room: Room, text: str) -> None:
+        connections = list(room.connections.items())
+        results = await asyncio.gather(
+            *(self._send_text(websocket, text) for _, websocket in connections),
+            return_exceptions=True
+        )
+        for (player_id, websocket), result in zip(connections, results):
+            if isinstance(result, Exception) and room.connections.get(player_id) is websocket:
+                del room.connections[player_id]
+
+    @staticmethod
+    async def _send_text(websocket: WebSocket, text: str) -> None:
+        await websocket.send_text(text)
+
+    def _question_message(self, room: Room) -> str:
+        question = room.questions[room.current_question]
+        payload = RoomQuestion(
+            question_index=room.current_question,
+            total_questions=len(room.questions),
+            preview_url=room.preview_url,
+            blurred_cover_url=question.blurred_cover_url,
+            options=[RoomOption(song_id=option.song_id, name=option.name) for option in question.options],
+            time_limit=question.time_limit,
+            song_color=question.song_color
+        )
+        return dumps({"type": "question", "data": payload.model_dump(mode="json")}).decode()
+
+    async def _run(self, room: Room) -> None:
+        """Play the room's questions: broadcast each, wait for answers or the timer, then reveal."""
+        try:
+            for index, question in enumerate(room.questions):
+                room.current_question = index
+                room.answered = 0
+                room.all_answered.clear()
+                room.preview_url = await game_service.get_preview_url(question.song_id)
+                room.question_started_at = time.time()
+                await self._broadcast_text(room, self._question_message(room))
+
+                try:
+                    await asyncio.wait_for(room.all_answered.wait(), timeout=question.time_limit)
+                except asyncio.TimeoutError:
+                    pass
+                # Closes the question to further answers
+                room.all_answered.set()
+
+                is_last = index == len(room.questions) - 1
+                correct_value = question.correct_option_index + 1
+                result = RoomResult(
+                    question_index=index,
+                    correct_option_index=question.correct_option_index,
+                    clear_cover_url=question.clear_cover_url,
+                    artists=question.artists,
+                    answered=room.answered,
+                    correct=sum(1 for player in room.players.values() if player.answers[index] == correct_value),
+                    leaderboard=self.leaderboard(room),
+                    next_question_index=None if is_last else index + 1
+                )
+                await self.broadcast(room, "result", data=result.model_dump(mode="json"))
+                if not is_last:
+                    await asyncio.sleep(self.reveal_seconds)
+
+            room.state = "finished"
+            room.last_active = time.time()
+            await self.broadcast(room, "finished", data=self.room_info(room).model_dump(mode="json"))
+        except Exception as e:
+            print(f"Error running room {room.room_id}: {e}")
+            room.state = "finished"
+
+    def expire_rooms(self) -> int:
+        """Remove rooms without activity for ``idle_timeout`` seconds. Returns the count removed."""
+        cutoff = time.time() - self.idle_timeout
+        expired = [
+            room_id for room_id, room in self.rooms.items()
+            if room.last_active < cutoff and room.state != "playing"
+        ]
+        for room_id in expired:
+            del self.rooms[room_id]
+        return len(expired)
+
+    async def run_room_expiry(self, interval: float = config.SESSION_SWEEP_INTERVAL) -> None:
+        """Periodically expire idle rooms until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            removed = self.expire_rooms()
+            if removed:
+                print(f"Expired {removed} rooms")
+
+
+# Create a global instance of the room service
+room_service = RoomService()
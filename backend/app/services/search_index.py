@@ -0,0 +1,262 @@
+"""Trigram and word-prefix indexes for searching songs by name, artists and album."""
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from itertools import accumulate, chain
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from app.models.song_record import SongRecord
+
+# Searchable fields of a song, with the weight of a match in each
+FIELD_WEIGHTS: Dict[str, float] = {"name": 1.0, "artists": 0.9, "album": 0.6}
+FIELDS: Tuple[str, ...] = tuple(FIELD_WEIGHTS)
+
+# A search reads at most this many postings per trigram, those of the most popular songs
+MAX_POSTINGS = 1000
+
+# Shortest typed text autocomplete suggests songs for
+MIN_PREFIX_LENGTH = 2
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+# (song, matched field, score)
+SearchHit = Tuple[SongRecord, str, float]
+
+# (song position, matched term, score)
+_RankedSong = Tuple[int, int, float]
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Fold case and accents and reduce punctuation to single spaces ("Beyoncé!" -> "beyonce")."""
+    if not text:
+        return ""
+    folded = text.casefold()
+    if not folded.isascii():
+        decomposed = unicodedata.normalize("NFKD", folded)
+        folded = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_NON_WORD.sub(" ", folded).replace("_", " ").split())
+
+
+def trigrams(normalized: str) -> Set[str]:
+    """Trigrams of each word, padded so short words and word starts still match ("ab" -> "  a", " ab", "ab ")."""
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class SearchIndex:
+    """Fuzzy search and prefix autocomplete over a fixed set of songs.
+
+    Songs are stored most popular first, so every list of songs below is
+    already in ranking order. Each distinct (field, text) pair is a term,
+    listing the songs having it. Trigram postings list the terms containing
+    each trigram, so a query only touches terms sharing a trigram with it,
+    and terms are ranked by trigram similarity (Dice coefficient), which
+    tolerates typos and missing letters. Very common trigrams only
+    contribute the terms of their most popular songs.
+    Autocomplete bisects the sorted field texts for fields starting with
+    the typed text, then walks the songs of a sorted vocabulary of words.
+    Songs with the same name and artists are indexed once.
+    """
+
+    def __init__(self, songs: Sequence[SongRecord], album_names: Sequence[Optional[str]], popularity: Sequence[Optional[int]]):
+        """Index ``songs``; ``album_names`` and ``popularity`` (e.g. Deezer rank) are per song, in the same order."""
+        self.songs: List[SongRecord] = []
+        self._song_terms: List[Tuple[int, ...]] = []
+        self._term_field: List[str] = []
+        self._term_text: List[str] = []
+        self._term_size: List[int] = []  # Number of distinct trigrams
+        self._term_songs: List[List[int]] = []
+        postings: Dict[str, List[int]] = defaultdict(list)
+        terms: Dict[Tuple[str, str], int] = {}
+        word_songs: Dict[str, List[int]] = {}
+        normalized: Dict[Optional[str], str] = {}
+        word_grams: Dict[str, Set[str]] = {}
+
+        def normalize(text: Optional[str]) -> str:
+            # Artist and album names repeat across songs, normalize each once
+            if text not in normalized:
+                normalized[text] = normalize_text(text)
+            return normalized[text]
+
+        def text_grams(words: List[str]) -> Set[str]:
+            # Words repeat much more than whole texts, so their trigrams are cached
+            for word in words:
+                if word not in word_grams:
+                    word_grams[word] = trigrams(word)
+            return set().union(*(word_grams[word] for word in words))
+
+        seen = set()
+        for index in sorted(range(len(songs)), key=lambda index: -(popularity[index] or 0)):
+            song = songs[index]
+            values = {"name": normalize(song.Name), "artists": normalize(song.Artists)}
+            if (values["name"], values["artists"]) in seen:
+                continue
+            seen.add((values["name"], values["artists"]))
+            values["album"] = normalize(album_names[index])
+
+            position = len(self.songs)
+            self.songs.append(song)
+            song_terms = []
+            song_words = set()
+            for field in FIELDS:
+                text = values[field]
+                if not text:
+                    continue
+                words = text.split()
+                term = terms.get((field, text))
+                if term is None:
+                    term = terms[(field, text)] = len(self._term_text)
+                    grams = text_grams(words)
+                    self._term_field.append(field)
+                    self._term_text.append(text)
+                    self._term_size.append(len(grams))
+                    self._term_songs.append([])
+                    for gram in grams:
+                        postings[gram].append(term)
+                self._term_songs[term].append(position)
+                song_terms.append(term)
+                song_words.update(words)
+            self._song_terms.append(tuple(song_terms))
+            for word in song_words:
+                word_songs.setdefault(word, []).append(position)
+
+        self._postings: Dict[str, List[int]] = dict(postings)
+
+        # Field texts in sorted order, for finding the fields starting with some text
+        self._sorted_terms: List[int] = sorted(range(len(self._term_text)), key=self._term_text.__getitem__)
+        self._sorted_texts: List[str] = [self._term_text[term] for term in self._sorted_terms]
+
+        # Sorted vocabulary for prefix lookups, with the songs containing each word and
+        # running totals of their counts, to size a prefix's songs without reading them
+        self._words: List[str] = sorted(word_songs)
+        self._word_songs: List[List[int]] = [word_songs[word] for word in self._words]
+        self._word_offsets: List[int] = list(accumulate(map(len, self._word_songs), initial=0))
+
+    def __len__(self) -> int:
+        return len(self.songs)
+
+    def _ranked(self, term_scores: Dict[int, float]) -> Iterator[_RankedSong]:
+        """Songs having the scored terms, by best score then popularity (songs repeat, first time best)."""
+        by_score: Dict[float, List[int]] = {}
+        for term, score in term_scores.items():
+            by_score.setdefault(score, []).append(term)
+        for score in sorted(by_score, reverse=True):
+            terms = by_score[score]
+            if len(terms) == 1:
+                term = terms[0]
+                for position in self._term_songs[term]:
+                    yield position, term, score
+                continue
+            # Equal scores in several fields of a song: report the first field
+            streams = [
+                ((position, FIELDS.index(self._term_field[term]), term) for position in self._term_songs[term])
+                for term in terms
+            ]
+            for position, _, term in heapq.merge(*streams):
+                yield position, term, score
+
+    def _top(self, ranked: Iterable[_RankedSong], limit: int) -> List[SearchHit]:
+        """The first ``limit`` distinct songs of a ranking."""
+        hits: List[SearchHit] = []
+        seen = set()
+        for position, term, score in ranked:
+            if position in seen:
+                continue
+            seen.add(position)
+            hits.append((self.songs[position], self._term_field[term], round(score, 4)))
+            if len(hits) == limit:
+                break
+        return hits
+
+    def _terms_starting_with(self, text: str) -> List[int]:
+        """Terms whose whole text starts with ``text``."""
+        start = bisect_left(self._sorted_texts, text)
+        end = bisect_left(self._sorted_texts, text + "\uffff", start)
+        return self._sorted_terms[start:end]
+
+    def search(self, query: str, limit: int = 20, min_score: float = 0.3) -> List[SearchHit]:
+        """Songs whose name, artists or album are similar to ``query``, best first."""
+        normalized = normalize_text(query)
+        query_grams = trigrams(normalized)
+        if not query_grams:
+            return []
+
+        postings = self._postings
+        shared = Counter(chain.from_iterable(postings.get(gram, ())[:MAX_POSTINGS] for gram in query_grams))
+
+        query_size = len(query_grams)
+        term_size = self._term_size
+        term_field = self._term_field
+        term_text = self._term_text
+        scores: Dict[int, float] = {}
+        for term, common in shared.items():
+            weight = FIELD_WEIGHTS[term_field[term]]
+            score = 2 * common / (query_size + term_size[term])
+            text = term_text[term]
+            if text == normalized:
+                score = 1.0
+            elif text.startswith(normalized):
+                # A field starting with the query beats one that merely contains it
+                score = max(score, 0.8)
+            score *= weight
+            if score >= min_score:
+                scores[term] = score
+
+        # Exact matches count even when all their trigrams are too common to be read in full
+        start = bisect_left(self._sorted_texts, normalized)
+        end = bisect_right(self._sorted_texts, normalized, start)
+        for term in self._sorted_terms[start:end]:
+            scores[term] = FIELD_WEIGHTS[term_field[term]]
+        return self._top(self._ranked(scores), limit)
+
+    def _word_range(self, prefix: str) -> Tuple[int, int]:
+        """Range of the vocabulary words starting with ``prefix``."""
+        start = bisect_left(self._words, prefix)
+        return start, bisect_left(self._words, prefix + "\uffff", start)
+
+    def _songs_with_words(self, words: List[str]) -> Iterator[int]:
+        """Songs with a word starting with each of ``words``, most popular first."""
+        ranges = [self._word_range(word) for word in words]
+        offsets = self._word_offsets
+        # Walk the songs of the rarest word, checking the others on each song's own words
+        rarest = min(range(len(words)), key=lambda index: offsets[ranges[index][1]] - offsets[ranges[index][0]])
+        others = words[:rarest] + words[rarest + 1:]
+        start, end = ranges[rarest]
+        previous = -1
+        for position in heapq.merge(*self._word_songs[start:end]):
+            if position == previous:
+                continue
+            previous = position
+            if others:
+                song_words = " ".join(self._term_text[term] for term in self._song_terms[position]).split()
+                if not all(any(word.startswith(other) for word in song_words) for other in others):
+                    continue
+            yield position
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[SearchHit]:
+        """Songs containing every word of ``prefix`` in any field, the last word possibly incomplete.
+
+        Songs with a field starting with the typed text rank first, then more popular songs.
+        """
+        normalized = normalize_text(prefix)
+        if len(normalized) < MIN_PREFIX_LENGTH:
+            return []
+
+        # A field starting with the typed text scores higher; prefer completions close to what was typed
+        term_field = self._term_field
+        term_text = self._term_text
+        scores = {
+            term: (1.0 + len(normalized) / len(term_text[term]) * 0.1) * FIELD_WEIGHTS[term_field[term]]
+            for term in self._terms_starting_with(normalized)
+        }
+        # Matches anywhere in the song score 0.5
+        anywhere = (
+            (position, self._song_terms[position][0], 0.5)
+            for position in self._songs_with_words(normalized.split())
+        )
+        return self._top(chain(self._ranked(scores), anywhere), limit)
@@ -0,0 +1,285 @@
+"""Storage backends for game sessions."""
+import asyncio
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, List, Optional, TypeVar
+
+from app import config
+from app.models.game import GameSession
+
+T = TypeVar("T")
+
+
+class SessionStore(ABC):
+    """Interface for storing game sessions.
+
+    Sessions returned by ``get`` are copies, so changing them has no effect.
+    Changes go through ``update``, which applies a mutation atomically, so
+    concurrent requests (or workers sharing a durable backend) never lose
+    each other's writes.
+
+    Code running on the event loop uses ``aget``, ``aput`` and ``aupdate``,
+    which backends doing blocking I/O run in a worker thread.
+
+    Every ``put`` and ``update`` counts as activity on the session. Stores
+    keep sessions ordered by last activity so idle sessions can be expired
+    and the least recently active ones evicted without scanning the rest.
+    """
+
+    def __init__(self, max_sessions: int = 0):
+        self.max_sessions = max_sessions  # 0 means unlimited
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[GameSession]:
+        """Get a session by ID."""
+
+    @abstractmethod
+    def put(self, session: GameSession) -> None:
+        """Insert or replace a session."""
+
+    @abstractmethod
+    def update(self, session_id: str, mutate: Callable[[GameSession], T]) -> Optional[T]:
+        """Atomically apply ``mutate`` to a session and persist it.
+
+        Returns whatever ``mutate`` returns, or None when the session doesn't exist.
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Remove a session if it exists."""
+
+    @abstractmethod
+    def expire_idle(self, cutoff: float) -> int:
+        """Remove sessions with no activity since ``cutoff``. Returns the count removed."""
+
+    @abstractmethod
+    def evict_over_limit(self) -> int:
+        """Remove the least recently active sessions beyond ``max_sessions``. Returns the count removed."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored sessions."""
+
+    async def aget(self, session_id: str) -> Optional[GameSession]:
+        """``get`` without blocking the event loop."""
+        return self.get(session_id)
+
+    async def aput(self, session: GameSession) -> None:
+        """``put`` without blocking the event loop."""
+        self.put(session)
+
+    async def aupdate(self, session_id: str, mutate: Callable[[GameSession], T]) -> Optional[T]:
+        """``update`` without blocking the event loop. ``mutate`` may run in another thread."""
+        return self.update(session_id, mutate)
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def close(self) -> None:
+        """Release any resources held by the store."""
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store. Fast, but sessions are only visible to one worker.
+
+    Sessions live in an OrderedDict kept in order of last activity, so the
+    oldest sessions are always at the front: expiry pops from the front until
+    it reaches an active session, and the session cap is enforced on insert.
+    """
+
+    def __init__(self, max_sessions: int = 0):
+        super().__init__(max_sessions)
+        # session_id -> (session, last activity timestamp), least recently active first
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        # Expiry runs in a worker thread, so guard against concurrent modification
+        self._lock = threading.Lock()
+
+    # Sessions go in and out as copies, so only update() changes a stored one. Their
+    # question fields are tuples, so a shallow copy is enough.
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        entry = self._sessions.get(session_id)
+        return entry[0].model_copy() if entry else None
+
+    def put(self, session: GameSession) -> None:
+        with self._lock:
+            self._sessions[session.session_id] = (session.model_copy(), time.time())
+            self._sessions.move_to_end(session.session_id)
+            self._evict_over_limit()
+
+    def update(self, session_id: str, mutate: Callable[[GameSession], T]) -> Optional[T]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            # Mutate a copy, so a failing mutation leaves the stored session as it was
+            session = entry[0].model_copy()
+            result = mutate(session)
+            self._sessions[session_id] = (session.model_copy(), time.time())
+            self._sessions.move_to_end(session_id)
+            return result
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def expire_idle(self, cutoff: float) -> int:
+        removed = 0
+        with self._lock:
+            while self._sessions:
+                session_id, (_, last_active) = next(iter(self._sessions.items()))
+                if last_active >= cutoff:
+                    break
+                del self._sessions[session_id]
+                removed += 1
+        return removed
+
+    def evict_over_limit(self) -> int:
+        with self._lock:
+            return self._evict_over_limit()
+
+    def _evict_over_limit(self) -> int:
+        removed = 0
+        if self.max_sessions > 0:
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                removed += 1
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Durable store in a local SQLite database, shared by every worker on the host.
+
+    The database runs in WAL mode so readers never block the writer. Updates
+    run inside ``BEGIN IMMEDIATE`` transactions, which serializes
+    read-modify-write cycles across threads and processes. Last activity is
+    an indexed column, so expiry and eviction are index range deletes.
+
+    Each thread gets its own connection. The async methods run the queries in
+    worker threads, and ``close`` closes the connections of every thread.
+    """
+
+    def __init__(self, path: str, max_sessions: int = 0):
+        super().__init__(max_sessions)
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        with self._connection() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    last_active REAL NOT NULL
+                )
+                """
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS sessions_last_active ON sessions (last_active)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # isolation_level=None: transactions are managed explicitly. Connections are
+            # only used by their own thread, but close() may run on another one
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        row = self._connection().execute(
+            "SELECT data FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return GameSession.model_validate_json(row[0]) if row else None
+
+    def put(self, session: GameSession) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO sessions (session_id, data, last_active) VALUES (?, ?, ?)",
+            (session.session_id, session.model_dump_json(), time.time())
+        )
+
+    def update(self, session_id: str, mutate: Callable[[GameSession], T]) -> Optional[T]:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT data FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+
+            session = GameSession.model_validate_json(row[0])
+            result = mutate(session)
+            connection.execute(
+                "UPDATE sessions SET data = ?, last_active = ? WHERE session_id = ?",
+                (session.model_dump_json(), time.time(), session_id)
+            )
+            connection.execute("COMMIT")
+            return result
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    async def aget(self, session_id: str) -> Optional[GameSession]:
+        return await asyncio.to_thread(self.get, session_id)
+
+    async def aput(self, session: GameSession) -> None:
+        await asyncio.to_thread(self.put, session)
+
+    async def aupdate(self, session_id: str, mutate: Callable[[GameSession], T]) -> Optional[T]:
+        return await asyncio.to_thread(self.update, session_id, mutate)
+
+    def delete(self, session_id: str) -> None:
+        self._connection().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def expire_idle(self, cutoff: float) -> int:
+        cursor = self._connection().execute("DELETE FROM sessions WHERE last_active < ?", (cutoff,))
+        return cursor.rowcount
+
+    def evict_over_limit(self) -> int:
+        if self.max_sessions <= 0:
+            return 0
+        excess = len(self) - self.max_sessions
+        if excess <= 0:
+            return 0
+        cursor = self._connection().execute(
+            """
+            DELETE FROM sessions WHERE session_id IN (
+                SELECT session_id FROM sessions ORDER BY last_active LIMIT ?
+            )
+            """,
+            (excess,)
+        )
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self) -> None:
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        # Threads that use the store again open new connections
+        self._local = threading.local()
+
+
+def create_session_store(backend: str = config.SESSION_STORE) -> SessionStore:
+    """Create the session store selected in the configuration."""
+    if backend == "sqlite":
+        return SQLiteSessionStore(config.SESSION_DB_PATH, max_sessions=config.SESSION_MAX_COUNT)
+    if backend != "memory":
+        print(f"Unknown session store {backend!r}, using memory")
+    return InMemorySessionStore(max_sessions=config.SESSION_MAX_COUNT)
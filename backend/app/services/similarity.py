@@ -0,0 +1,121 @@
+"""Song feature vectors and nearest-neighbour ranking for picking plausible distractors."""
+import math
+from array import array
+from operator import mul
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from app.models.song_record import SongRecord
+from app.services.tag_facets import DURATION_CLASSES, TEMPO_CLASSES
+
+try:
+    import numpy as np
+except ImportError:  # Without NumPy, distances are computed in pure Python (much slower)
+    np = None
+
+# How much each group of features counts towards the distance between two songs
+NUMERIC_WEIGHT = 1.0
+GENRE_WEIGHT = 1.5
+TEMPO_WEIGHT = 0.7
+DURATION_CLASS_WEIGHT = 0.5
+
+
+def _standardize(values: Sequence[Optional[float]]) -> List[float]:
+    """Scale values to zero mean and unit variance; missing values become the mean (0)."""
+    known = [value for value in values if value is not None]
+    if not known:
+        return [0.0] * len(values)
+    mean = sum(known) / len(known)
+    deviation = math.sqrt(sum((value - mean) ** 2 for value in known) / len(known)) or 1.0
+    return [(value - mean) / deviation if value is not None else 0.0 for value in values]
+
+
+def build_song_features(
+    songs: Sequence[SongRecord],
+    bpms: Sequence[Optional[float]],
+    durations: Sequence[Optional[int]],
+    ranks: Sequence[Optional[int]],
+    get_genres: Callable[[SongRecord], Sequence[str]],
+    genres: Sequence[str]
+) -> Tuple[array, int]:
+    """Build one feature vector per song, packed into a single float32 array.
+
+    Features are the standardized BPM, release year, duration and log rank,
+    one-hot ``genres`` and the tempo and duration class tags, each group
+    scaled by its weight. ``bpms``, ``durations`` and ``ranks`` are per song,
+    in the same order; zero BPM means unknown. Returns the array, holding
+    the vectors one after another, and the length of each vector.
+    """
+    numeric = [
+        _standardize([bpm or None for bpm in bpms]),
+        _standardize([song.year for song in songs]),
+        _standardize([duration or None for duration in durations]),
+        _standardize([math.log1p(rank) if rank else None for rank in ranks]),
+    ]
+    genre_index = {genre: index for index, genre in enumerate(genres)}
+    dimensions = len(numeric) + len(genres) + len(TEMPO_CLASSES) + len(DURATION_CLASSES)
+    tempo_offset = len(numeric) + len(genres)
+    duration_offset = tempo_offset + len(TEMPO_CLASSES)
+
+    features = array("f", bytes(4 * dimensions * len(songs)))
+    for position, song in enumerate(songs):
+        base = position * dimensions
+        for index, column in enumerate(numeric):
+            features[base + index] = column[position] * NUMERIC_WEIGHT
+        for genre in get_genres(song):
+            index = genre_index.get(genre)
+            if index is not None:
+                features[base + len(numeric) + index] = GENRE_WEIGHT
+        tags = song.Tags or ()
+        for index, tag in enumerate(TEMPO_CLASSES):
+            if tag in tags:
+                features[base + tempo_offset + index] = TEMPO_WEIGHT
+        for index, tag in enumerate(DURATION_CLASSES):
+            if tag in tags:
+                features[base + duration_offset + index] = DURATION_CLASS_WEIGHT
+    return features, dimensions
+
+
+class SimilarityIndex:
+    """Ranks songs by Euclidean distance between their feature vectors.
+
+    Vectors are indexed by catalog position (snapshot row) and stored in one
+    contiguous float32 buffer. With NumPy the buffer is viewed as a matrix
+    without copying and candidates are ranked with one vectorized distance
+    computation; without it, in a pure-Python loop over the same buffer.
+    """
+
+    def __init__(self, features: Optional[array] = None, dimensions: int = 0):
+        features = features if features is not None else array("f")
+        self.dimensions = dimensions
+        self.size = len(features) // dimensions if dimensions else 0
+        self._features = features
+        if np is not None:
+            self._matrix = np.frombuffer(features, dtype=np.float32).reshape(self.size, dimensions)
+        else:
+            self._norms = array("f", (
+                sum(map(mul, vector, vector)) for vector in map(self._vector, range(self.size))
+            ))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _vector(self, row: int) -> array:
+        return self._features[row * self.dimensions:(row + 1) * self.dimensions]
+
+    def rank(self, row: int, candidates: Sequence[int]) -> List[int]:
+        """Order candidate rows from nearest to farthest from ``row``."""
+        if not candidates:
+            return []
+        if np is not None:
+            rows = np.asarray(candidates, dtype=np.intp)
+            differences = self._matrix[rows] - self._matrix[row]
+            distances = np.einsum("ij,ij->i", differences, differences)
+            return rows[np.argsort(distances, kind="stable")].tolist()
+
+        # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, and |a|^2 is the same for every candidate
+        target = self._vector(row)
+        vector = self._vector
+        norms = self._norms
+        distances = [norms[candidate] - 2 * sum(map(mul, vector(candidate), target)) for candidate in candidates]
+        order = sorted(range(len(candidates)), key=distances.__getitem__)
+        return [candidates[index] for index in order]
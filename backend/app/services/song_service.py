@@ -1,43 +1,150 @@
-import json
+import os
 import random
 import re
+from bisect import bisect_right
 from collections import defaultdict
+from functools import lru_cache
 from math import floor
-from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import httpx
-from app.models.song import Song, SongsData
+from app import config
+from app.models.song import Song
+from app.models.song_record import SongRecord, StringInterner, build_song_records
+from app.services.artist_index import ArtistIndex
+from app.services.catalog_snapshot import SONG_RECORD_COLUMNS, CatalogSnapshot, load_snapshot
+from app.services.choice_sampler import ChoiceSampler
+from app.services.filter_engine import FilterEngine, SongPool
+from app.services.search_index import SearchHit, SearchIndex
+from app.services.similarity import SimilarityIndex, build_song_features
+from app.services.tag_facets import FacetIndex, TagFacets, parse_tags
+from app.utils.preview_cache import PreviewUrlCache
+from app.utils.serialization import dumps
 from fastapi import HTTPException
 
+# Snapshot rows decoded at a time while building song records, so only one chunk of decoded values is held at once
+RECORD_CHUNK_ROWS = 8192
+
 
 class SongService:
     def __init__(self):
-        self.songs_data: Optional[SongsData] = None
-        self.songs: List[Song] = []
-        self.genres: Dict[str, List[Song]] = {}  # Map of genre to songs with that genre
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self.catalog_version: str = ""  # Changes whenever the catalog source changes
+        self.catalog_updated_at: float = 0.0  # Modification time of the catalog source
+        self.songs: List[SongRecord] = []
+        self.genres: Dict[str, List[SongRecord]] = {}  # Map of genre to songs with that genre
         self.available_genres: List[str] = []  # Genres with at least 30 songs
+        # Lookup indexes, built once when the catalog is loaded
+        self.songs_by_id: Dict[int, SongRecord] = {}
+        self.songs_by_deezer_id: Dict[int, SongRecord] = {}
+        self.songs_by_isrc: Dict[str, SongRecord] = {}
+        self.sorted_song_ids: List[int] = []
+        self.tag_facets: List[TagFacets] = []  # Parsed tags of each song, by catalog position
+        self.facet_index = FacetIndex([], [], lambda song: None)
+        self.filter_engine = FilterEngine([], lambda song: [], lambda song: None)
+        self.search_index = SearchIndex([], [], [])
+        self.similarity_index = SimilarityIndex()
+        self.artist_index = ArtistIndex([], [], None)
+        self.choice_sampler = ChoiceSampler()
+        # Encoded songs, keyed by (catalog version, snapshot row)
+        self._song_json_cached = lru_cache(maxsize=config.SONG_JSON_CACHE_SIZE)(self._serialize_song)
+        self.http_client: Optional[httpx.AsyncClient] = None  # Shared client, set by the app lifespan
+        self.preview_cache = PreviewUrlCache(
+            max_entries=config.PREVIEW_CACHE_SIZE,
+            default_ttl=config.PREVIEW_CACHE_DEFAULT_TTL,
+            expiry_margin=config.PREVIEW_CACHE_EXPIRY_MARGIN,
+            negative_ttl=config.PREVIEW_CACHE_NEGATIVE_TTL
+        )
         self._load_songs()
 
+    def set_http_client(self, client: Optional[httpx.AsyncClient]) -> None:
+        """Set the shared HTTP client used for outbound API calls."""
+        self.http_client = client
+
     def _load_songs(self) -> None:
-        """Load songs data from the JSON file and index genres."""
-        try:
-            json_path = Path("songs.json")
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                self.songs_data = SongsData(**data)
-                self.songs = self.songs_data.Songs
+        """Load songs data from the compiled catalog snapshot and index genres.
 
-            # Index genres
+        The snapshot is rebuilt from the JSON file whenever the file changes.
+        """
+        try:
+            self.snapshot = load_snapshot(config.CATALOG_PATH, config.CATALOG_SNAPSHOT_PATH)
+            self.catalog_version = self.snapshot.version
+            self.catalog_updated_at = os.path.getmtime(config.CATALOG_PATH)
+            # Keep only slim records in memory; full songs are rebuilt from the snapshot on demand
+            self.songs = self._build_song_records()
+
+            # Build lookup indexes
+            self._index_catalog()
+            self._parse_tag_facets()
             self._index_genres()
+            self._build_filter_engine()
+            self._build_search_index()
+            self._build_similarity_index()
+            self._build_artist_index()
             print(f"Loaded {len(self.songs)} songs successfully")
             print(f"Found {len(self.available_genres)} genres with at least 30 songs")
         except Exception as e:
             print(f"Error loading songs: {e}")
             # Initialize with empty list to avoid crashes
             self.songs = []
+            self.catalog_version = ""
             self.genres = {}
             self.available_genres = []
+            self.songs_by_id = {}
+            self.songs_by_deezer_id = {}
+            self.songs_by_isrc = {}
+            self.sorted_song_ids = []
+            self._parse_tag_facets()
+            self._build_filter_engine()
+            self.search_index = SearchIndex([], [], [])
+            self.similarity_index = SimilarityIndex()
+            self.artist_index = ArtistIndex([], [], None)
+
+    def _build_song_records(self) -> List[SongRecord]:
+        """Decode the record columns of the snapshot a chunk of rows at a time."""
+        interner = StringInterner()
+        records: List[SongRecord] = []
+        for start in range(0, self.snapshot.row_count(), RECORD_CHUNK_ROWS):
+            stop = start + RECORD_CHUNK_ROWS
+            columns = {name: self.snapshot.column(name).to_list(start, stop) for name in SONG_RECORD_COLUMNS}
+            records.extend(build_song_records(columns, self._get_snapshot_covers, start, interner))
+        return records
+
+    def _get_snapshot_covers(self, row: int) -> Tuple[Optional[str], ...]:
+        """Read the raw cover URLs of a snapshot row."""
+        return tuple(
+            self.snapshot.column(name)[row]
+            for name in ("CoverSmall", "CoverMedium", "CoverBig", "CoverXL")
+        )
+
+    def _index_catalog(self) -> None:
+        """Index all songs by SongId, DeezerID and ISRC for constant-time lookups."""
+        self.songs_by_id = {}
+        self.songs_by_deezer_id = {}
+        self.songs_by_isrc = {}
+
+        for song in self.songs:
+            # Keep the first song when an identifier is duplicated, like a linear scan would
+            self.songs_by_id.setdefault(song.SongId, song)
+            if song.DeezerID:
+                self.songs_by_deezer_id.setdefault(song.DeezerID, song)
+            if song.ISRC:
+                self.songs_by_isrc.setdefault(song.ISRC.upper(), song)
+
+        # Sorted IDs for keyset pagination
+        self.sorted_song_ids = sorted(self.songs_by_id)
+
+    def _parse_tag_facets(self) -> None:
+        """Parse every song's tags into typed facets and index the songs having each facet value."""
+        # Tag tuples are interned, so songs sharing tags share their parsed facets
+        parsed: Dict[Optional[Tuple[str, ...]], TagFacets] = {}
+        self.tag_facets = []
+        for song in self.songs:
+            facets = parsed.get(song.Tags)
+            if facets is None:
+                facets = parsed[song.Tags] = parse_tags(song.Tags)
+            self.tag_facets.append(facets)
+        self.facet_index = FacetIndex(self.songs, self.tag_facets, self.get_song_release_year)
 
     def _index_genres(self) -> None:
         """Index all songs by genre and find available genres with at least 30 songs."""
@@ -46,8 +153,7 @@ class SongService:
 
         # Process each song
         for song in self.songs:
-            # Use AlbumGenres field if available, or Tags as fallback
-            song_genres = song.AlbumGenres or song.Tags or []
+            song_genres = self.get_song_genres(song)
 
             # Add song to each of its genres
             for genre in song_genres:
@@ -67,160 +173,196 @@ class SongService:
         # Sort genres alphabetically
         self.available_genres.sort()
 
-    def get_song_by_id(self, song_id: int) -> Optional[Song]:
+    def _build_filter_engine(self) -> None:
+        """Precompute the genre, year, tag, explicit and rank indexes used to filter songs."""
+        # Read straight from the snapshot, without decoding the columns into lists
+        explicit = self.snapshot.column("Explicit") if self.songs else []
+        ranks = self.snapshot.column("Rank") if self.songs else []
+        self.filter_engine = FilterEngine(
+            self.songs,
+            get_genres=self.get_song_genres,
+            get_year=self.get_song_release_year,
+            cache_size=config.FILTER_CACHE_SIZE,
+            get_tags=lambda song: song.Tags or [],
+            get_explicit=lambda song: explicit[song.row],
+            get_rank=lambda song: ranks[song.row]
+        )
+
+    def _build_search_index(self) -> None:
+        """Index song names, artists and album names for search, once per distinct SongId."""
+        songs = list(self.songs_by_id.values())
+        album_names = self.snapshot.column("AlbumName")
+        ranks = self.snapshot.column("Rank")
+        self.search_index = SearchIndex(
+            songs,
+            [album_names[song.row] for song in songs],
+            [ranks[song.row] for song in songs]
+        )
+
+    def _build_similarity_index(self) -> None:
+        """Compute the feature vector of every song, used to pick similar distractors."""
+        features, dimensions = build_song_features(
+            self.songs,
+            self.snapshot.column("BPM"),
+            self.snapshot.column("Duration"),
+            self.snapshot.column("Rank"),
+            get_genres=self.get_song_genres,
+            genres=self.available_genres
+        )
+        self.similarity_index = SimilarityIndex(features, dimensions)
+
+    def _build_artist_index(self) -> None:
+        """Index the artists credited on each distinct song, with their roles."""
+        songs = list(self.songs_by_id.values())
+        contributors = self.snapshot.column("Contributors")
+        self.artist_index = ArtistIndex(
+            songs,
+            [contributors[song.row] for song in songs],
+            self.snapshot.artists()
+        )
+
+    def search_songs(self, query: str, limit: int = 20) -> List[SearchHit]:
+        """Typo-tolerant search over song names, artists and album names."""
+        return self.search_index.search(query, limit)
+
+    def autocomplete_songs(self, prefix: str, limit: int = 10) -> List[SearchHit]:
+        """Songs matching a partially typed name, artist or album."""
+        return self.search_index.autocomplete(prefix, limit)
+
+    def get_song_by_id(self, song_id: int) -> Optional[SongRecord]:
         """Get a song by its ID."""
-        for song in self.songs:
-            if song.SongId == song_id:
-                return song
-        return None
+        return self.songs_by_id.get(song_id)
 
-    def get_song_release_year(self, song: Song) -> Optional[int]:
-        """Extract the release year from a song.
+    def get_song_by_deezer_id(self, deezer_id: int) -> Optional[SongRecord]:
+        """Get a song by its Deezer track ID."""
+        return self.songs_by_deezer_id.get(deezer_id)
 
-        Tries to get it from the ReleaseDate field first, then from Tags.
-        """
-        # Try to get year from ReleaseDate (format: YYYY-MM-DD)
-        if song.ReleaseDate and len(song.ReleaseDate) >= 4:
-            try:
-                return int(song.ReleaseDate[:4])
-            except ValueError:
-                pass
-
-        # Try to get year from Tags (format: "year:YYYY")
-        if song.Tags:
-            for tag in song.Tags:
-                if tag.startswith("year:"):
-                    try:
-                        return int(tag[5:])
-                    except ValueError:
-                        pass
-
-        return None
+    def get_song_by_isrc(self, isrc: str) -> Optional[SongRecord]:
+        """Get a song by its ISRC code."""
+        return self.songs_by_isrc.get(isrc.upper())
+
+    def get_songs_by_ids(self, song_ids: List[int]) -> List[SongRecord]:
+        """Get several songs by ID, in the requested order, skipping unknown IDs."""
+        songs_by_id = self.songs_by_id
+        return [songs_by_id[song_id] for song_id in song_ids if song_id in songs_by_id]
+
+    def get_song_genres(self, song: SongRecord) -> Tuple[str, ...]:
+        """Get the genres of a song: its AlbumGenres, or the genre tags when it has none."""
+        return song.AlbumGenres or self.tag_facets[song.row].genres
+
+    def get_song_facets(self, song: SongRecord) -> TagFacets:
+        """Get the tempo class, duration class, BPM and year parsed from a song's tags."""
+        return self.tag_facets[song.row]
+
+    def get_song_release_year(self, song: SongRecord) -> Optional[int]:
+        """Get the release year of a song, parsed from ReleaseDate or Tags at load time."""
+        return song.year
+
+    def get_full_song(self, song: SongRecord) -> Song:
+        """Build the complete Song model for a record from the catalog snapshot."""
+        return self.snapshot.song(song.row)
+
+    def get_full_songs(self, songs: List[SongRecord]) -> List[Song]:
+        """Build the complete Song models for several records."""
+        return [self.snapshot.song(song.row) for song in songs]
+
+    def get_song_json(self, song: SongRecord) -> bytes:
+        """Get the JSON encoding of a full song, cached per catalog version."""
+        return self._song_json_cached(self.catalog_version, song.row)
+
+    def _serialize_song(self, catalog_version: str, row: int) -> bytes:
+        return dumps(self.snapshot.song_dict(row))
+
+    def get_songs_after(self, cursor: Optional[int], limit: int) -> List[SongRecord]:
+        """Get up to ``limit`` songs ordered by SongId, starting after the ``cursor`` SongId."""
+        start = bisect_right(self.sorted_song_ids, cursor) if cursor is not None else 0
+        return [self.songs_by_id[song_id] for song_id in self.sorted_song_ids[start:start + limit]]
+
+    def get_song_pool(
+        self,
+        genres: Optional[List[str]] = None,
+        start_year: Optional[int] = None,
+        end_year: Optional[int] = None
+    ) -> SongPool:
+        """Get the memoized pool of songs matching the criteria."""
+        return self.filter_engine.resolve(genres, start_year, end_year)
 
     def filter_songs_by_criteria(
         self,
         genres: Optional[List[str]] = None,
         start_year: Optional[int] = None,
         end_year: Optional[int] = None
-    ) -> List[Song]:
+    ) -> List[SongRecord]:
         """Filter songs based on multiple criteria."""
-        filtered_songs = self.songs.copy()
-
-        # Filter by genres if specified
-        if genres:
-            genre_song_ids = set()
-            for genre in genres:
-                if genre in self.genres:
-                    for song in self.genres[genre]:
-                        genre_song_ids.add(song.SongId)
-
-            filtered_songs = [song for song in filtered_songs if song.SongId in genre_song_ids]
-
-        # Filter by year range if specified
-        if start_year or end_year:
-            year_filtered = []
-            for song in filtered_songs:
-                year = self.get_song_release_year(song)
-                if year:
-                    if start_year and end_year:
-                        if start_year <= year <= end_year:
-                            year_filtered.append(song)
-                    elif start_year:
-                        if year >= start_year:
-                            year_filtered.append(song)
-                    elif end_year:
-                        if year <= end_year:
-                            year_filtered.append(song)
-            filtered_songs = year_filtered
-
-        return filtered_songs
+        return list(self.get_song_pool(genres, start_year, end_year).songs)
 
     def get_random_songs(
         self,
         count: int,
         genres: Optional[List[str]] = None,
         start_year: Optional[int] = None,
-        end_year: Optional[int] = None
-    ) -> List[Song]:
-        """Get a random sample of songs, optionally filtered by genres and/or year range."""
+        end_year: Optional[int] = None,
+        rng: Optional[random.Random] = None,
+        pool: Optional[SongPool] = None
+    ) -> List[SongRecord]:
+        """Get a random sample of songs, optionally filtered by genres and/or year range.
+
+        A ``pool`` (e.g. a playlist's own songs) replaces the filters. Pass a
+        seeded ``rng`` to make the sample reproducible.
+        """
         # Filter songs based on criteria
-        filtered_songs = self.filter_songs_by_criteria(genres, start_year, end_year)
+        filtered_songs = (pool or self.get_song_pool(genres, start_year, end_year)).songs
 
         # If we don't have enough songs after filtering, return all we have
         if count >= len(filtered_songs):
-            return filtered_songs
+            return list(filtered_songs)
 
-        return random.sample(filtered_songs, count)
+        return (rng or random).sample(filtered_songs, count)
 
     def get_random_song_choices(
         self,
-        correct_song: Song,
+        correct_song: SongRecord,
         num_choices: int,
         genres: Optional[List[str]] = None,
         start_year: Optional[int] = None,
-        end_year: Optional[int] = None
-    ) -> List[Song]:
-        """Get a list of random song choices including the correct song, optionally filtered."""
-
-        # Get the filtered song pool
-        song_pool = self.filter_songs_by_criteria(genres, start_year, end_year)
-
-        # Remove the correct song from the pool for now
-        other_songs = [s for s in song_pool if s.SongId != correct_song.SongId]
-
-        # Make sure we have enough songs for choices
-        if len(other_songs) < num_choices - 1:
-            # Get more songs from the general pool
-            additional_songs = [s for s in self.songs if s.SongId != correct_song.SongId and s not in other_songs]
-            other_songs.extend(additional_songs)
-
-        # Filter songs to ensure unique names
-        unique_other_songs = []
-        seen_names = set()
-
-        # First add the correct song name to seen_names
-        seen_names.add(correct_song.Name)
-
-        # Shuffle to get random candidates
-        random.shuffle(other_songs)
-
-        # Select songs with unique names
-        for song in other_songs:
-            if song.Name not in seen_names:
-                seen_names.add(song.Name)
-                unique_other_songs.append(song)
-
-            # Break when we have enough choices
-            if len(unique_other_songs) >= num_choices - 1:
-                break
-
-        # If we still don't have enough unique names, try again with the full song list
-        if len(unique_other_songs) < num_choices - 1:
-            remaining_songs = [s for s in self.songs if s.SongId != correct_song.SongId and s.Name not in seen_names]
-            random.shuffle(remaining_songs)
-
-            for song in remaining_songs:
-                if song.Name not in seen_names:
-                    seen_names.add(song.Name)
-                    unique_other_songs.append(song)
-
-                # Break when we have enough choices
-                if len(unique_other_songs) >= num_choices - 1:
-                    break
-
-        # Get the choices we have
-        wrong_choices = unique_other_songs[:num_choices - 1]
-
-        # Add the correct song
+        end_year: Optional[int] = None,
+        rng: Optional[random.Random] = None,
+        difficulty: str = "normal",
+        pool: Optional[SongPool] = None
+    ) -> List[SongRecord]:
+        """Get a list of random song choices including the correct song, optionally filtered.
+
+        All choices have distinct names. Distractors come from the filtered pool
+        and, when it is too small, from the whole catalog. On "hard" difficulty
+        they are the songs most similar to the correct one (tempo, year,
+        length, popularity and genres) instead of random ones. A ``pool``
+        (e.g. a playlist's own songs) replaces the filters. Pass a seeded
+        ``rng`` to make the choices and their order reproducible.
+        """
+        rng = rng or random
+        song_pool = pool or self.get_song_pool(genres, start_year, end_year)
+        if difficulty == "hard":
+            wrong_choices = self.choice_sampler.sample_similar(
+                song_pool,
+                correct_song,
+                num_choices - 1,
+                self.similarity_index,
+                config.HARD_MODE_CANDIDATES,
+                fallback_pool=self.get_song_pool(),
+                rng=rng
+            )
+        else:
+            wrong_choices = self.choice_sampler.sample(
+                song_pool,
+                correct_song,
+                num_choices - 1,
+                fallback_pool=self.get_song_pool(),
+                rng=rng
+            )
+
+        # Add the correct song and shuffle the choices
         choices = wrong_choices + [correct_song]
-
-        # Verify all song names are unique
-        choice_names = [s.Name for s in choices]
-        if len(set(choice_names)) != len(choices):
-            print("WARNING: Duplicate song names in choices!")
-
-        # Shuffle the choices
-        random.shuffle(choices)
+        rng.shuffle(choices)
 
         return choices
 
@@ -228,26 +370,57 @@ class SongService:
         """Get the list of available genres (those with at least 30 songs)."""
         return self.available_genres
 
-    async def get_deezer_preview_url(self, song: Song) -> str:
-        """Get the Deezer preview URL for a song."""
+    async def get_deezer_preview_url(self, song: SongRecord) -> str:
+        """Get the Deezer preview URL for a song.
+
+        URLs are served from the preview cache while their signature is still
+        valid, and concurrent lookups for the same track share one request.
+        """
         if not song.DeezerID:
             return ""
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(f"https://api.deezer.com/track/{song.DeezerID}")
-                if response.status_code != 200:
-                    return ""
-
-                data = response.json()
-                preview_url = data.get("preview")
-                if not preview_url:
-                    return ""
-
-                return preview_url
-            except Exception as e:
-                print(f"Error fetching preview URL: {e}")
-                return ""
+        deezer_id = song.DeezerID
+        return await self.preview_cache.get_or_fetch(
+            deezer_id, lambda: self._fetch_deezer_preview_url(deezer_id)
+        )
+
+    async def _fetch_deezer_preview_url(self, deezer_id: int) -> Optional[str]:
+        """Request the track from the Deezer API and return its preview URL.
+
+        Returns an empty string when the track has no preview, and None when
+        the lookup failed and is worth retrying later.
+        """
+        try:
+            # Fall back to a one-off client when running outside the app lifespan
+            if self.http_client is None:
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(f"https://api.deezer.com/track/{deezer_id}")
+            else:
+                response = await self.http_client.get(f"https://api.deezer.com/track/{deezer_id}")
+        except Exception as e:
+            print(f"Error fetching preview URL: {e}")
+            return None
+
+        if response.status_code == 404:
+            return ""
+        if response.status_code != 200:
+            return None
+
+        try:
+            data = response.json()
+        except ValueError as e:
+            # E.g. an HTML error page served with a 200 status
+            print(f"Invalid Deezer API response for track {deezer_id}: {e}")
+            return None
+        if not isinstance(data, dict):
+            print(f"Unexpected Deezer API response for track {deezer_id}")
+            return None
+        if "error" in data:
+            # Deezer reports quota and lookup errors with a 200 status
+            print(f"Deezer API error for track {deezer_id}: {data['error']}")
+            return None
+
+        return data.get("preview") or ""
 
     def get_total_song_count(self) -> int:
         """Get the total number of songs in the database."""
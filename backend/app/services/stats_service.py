@@ -0,0 +1,73 @@
+"""Service for precomputed catalog statistics."""
+from functools import lru_cache
+from typing import Any, Callable, Dict, Tuple
+
+from app import config
+from app.models.song import PlaylistFilters
+from app.services.playlist_service import playlist_service
+from app.services.song_service import song_service
+from app.utils.http_cache import CachedPayload
+
+
+class StatsService:
+    """Computes catalog aggregates once per catalog version and keeps them serialized.
+
+    The aggregates only change when the catalog does, so each one is built
+    on first request, serialized to JSON bytes with an ETag, and reused until
+    ``song_service.catalog_version`` changes.
+    """
+
+    def __init__(self):
+        self._builders: Dict[str, Callable[[], Any]] = {
+            "years": self._build_years,
+            "decade-counts": song_service.get_decade_counts,
+            "genre-distribution": song_service.get_genre_distribution,
+        }
+        self._payloads: Dict[Tuple[str, str], CachedPayload] = {}
+        # Facet counts, keyed by (catalog version, filters as JSON)
+        self._facet_payload_cached = lru_cache(maxsize=config.FACET_CACHE_SIZE)(self._build_facet_payload)
+
+    def _build_years(self) -> Dict[str, Any]:
+        years = song_service.get_available_years()
+        return {
+            "min_year": min(years) if years else None,
+            "max_year": max(years) if years else None,
+            "years": sorted(years)
+        }
+
+    def get_payload(self, name: str) -> CachedPayload:
+        """Get a serialized aggregate for the current catalog version."""
+        key = (song_service.catalog_version, name)
+        payload = self._payloads.get(key)
+        if payload is None:
+            # Drop payloads from previous catalog versions
+            self._payloads = {k: v for k, v in self._payloads.items() if k[0] == key[0]}
+            payload = CachedPayload.from_json(self._builders[name](), song_service.catalog_updated_at)
+            self._payloads[key] = payload
+        return payload
+
+    def get_facet_counts(self, filters: PlaylistFilters) -> Dict[str, Any]:
+        """Count the songs matching ``filters``, overall and per genre and facet value.
+
+        The filters are combined into one bitmap, which is then intersected
+        with each value's precomputed bitmap and popcounted.
+        """
+        mask = playlist_service.filter_mask(filters)
+        genre_masks = song_service.filter_engine.genre_masks
+        return {
+            "total": mask.bit_count(),
+            "genre": {genre: (mask & genre_masks.get(genre, 0)).bit_count() for genre in song_service.get_available_genres()},
+            **song_service.facet_index.counts(mask),
+        }
+
+    def _build_facet_payload(self, catalog_version: str, filters_json: str) -> CachedPayload:
+        filters = PlaylistFilters.model_validate_json(filters_json)
+        return CachedPayload.from_json(self.get_facet_counts(filters), song_service.catalog_updated_at)
+
+    def get_facet_payload(self, filters: PlaylistFilters) -> CachedPayload:
+        """Get the serialized facet counts for ``filters`` in the current catalog version."""
+        return self._facet_payload_cached(song_service.catalog_version, filters.model_dump_json())
+
+
+# Create a global instance of the stats service
+stats_service = StatsService()
@@ -0,0 +1,137 @@
+"""Typed facets parsed from song tags, with bitmap indexes for counting songs per facet value."""
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.models.song_record import SongRecord
+from app.services.filter_engine import mask_of_positions
+
+# Tempo and length classes the catalog tags songs with
+TEMPO_CLASSES = ("very-fast", "fast", "medium", "slow")
+DURATION_CLASSES = ("short", "medium-length", "long")
+
+# Width of the BPM ranges songs are grouped into ("120-139")
+BPM_BUCKET_SIZE = 20
+
+FACETS = ("tempo", "duration", "bpm", "year")
+
+
+class TagFacets:
+    """The values encoded in a song's tags, parsed once.
+
+    ``genres`` are the plain tags, i.e. everything that isn't a tempo class,
+    a duration class or a ``bpm:``/``year:`` value.
+    """
+
+    __slots__ = ("genres", "tempo", "duration", "bpm", "year")
+
+    def __init__(
+        self,
+        genres: Tuple[str, ...],
+        tempo: Optional[str],
+        duration: Optional[str],
+        bpm: Optional[float],
+        year: Optional[int]
+    ):
+        self.genres = genres
+        self.tempo = tempo
+        self.duration = duration
+        self.bpm = bpm
+        self.year = year
+
+
+def _parse_number(text: str, parse: Callable[[str], float]) -> Optional[float]:
+    try:
+        return parse(text)
+    except ValueError:
+        return None
+
+
+def parse_tags(tags: Optional[Sequence[str]]) -> TagFacets:
+    """Split tags like ``("Pop", "fast", "short", "bpm:128.5", "year:2019")`` into typed facets."""
+    genres = []
+    tempo = duration = bpm = year = None
+    for tag in tags or ():
+        if tag in TEMPO_CLASSES:
+            tempo = tag
+        elif tag in DURATION_CLASSES:
+            duration = tag
+        elif tag.startswith("bpm:"):
+            bpm = _parse_number(tag[4:], float)
+        elif tag.startswith("year:"):
+            year = _parse_number(tag[5:], int)
+        else:
+            genres.append(tag)
+    return TagFacets(tuple(genres), tempo, duration, bpm or None, year)
+
+
+def bpm_bucket(bpm: Optional[float]) -> Optional[str]:
+    """The BPM range a tempo falls in, e.g. 128.5 -> "120-139"."""
+    if not bpm:
+        return None
+    low = int(bpm // BPM_BUCKET_SIZE) * BPM_BUCKET_SIZE
+    return f"{low}-{low + BPM_BUCKET_SIZE - 1}"
+
+
+def _bucket_start(bucket: str) -> int:
+    return int(bucket.split("-", 1)[0])
+
+
+class FacetIndex:
+    """Bitmaps of the songs having each facet value, over catalog positions.
+
+    Positions are the same as the FilterEngine's, so the songs matching any
+    filter can be counted per facet value with one AND and a popcount each.
+    """
+
+    def __init__(
+        self,
+        songs: Sequence[SongRecord],
+        facets: Sequence[TagFacets],
+        get_year: Callable[[SongRecord], Optional[int]]
+    ):
+        """Index ``songs``; ``facets`` are their parsed tags, in the same order."""
+        positions: Dict[str, Dict[str, List[int]]] = {facet: {} for facet in FACETS}
+        for position, (song, song_facets) in enumerate(zip(songs, facets)):
+            year = get_year(song)
+            values = (
+                song_facets.tempo,
+                song_facets.duration,
+                bpm_bucket(song_facets.bpm),
+                str(year) if year else None,
+            )
+            for facet, value in zip(FACETS, values):
+                if value is not None:
+                    positions[facet].setdefault(value, []).append(position)
+
+        # Classes in their natural order, buckets and years ascending
+        orders = {
+            "tempo": TEMPO_CLASSES,
+            "duration": DURATION_CLASSES,
+            "bpm": sorted(positions["bpm"], key=_bucket_start),
+            "year": sorted(positions["year"]),
+        }
+        self.masks: Dict[str, Dict[str, int]] = {
+            facet: {
+                value: mask_of_positions(positions[facet][value], len(songs))
+                for value in orders[facet] if value in positions[facet]
+            }
+            for facet in FACETS
+        }
+
+    def values(self, facet: str) -> List[str]:
+        """Values of a facet that at least one song has."""
+        return list(self.masks[facet])
+
+    def mask(self, facet: str, values: Sequence[str]) -> int:
+        """Bitmap of songs having any of the given values of a facet."""
+        masks = self.masks[facet]
+        mask = 0
+        for value in values:
+            mask |= masks.get(value, 0)
+        return mask
+
+    def counts(self, mask: int) -> Dict[str, Dict[str, int]]:
+        """Number of songs in ``mask`` having each value of each facet."""
+        return {
+            facet: {value: (mask & value_mask).bit_count() for value, value_mask in masks.items()}
+            for facet, masks in self.masks.items()
+        }
@@ -0,0 +1,100 @@
+"""Write-behind buffering: collect items on the request path, persist them in batches."""
+import asyncio
+import threading
+from typing import Callable, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class BatchWriter(Generic[T]):
+    """Bounded buffer flushed in batches by a background task.
+
+    ``add`` never blocks or does I/O, so it is safe on the request path.
+    ``write`` receives each batch and runs in a worker thread, so it may use
+    blocking APIs such as sqlite3. When more than ``max_pending`` items are
+    waiting, new ones are dropped (and counted) instead of growing memory
+    without bound.
+
+    A batch that fails to write is queued again, ahead of newer items, and
+    retried on the next flush. Items that no longer fit in the buffer then,
+    or that are still unwritten at shutdown, are passed to ``on_drop``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        write: Callable[[List[T]], None],
+        max_pending: int = 10000,
+        interval: float = 1.0,
+        on_drop: Optional[Callable[[List[T]], None]] = None
+    ):
+        self.name = name
+        self.write = write
+        self.max_pending = max_pending
+        self.interval = interval
+        self.on_drop = on_drop
+        self.dropped = 0
+        self._pending: List[T] = []
+        # Guards the buffer against add() racing a flush swapping it out
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, item: T) -> bool:
+        """Queue an item. Returns False if it was dropped because the buffer is full."""
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending.append(item)
+            return True
+
+    def _take(self) -> List[T]:
+        with self._lock:
+            batch, self._pending = self._pending, []
+            return batch
+
+    def _requeue(self, batch: List[T]) -> None:
+        """Put a batch that failed to write back in front of the buffer, as far as it fits."""
+        with self._lock:
+            pending = batch + self._pending
+            self._pending = pending[:self.max_pending]
+            dropped = pending[self.max_pending:]
+            self.dropped += len(dropped)
+        if dropped:
+            print(f"Dropped {len(dropped)} {self.name} items that could not be written")
+            self._drop(dropped)
+
+    def _drop(self, items: List[T]) -> None:
+        if self.on_drop is not None:
+            self.on_drop(items)
+
+    async def flush(self) -> int:
+        """Write everything queued so far. Returns the number of items written."""
+        batch = self._take()
+        if not batch:
+            return 0
+        try:
+            await asyncio.to_thread(self.write, batch)
+        except Exception as e:
+            print(f"Error writing {len(batch)} {self.name} items, will retry: {e}")
+            self._requeue(batch)
+            return 0
+        return len(batch)
+
+    async def run(self) -> None:
+        """Flush periodically until cancelled, then flush what is left."""
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                await self.flush()
+        finally:
+            # One last synchronous write so nothing queued is lost on shutdown
+            batch = self._take()
+            if batch:
+                try:
+                    self.write(batch)
+                except Exception as e:
+                    print(f"Error writing {len(batch)} {self.name} items: {e}")
+                    self._drop(batch)
@@ -0,0 +1,67 @@
+"""Helpers for serving pre-serialized responses with HTTP cache validators."""
+import hashlib
+import json
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+
+class CachedPayload:
+    """A response body serialized once, with its validators."""
+
+    __slots__ = ("body", "etag", "last_modified", "media_type")
+
+    def __init__(self, body: bytes, last_modified: float, media_type: str = "application/json"):
+        self.body = body
+        self.etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        self.last_modified = int(last_modified)  # HTTP dates have one-second resolution
+        self.media_type = media_type
+
+    @classmethod
+    def from_json(cls, content: Any, last_modified: float) -> "CachedPayload":
+        body = json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        return cls(body, last_modified)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag, using weak comparison (W/ prefixes ignored)."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+
+def _not_modified_since(if_modified_since: str, last_modified: int) -> bool:
+    try:
+        return parsedate_to_datetime(if_modified_since).timestamp() >= last_modified
+    except (TypeError, ValueError):
+        return False
+
+
+def cached_response(request: Request, payload: CachedPayload, cache_control: Optional[str] = None) -> Response:
+    """Return the payload, or an empty 304 when the client's copy is still current.
+
+    If-None-Match takes precedence over If-Modified-Since, as required by RFC 9110.
+    """
+    headers = {
+        "ETag": payload.etag,
+        "Last-Modified": formatdate(payload.last_modified, usegmt=True),
+    }
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = etag_matches(if_none_match, payload.etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        not_modified = if_modified_since is not None and _not_modified_since(if_modified_since, payload.last_modified)
+
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type=payload.media_type, headers=headers)
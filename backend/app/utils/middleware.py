@@ -0,0 +1,272 @@
+"""ASGI middleware for response compression and HTTP cache policies."""
+import gzip
+import hashlib
+import re
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.utils.http_cache import etag_matches
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q-value}."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+class CompressionMiddleware:
+    """Compresses responses with brotli (when installed) or gzip.
+
+    Responses smaller than ``minimum_size``, already encoded, or of a type
+    that doesn't compress well (audio, most images) are sent as is. Streaming
+    responses are compressed chunk by chunk.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        brotli_enabled: bool = True
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.brotli_enabled = brotli_enabled and brotli is not None
+
+    def choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        accepted = _accepted_encodings(accept_encoding)
+        if self.brotli_enabled and accepted.get("br", 0) > 0:
+            return "br"
+        if accepted.get("gzip", 0) > 0:
+            return "gzip"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-request state for CompressionMiddleware."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.inner_send = send
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.compressor = None
+
+    def _compress_all(self, body: bytes) -> bytes:
+        if self.encoding == "br":
+            return brotli.compress(body, quality=self.middleware.brotli_quality)
+        return gzip.compress(body, compresslevel=self.middleware.gzip_level, mtime=0)
+
+    def _start_stream(self) -> None:
+        if self.encoding == "br":
+            self.compressor = brotli.Compressor(quality=self.middleware.brotli_quality)
+        else:
+            self.compressor = zlib.compressobj(self.middleware.gzip_level, zlib.DEFLATED, 31)
+
+    def _compress_chunk(self, chunk: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            data = self.compressor.process(chunk) if chunk else b""
+            return data + self.compressor.finish() if final else data + self.compressor.flush()
+        data = self.compressor.compress(chunk)
+        return data + (self.compressor.flush() if final else self.compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    def _should_compress(self, headers: MutableHeaders) -> bool:
+        if self.start_message["status"] in (204, 206, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Hold the headers until the first body chunk shows how large the response is
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.inner_send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if not self._should_compress(headers) or (not more_body and len(body) < self.middleware.minimum_size):
+                self.passthrough = True
+                await self.inner_send(self.start_message)
+                await self.inner_send(message)
+                return
+
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body:
+                compressed = self._compress_all(body)
+                headers["Content-Length"] = str(len(compressed))
+                await self.inner_send(self.start_message)
+                await self.inner_send({"type": "http.response.body", "body": compressed})
+                return
+
+            # Streaming response: the final length is unknown
+            del headers["Content-Length"]
+            self._start_stream()
+            await self.inner_send(self.start_message)
+
+        await self.inner_send({
+            "type": "http.response.body",
+            "body": self._compress_chunk(body, final=not more_body),
+            "more_body": more_body,
+        })
+
+
+class CachePolicy:
+    """Cache-Control value for a group of routes, optionally with ETag revalidation."""
+
+    __slots__ = ("cache_control", "etag")
+
+    def __init__(self, cache_control: str, etag: bool = False):
+        self.cache_control = cache_control
+        self.etag = etag  # Add a weak ETag from the body and answer matching requests with 304
+
+
+PolicyRule = Tuple[str, Callable[[str], Optional[CachePolicy]]]
+
+
+class CacheControlMiddleware:
+    """Applies per-route cache policies to successful GET and HEAD responses.
+
+    ``rules`` are (path prefix, resolver) pairs checked in order; the first
+    matching prefix decides. A resolver gets the request path and returns the
+    policy to apply, or None to leave the response alone. Responses that
+    already carry a Cache-Control header are never changed.
+    """
+
+    def __init__(self, app: ASGIApp, rules: Sequence[PolicyRule]):
+        self.app = app
+        self.rules: List[PolicyRule] = list(rules)
+
+    def resolve(self, path: str) -> Optional[CachePolicy]:
+        for prefix, resolver in self.rules:
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return resolver(path)
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        policy = self.resolve(scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_with_policy(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                if message["status"] != 200 or "cache-control" in headers:
+                    passthrough = True
+                    await send(message)
+                    return
+                headers["Cache-Control"] = policy.cache_control
+                if not policy.etag or "etag" in headers:
+                    passthrough = True
+                    await send(message)
+                    return
+                # Hold the headers until the body is known, to derive the ETag
+                start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            if message.get("more_body", False):
+                # Streaming bodies can't be hashed up front
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            etag = f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+            headers["ETag"] = etag
+            if if_none_match is not None and etag_matches(if_none_match, etag):
+                del headers["Content-Length"]
+                del headers["Content-Type"]
+                start_message["status"] = 304
+                await send(start_message)
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_with_policy)
+
+
+# Filenames carrying a content hash, e.g. app.3f9a1c2b.js or logo-8d2e61f0a1.svg
+_VERSIONED_ASSET_PATTERN = re.compile(r"[.-][0-9a-fA-F]{8,}\.[A-Za-z0-9]+$")
+
+
+def static_policy(immutable: CachePolicy, default: CachePolicy) -> Callable[[str], CachePolicy]:
+    """Resolver giving immutable caching to content-hashed static assets."""
+    def resolve(path: str) -> CachePolicy:
+        return immutable if _VERSIONED_ASSET_PATTERN.search(path) else default
+    return resolve
+
+
+def fixed_policy(policy: Optional[CachePolicy]) -> Callable[[str], Optional[CachePolicy]]:
+    """Resolver applying the same policy to every path under a prefix."""
+    return lambda path: policy
@@ -0,0 +1,122 @@
+"""In-process cache for signed preview URLs with request coalescing."""
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from urllib.parse import unquote
+
+# Deezer signs preview URLs with an "hdnea=exp=<unix time>~acl=...~hmac=..." token, so
+# "exp=" may follow the token's "=" as well as a query or token separator
+_EXPIRY_PATTERN = re.compile(r"(?:^|[?&~=])exp=(\d+)")
+
+
+def get_url_expiry(url: str) -> Optional[float]:
+    """Extract the expiry timestamp embedded in a signed URL, if any."""
+    match = _EXPIRY_PATTERN.search(unquote(url))
+    if not match:
+        return None
+    return float(match.group(1))
+
+
+class PreviewUrlCache:
+    """Bounded LRU cache of preview URLs that honours their signed expiry.
+
+    Entries expire ``expiry_margin`` seconds before the expiry embedded in the
+    URL, or after ``default_ttl`` seconds when the URL carries none. Empty
+    results (songs without a preview) are remembered for ``negative_ttl``
+    seconds. Concurrent lookups of the same key share a single fetch.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        default_ttl: float = 600.0,
+        expiry_margin: float = 60.0,
+        negative_ttl: float = 300.0
+    ):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.expiry_margin = expiry_margin
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[str, float]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, "asyncio.Future[str]"] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Return the cached URL for a key, or None when missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        url, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return url
+
+    def expires_at(self, key: Hashable) -> Optional[float]:
+        """Return when the cached entry for a key stops being served."""
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    def set(self, key: Hashable, url: str) -> None:
+        """Store a URL, computing its lifetime from the embedded expiry."""
+        now = time.time()
+        if not url:
+            expires_at = now + self.negative_ttl
+        else:
+            url_expiry = get_url_expiry(url)
+            if url_expiry is None:
+                expires_at = now + self.default_ttl
+            else:
+                expires_at = url_expiry - self.expiry_margin
+
+        if expires_at <= now:
+            # Already (almost) expired, not worth keeping
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = (url, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a cached entry."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._entries.clear()
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Optional[str]]]) -> str:
+        """Return the cached URL for a key, fetching it on a miss.
+
+        Only one fetch per key runs at a time; concurrent callers wait for the
+        same result. ``fetch`` may return None to signal a transient failure,
+        in which case nothing is cached and an empty string is returned.
+        """
+        url = self.get(key)
+        if url is not None:
+            return url
+
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch_and_store(key, fetch))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # Shield the shared fetch so one cancelled caller doesn't cancel it for everyone
+        return await asyncio.shield(future)
+
+    async def _fetch_and_store(self, key: Hashable, fetch: Callable[[], Awaitable[Optional[str]]]) -> str:
+        url = await fetch()
+        if url is None:
+            return ""
+        self.set(key, url)
+        return url
@@ -0,0 +1,149 @@
+"""Incrementally maintained score rankings."""
+from bisect import bisect_left, insort
+from typing import Dict, Hashable, List, Optional, Tuple
+
+# (negated score, tiebreak, member): ascending order is best score first
+_Key = Tuple[int, float, Hashable]
+# (negated score, tiebreak, insertion number, item): items never need to be comparable
+_IndexKey = Tuple[int, float, int, Hashable]
+
+
+class Scoreboard:
+    """Members ordered by score, kept sorted as scores change.
+
+    Each update is a bisection to remove the member's old entry and an
+    insertion of the new one, so the ranking never has to be re-sorted. Ties
+    are ordered by ``tiebreak`` (lower first, e.g. who got there first) and
+    share the same rank.
+    """
+
+    def __init__(self):
+        self._keys: List[_Key] = []
+        self._entries: Dict[Hashable, _Key] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, member: Hashable) -> bool:
+        return member in self._entries
+
+    def set(self, member: Hashable, score: int, tiebreak: float = 0) -> None:
+        """Insert a member or move it to a new score."""
+        old_key = self._entries.get(member)
+        if old_key is not None:
+            if old_key[0] == -score and old_key[1] == tiebreak:
+                return
+            del self._keys[bisect_left(self._keys, old_key)]
+        key = (-score, tiebreak, member)
+        insort(self._keys, key)
+        self._entries[member] = key
+
+    def remove(self, member: Hashable) -> None:
+        key = self._entries.pop(member, None)
+        if key is not None:
+            del self._keys[bisect_left(self._keys, key)]
+
+    def score(self, member: Hashable) -> Optional[int]:
+        key = self._entries.get(member)
+        return -key[0] if key is not None else None
+
+    def rank(self, member: Hashable) -> Optional[int]:
+        """1-based rank of a member; members with equal scores share a rank."""
+        key = self._entries.get(member)
+        if key is None:
+            return None
+        return bisect_left(self._keys, (key[0],)) + 1
+
+    def rank_of_score(self, score: int) -> int:
+        """The rank a member with this score would have."""
+        return bisect_left(self._keys, (-score,)) + 1
+
+    def top(self, count: int) -> List[Tuple[Hashable, int, int]]:
+        """The best ``count`` members as (member, score, rank)."""
+        result = []
+        rank = 0
+        previous_score = None
+        for position, (negated_score, _, member) in enumerate(self._keys[:count]):
+            if negated_score != previous_score:
+                rank = position + 1
+                previous_score = negated_score
+            result.append((member, -negated_score, rank))
+        return result
+
+
+class ScoreIndex:
+    """An append-only ranking of many scores that keeps only the best entries.
+
+    Score counts live in a Fenwick tree indexed by score, so adding a score
+    and finding the rank of a score are O(log S) in the highest score,
+    however many scores were added. Only the best ``top_size`` entries are
+    kept, in a short sorted list. Scores are non-negative integers; ties
+    share a rank, and entries with the same score and tiebreak are kept in
+    the order they were added.
+    """
+
+    def __init__(self, top_size: int = 100):
+        self.top_size = top_size
+        self.total = 0
+        # Fenwick tree of score counts: node i covers scores [i - lowbit(i), i - 1]
+        self._tree: List[int] = [0] * 65
+        self._top: List[_IndexKey] = []
+
+    def __len__(self) -> int:
+        return self.total
+
+    def _grow(self, score: int) -> None:
+        """Double the tree until it covers ``score``.
+
+        With a power-of-two size n, the nodes of a 2n tree above n cover only
+        scores that weren't counted yet, except node 2n, which covers all.
+        """
+        while score >= len(self._tree) - 1:
+            size = len(self._tree) - 1
+            self._tree.extend([0] * size)
+            self._tree[2 * size] = self.total
+
+    def add(self, score: int, tiebreak: float, item: Hashable) -> None:
+        """Count a score, and keep ``item`` if it is among the best entries."""
+        score = max(score, 0)
+        self._grow(score)
+        tree = self._tree
+        index = score + 1
+        while index < len(tree):
+            tree[index] += 1
+            index += index & -index
+        self.total += 1
+
+        # The running total is unique per entry, so ties never fall through to comparing items
+        key = (-score, tiebreak, self.total, item)
+        if len(self._top) < self.top_size or key < self._top[-1]:
+            insort(self._top, key)
+            if len(self._top) > self.top_size:
+                self._top.pop()
+
+    def _count_at_most(self, score: int) -> int:
+        tree = self._tree
+        index = min(score + 1, len(tree) - 1)
+        count = 0
+        while index > 0:
+            count += tree[index]
+            index -= index & -index
+        return count
+
+    def rank_of_score(self, score: int) -> int:
+        """1-based rank of a score: one more than the number of higher scores."""
+        if score < 0:
+            return self.total + 1
+        return self.total - self._count_at_most(score) + 1
+
+    def top(self, count: int) -> List[Tuple[Hashable, int, int]]:
+        """The best ``count`` (at most ``top_size``) entries as (item, score, rank)."""
+        result = []
+        rank = 0
+        previous_score = None
+        for position, (negated_score, _, _, item) in enumerate(self._top[:count]):
+            if negated_score != previous_score:
+                rank = position + 1
+                previous_score = negated_score
+            result.append((item, -negated_score, rank))
+        return result
@@ -0,0 +1,53 @@
+"""Fast JSON encoding for API responses, and decoding of client messages."""
+import json
+from typing import Any, Iterable
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the standard library
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Encode plain JSON data (dicts, lists, strings, numbers) to UTF-8 bytes."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: str) -> Any:
+    """Decode a JSON document. Raises ValueError if it isn't valid JSON."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_array(fragments: Iterable[bytes]) -> bytes:
+    """Join already-encoded JSON values into a JSON array."""
+    return b"[" + b",".join(fragments) + b"]"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that encodes with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def raw_json_response(body: bytes, **kwargs: Any) -> Response:
+    """Send an already-encoded JSON body as is."""
+    return Response(content=body, media_type="application/json", **kwargs)
+
+
+def model_response(model: BaseModel, **kwargs: Any) -> Response:
+    """Serialize a pydantic model straight to a response.
+
+    Returning a Response from a route skips FastAPI's response_model
+    validation and jsonable_encoder pass, which would otherwise copy and
+    re-validate a model that is already valid.
+    """
+    return raw_json_response(model.model_dump_json().encode("utf-8"), **kwargs)
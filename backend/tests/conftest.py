@@ -0,0 +1,32 @@
+"""Shared test setup: isolate the databases and keep the tests offline."""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = tempfile.mkdtemp(prefix="guess-the-song-tests-")
+
+# Set before any app module is imported, since services read the configuration at import time
+os.environ.setdefault("CATALOG_PATH", str(BACKEND_DIR / "songs.json"))
+os.environ["CATALOG_SNAPSHOT_PATH"] = os.path.join(DATA_DIR, "songs.snapshot")
+os.environ["SESSION_STORE"] = "memory"
+os.environ["SESSION_DB_PATH"] = os.path.join(DATA_DIR, "sessions.db")
+os.environ["LEADERBOARD_DB_PATH"] = os.path.join(DATA_DIR, "leaderboards.db")
+os.environ["ANALYTICS_DB_PATH"] = os.path.join(DATA_DIR, "analytics.db")
+os.environ["CUSTOM_PLAYLIST_DB_PATH"] = os.path.join(DATA_DIR, "playlists.db")
+os.environ["ANALYTICS_ENABLED"] = "false"
+os.environ["GAME_POOL_SIZE"] = "0"
+
+
+@pytest.fixture(autouse=True)
+def offline_previews(monkeypatch):
+    """Answer Deezer preview lookups locally with URLs that expire in 15 minutes."""
+    from app.services.song_service import song_service
+
+    async def fetch(deezer_id: int) -> str:
+        return f"https://cdns-preview.dzcdn.net/stream/c-{deezer_id}.mp3?hdnea=exp={int(time.time()) + 900}"
+
+    monkeypatch.setattr(song_service, "_fetch_deezer_preview_url", fetch)
@@ -0,0 +1,66 @@
+"""BatchWriter keeps batches that fail to write and retries them."""
+import asyncio
+from typing import List
+
+import pytest
+
+from app.utils.batch_writer import BatchWriter
+
+
+class FlakyWrite:
+    """Fails a given number of times, then records what it writes."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.written: List[int] = []
+
+    def __call__(self, batch: List[int]) -> None:
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("database is locked")
+        self.written.extend(batch)
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried_before_newer_items():
+    write = FlakyWrite(failures=1)
+    writer = BatchWriter("test", write, max_pending=10)
+    for item in (1, 2, 3):
+        writer.add(item)
+
+    assert await writer.flush() == 0
+    assert len(writer) == 3
+    writer.add(4)
+    assert await writer.flush() == 4
+    assert write.written == [1, 2, 3, 4]
+    assert writer.dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_items_beyond_max_pending_are_dropped_and_reported():
+    dropped: List[int] = []
+    writer = BatchWriter("test", FlakyWrite(failures=1), max_pending=3, on_drop=dropped.extend)
+    for item in (1, 2, 3):
+        writer.add(item)
+    flush = asyncio.ensure_future(writer.flush())
+    await asyncio.sleep(0)
+    # Queued while the failing write runs
+    writer.add(4)
+    await flush
+
+    assert len(writer) == 3
+    assert dropped == [4]
+    assert writer.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_unwritten_items_are_reported_at_shutdown():
+    dropped: List[int] = []
+    writer = BatchWriter("test", FlakyWrite(failures=5), interval=60, on_drop=dropped.extend)
+    writer.add(1)
+    task = asyncio.ensure_future(writer.run())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert dropped == [1]
@@ -0,0 +1,118 @@
+"""FilterEngine must select exactly the songs the original list-based filter did."""
+import random
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+from app.models.song_record import SongRecord
+from app.services.filter_engine import FilterEngine, mask_of_positions
+
+GENRES = ["Pop", "Rock", "Hip-Hop", "Jazz", "Dance", "Metal", "Soul"]
+
+
+def make_songs(count: int, seed: int = 7) -> List[SongRecord]:
+    rng = random.Random(seed)
+    songs = []
+    for row in range(count):
+        genres = tuple(rng.sample(GENRES, rng.randint(0, 3)))
+        # Missing and zero years never match a year filter
+        year = rng.choice([None, 0] + list(range(1960, 2025)))
+        songs.append(SongRecord(
+            row, row + 1, f"Song {row}", "Artist", "#000000", "#000000", None, None, genres, None, year, None
+        ))
+    return songs
+
+
+def reference_filter(
+    songs: List[SongRecord],
+    genres: Optional[List[str]],
+    start_year: Optional[int],
+    end_year: Optional[int]
+) -> List[SongRecord]:
+    """The original ``SongService.filter_songs_by_criteria``, over plain lists."""
+    by_genre: Dict[str, List[SongRecord]] = {}
+    for song in songs:
+        for genre in song.Tags:
+            by_genre.setdefault(genre, []).append(song)
+
+    filtered_songs = list(songs)
+    if genres:
+        genre_song_ids = set()
+        for genre in genres:
+            for song in by_genre.get(genre, []):
+                genre_song_ids.add(song.SongId)
+        filtered_songs = [song for song in filtered_songs if song.SongId in genre_song_ids]
+
+    if start_year or end_year:
+        year_filtered = []
+        for song in filtered_songs:
+            year = song.year
+            if year:
+                if start_year and end_year:
+                    if start_year <= year <= end_year:
+                        year_filtered.append(song)
+                elif start_year:
+                    if year >= start_year:
+                        year_filtered.append(song)
+                elif end_year:
+                    if year <= end_year:
+                        year_filtered.append(song)
+        filtered_songs = year_filtered
+
+    return filtered_songs
+
+
+@pytest.fixture(scope="module")
+def songs() -> List[SongRecord]:
+    return make_songs(2000)
+
+
+@pytest.fixture(scope="module")
+def engine(songs) -> FilterEngine:
+    return FilterEngine(songs, get_genres=lambda song: song.Tags, get_year=lambda song: song.year)
+
+
+def filters() -> List[Tuple[Optional[List[str]], Optional[int], Optional[int]]]:
+    rng = random.Random(11)
+    cases = [
+        (None, None, None),
+        ([], 0, 0),
+        (["Pop"], None, None),
+        (["Pop", "Pop", "Rock"], None, None),
+        (["Unknown"], None, None),
+        (None, 1990, None),
+        (None, None, 1990),
+        (None, 1990, 1999),
+        (None, 2000, 1990),
+        (None, 1900, 1950),
+        (None, 2030, None),
+        (["Jazz", "Soul"], 1970, 1979),
+    ]
+    for _ in range(200):
+        genres = rng.sample(GENRES + ["Unknown"], rng.randint(0, 3)) or None
+        start_year = rng.choice([None, 0] + list(range(1955, 2030)))
+        end_year = rng.choice([None, 0] + list(range(1955, 2030)))
+        cases.append((genres, start_year, end_year))
+    return cases
+
+
+@pytest.mark.parametrize("genres,start_year,end_year", filters())
+def test_resolve_matches_reference_filter(songs, engine, genres, start_year, end_year):
+    expected = reference_filter(songs, genres, start_year, end_year)
+    pool = engine.resolve(genres, start_year, end_year)
+    assert [song.SongId for song in pool.songs] == [song.SongId for song in expected]
+    assert pool.mask.bit_count() == len(expected)
+
+
+def test_resolve_ignores_genre_order_and_duplicates(engine):
+    assert engine.resolve(["Rock", "Pop", "Rock"], 1980, 1989) is engine.resolve(["Pop", "Rock"], 1980, 1989)
+
+
+def test_mask_of_positions_matches_setting_bits_one_at_a_time():
+    rng = random.Random(3)
+    for size in (0, 1, 7, 8, 9, 64, 1000):
+        positions = [rng.randrange(size) for _ in range(size // 2)] if size else []
+        expected = 0
+        for position in positions:
+            expected |= 1 << position
+        assert mask_of_positions(positions, size) == expected
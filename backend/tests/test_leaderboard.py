@@ -0,0 +1,177 @@
+"""A game's score reaches the leaderboards exactly once."""
+import asyncio
+import time
+
+import pytest
+
+from app.models.game import GameOption, GameQuestion, GameSession
+from app.services.game_service import game_service
+from app.services.leaderboard_service import LeaderboardService, ScoreEntry, period_key
+from app.services.session_store import SQLiteSessionStore
+from app.utils.scoreboard import ScoreIndex
+
+
+@pytest.fixture
+def leaderboards(tmp_path):
+    service = LeaderboardService(str(tmp_path / "leaderboards.db"))
+    yield service
+    service.close()
+
+
+def store_session(score: int, finished: bool = True) -> str:
+    question = GameQuestion(
+        song_id=1,
+        preview_url="",
+        blurred_cover_url="",
+        correct_option_index=0,
+        options=[GameOption(song_id=1, name="One", is_correct=True)]
+    )
+    session = GameSession.create([question])
+    session.score = score
+    session.current_question = 1 if finished else 0
+    game_service.sessions.put(session)
+    return session.session_id
+
+
+@pytest.mark.asyncio
+async def test_second_submission_is_rejected(leaderboards):
+    session_id = store_session(12)
+    result = await leaderboards.submit(session_id, "Ann")
+    assert result.score == 12
+
+    with pytest.raises(ValueError, match="already submitted"):
+        await leaderboards.submit(session_id, "Ann")
+    assert leaderboards.get_leaderboard().total_entries == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+async def test_concurrent_submissions_count_once(leaderboards, backend, tmp_path, monkeypatch):
+    if backend == "sqlite":
+        # Submissions then claim the session from several worker threads at once
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+        monkeypatch.setattr(game_service, "sessions", store)
+    session_id = store_session(30)
+    results = await asyncio.gather(
+        *(leaderboards.submit(session_id, f"Player {index}") for index in range(8)),
+        return_exceptions=True
+    )
+    errors = [result for result in results if isinstance(result, Exception)]
+    assert len(errors) == len(results) - 1
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert leaderboards.get_leaderboard().total_entries == 1
+    if backend == "sqlite":
+        store.close()
+
+
+@pytest.mark.asyncio
+async def test_unfinished_and_unknown_sessions(leaderboards):
+    with pytest.raises(ValueError, match="not finished"):
+        await leaderboards.submit(store_session(5, finished=False), "Ann")
+    assert await leaderboards.submit("missing", "Ann") is None
+    assert leaderboards.get_leaderboard().total_entries == 0
+
+
+@pytest.mark.asyncio
+async def test_workers_sharing_a_database_count_each_score_once(tmp_path):
+    path = str(tmp_path / "leaderboards.db")
+    first, second = LeaderboardService(path), LeaderboardService(path)
+    try:
+        for score in (10, 40, 25):
+            await first.submit(store_session(score), "Ann")
+        await first.writer.flush()
+
+        assert await second.sync() == 3
+        # Scores submitted on this worker are already on its boards
+        assert await first.sync() == 0
+        assert first.get_leaderboard().total_entries == 3
+        assert second.get_leaderboard().total_entries == 3
+        assert [entry.score for entry in second.get_leaderboard().entries] == [40, 25, 10]
+
+        restarted = LeaderboardService(path)
+        assert restarted.get_leaderboard().total_entries == 3
+        restarted.close()
+    finally:
+        first.close()
+        second.close()
+
+
+def test_entries_with_the_same_score_and_time_are_kept_in_order():
+    board = ScoreIndex(3)
+    entries = [ScoreEntry(name, 10, 1.0) for name in ("Ann", "Bob", "Cat", "Dan")]
+    for entry in entries:
+        board.add(10, 1.0, entry)
+    board.add(20, 1.0, ScoreEntry("Eve", 20, 1.0))
+    assert [(item.player_name, score, rank) for item, score, rank in board.top(3)] == [
+        ("Eve", 20, 1), ("Ann", 10, 2), ("Bob", 10, 2)
+    ]
+    assert len(board) == 5
+
+
+@pytest.mark.asyncio
+async def test_tied_rows_load_and_sync(tmp_path):
+    path = str(tmp_path / "leaderboards.db")
+    now = time.time()
+    day, week = period_key("daily", now), period_key("weekly", now)
+
+    def insert(service: LeaderboardService, session_ids) -> None:
+        service._write_rows([(session_id, "Ann", 10, None, day, week, now) for session_id in session_ids])
+
+    writer = LeaderboardService(path)
+    reader = LeaderboardService(path)
+    try:
+        insert(writer, ["a", "b"])
+        restarted = LeaderboardService(path)
+        assert restarted.get_leaderboard().total_entries == 2
+        restarted.close()
+
+        insert(writer, ["c", "d"])
+        assert await reader.sync() == 4
+        assert reader.get_leaderboard().total_entries == 4
+    finally:
+        writer.close()
+        reader.close()
+
+
+@pytest.mark.asyncio
+async def test_scores_that_could_not_be_written_are_retried(leaderboards, monkeypatch):
+    write_rows = leaderboards._write_rows
+    calls = []
+
+    def locked_once(rows) -> None:
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        write_rows(rows)
+
+    monkeypatch.setattr(leaderboards.writer, "write", locked_once)
+    session_id = store_session(15)
+    await leaderboards.submit(session_id, "Ann")
+    await leaderboards.writer.flush()
+    assert session_id in leaderboards._local_sessions
+
+    await leaderboards.writer.flush()
+    assert calls == [1, 1]
+    # The row came back from the database and was recognized as already ranked
+    assert await leaderboards.sync() == 0
+    assert leaderboards._local_sessions == set()
+    assert leaderboards.get_leaderboard().total_entries == 1
+
+
+@pytest.mark.asyncio
+async def test_scores_dropped_by_the_writer_are_forgotten(leaderboards, monkeypatch):
+    def locked(rows) -> None:
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(leaderboards.writer, "write", locked)
+    monkeypatch.setattr(leaderboards.writer, "max_pending", 1)
+    first, second = store_session(15), store_session(20)
+    await leaderboards.submit(first, "Ann")
+    flush = asyncio.ensure_future(leaderboards.writer.flush())
+    await asyncio.sleep(0)
+    # Queued while the failing write runs, then pushed out by the retried row
+    await leaderboards.submit(second, "Bob")
+    assert leaderboards._local_sessions == {first, second}
+    await flush
+
+    assert leaderboards._local_sessions == {first}
@@ -0,0 +1,91 @@
+"""Custom playlists: compiled pools are cached within bounds and built from rows already read."""
+
+import pytest
+
+from app.models.song import PlaylistFilters
+from app.services import playlist_service as playlist_service_module
+from app.services.playlist_service import PlaylistService
+from app.services.song_service import song_service
+
+
+class Clock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(playlist_service_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def make_service(tmp_path):
+    services = []
+
+    def make(**options) -> PlaylistService:
+        options.setdefault("max_per_client", 100)
+        service = PlaylistService(str(tmp_path / "playlists.db"), **options)
+        services.append(service)
+        return service
+
+    yield make
+    for service in services:
+        service.close()
+
+
+def filters(start_year: int) -> PlaylistFilters:
+    return PlaylistFilters(start_year=start_year)
+
+
+def test_pools_of_expired_playlists_are_dropped(make_service, clock):
+    service = make_service(ttl=60)
+    for year in range(1990, 1995):
+        service.create_playlist("Old", "", filters(year), "client")
+    assert len(service._pools) == 5
+
+    clock.now += 61
+    playlist, _ = service.create_playlist("New", "", filters(2000), "client")
+    assert list(service._pools) == [(song_service.catalog_version, playlist.id)]
+    assert [custom.id for custom in service.get_custom_playlists()] == [playlist.id]
+
+
+def test_pool_cache_is_bounded(make_service, clock):
+    service = make_service(pool_cache_size=3)
+    playlists = [service.create_playlist("Playlist", "", filters(year), "client")[0] for year in range(1990, 1996)]
+    assert len(service._pools) == 3
+
+    # Evicted pools are compiled again on demand
+    pool = service.get_song_pool(playlists[0].id)
+    assert len(pool.name_key_set) == playlists[0].song_count
+    assert len(service._pools) == 3
+    assert (song_service.catalog_version, playlists[0].id) in service._pools
+
+
+def test_listing_compiles_pools_without_reading_rows_again(make_service, monkeypatch):
+    service = make_service()
+    created = [service.create_playlist("Playlist", "", filters(year), "client")[0] for year in (1980, 1990)]
+    service._pools.clear()
+
+    def no_lookup(playlist_id: str):
+        raise AssertionError("playlist row read again")
+
+    monkeypatch.setattr(service, "_get_custom_playlist", no_lookup)
+    listed = service.get_custom_playlists()
+    assert [(playlist.id, playlist.song_count) for playlist in listed] == [
+        (playlist.id, playlist.song_count) for playlist in created
+    ]
+    assert len(service._pools) == 2
+
+
+def test_pool_by_id(make_service):
+    service = make_service()
+    playlist, _ = service.create_playlist("Playlist", "", filters(1990), "client")
+    service._pools.clear()
+    assert len(service.get_song_pool(playlist.id).name_key_set) == playlist.song_count
+    assert service.get_song_pool("custom-missing") is None
+    assert service.get_song_pool("pop-2010s") is None
@@ -0,0 +1,160 @@
+"""Preview URL lookups: the Deezer fetch, the URL cache and request coalescing."""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.song_service import song_service
+from app.utils import preview_cache
+from app.utils.preview_cache import PreviewUrlCache, get_url_expiry
+
+
+def signed_url(expires_at: int) -> str:
+    return f"https://cdns-preview.dzcdn.net/stream/c-1.mp3?hdnea=exp={expires_at}~acl=/api/v1/*~hmac=" + "f" * 64
+
+
+@pytest.fixture
+def deezer(monkeypatch):
+    """Route song_service's Deezer requests to a handler set by the test."""
+    responses = {}
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        return responses["handler"](request)
+
+    # Use the real lookup instead of the offline stub
+    monkeypatch.delattr(song_service, "_fetch_deezer_preview_url")
+    monkeypatch.setattr(song_service, "http_client", httpx.AsyncClient(transport=httpx.MockTransport(handle)))
+    monkeypatch.setattr(song_service, "preview_cache", PreviewUrlCache())
+    return responses
+
+
+def song_with_preview():
+    return next(song for song in song_service.songs if song.DeezerID)
+
+
+@pytest.mark.asyncio
+async def test_fetch_returns_preview(deezer):
+    url = signed_url(int(time.time()) + 900)
+    deezer["handler"] = lambda request: httpx.Response(200, json={"id": 1, "preview": url})
+    assert await song_service.get_deezer_preview_url(song_with_preview()) == url
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("response,expected", [
+    (httpx.Response(404), ""),
+    (httpx.Response(200, json={"id": 1, "preview": ""}), ""),
+    (httpx.Response(500), None),
+    (httpx.Response(200, json={"error": {"type": "Exception", "message": "Quota limit exceeded"}}), None),
+    (httpx.Response(200, text="<html>Service unavailable</html>"), None),
+    (httpx.Response(200, json=["unexpected"]), None),
+])
+async def test_fetch_failures(deezer, response, expected):
+    deezer["handler"] = lambda request: response
+    assert await song_service._fetch_deezer_preview_url(song_with_preview().DeezerID) == expected
+
+
+def test_preview_route_reports_invalid_responses_as_unavailable(deezer):
+    deezer["handler"] = lambda request: httpx.Response(200, text="<html>Service unavailable</html>")
+    response = TestClient(app).get(f"/api/preview/audio/{song_with_preview().SongId}")
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("url,expected", [
+    ("https://cdns-preview.dzcdn.net/stream/c-1.mp3?hdnea=exp=1700000000~acl=/api/v1/*~hmac=ab", 1700000000.0),
+    ("https://cdns-preview.dzcdn.net/stream/c-1.mp3?hdnea=exp%3D1700000000~acl%3D%2F*~hmac%3Dab", 1700000000.0),
+    ("https://example.com/a.mp3?exp=1700000000", 1700000000.0),
+    ("https://example.com/a.mp3?sexp=1700000000", None),
+    ("https://example.com/a.mp3", None),
+])
+def test_url_expiry(url, expected):
+    assert get_url_expiry(url) == expected
+
+
+def test_entries_expire_before_their_signature(monkeypatch):
+    now = 1_700_000_000.0
+    monkeypatch.setattr(preview_cache, "time", SimpleNamespace(time=lambda: now))
+    cache = PreviewUrlCache(expiry_margin=60, default_ttl=600, negative_ttl=300)
+    cache.set("signed", signed_url(int(now) + 900))
+    cache.set("unsigned", "https://example.com/a.mp3")
+    cache.set("missing", "")
+    cache.set("stale", signed_url(int(now) + 30))
+
+    assert cache.expires_at("signed") == now + 840
+    assert cache.expires_at("unsigned") == now + 600
+    assert cache.expires_at("missing") == now + 300
+    assert cache.get("missing") == ""
+    assert cache.get("stale") is None
+
+    now += 839
+    assert cache.get("signed") is not None
+    now += 1
+    assert cache.get("signed") is None
+    assert len(cache) == 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = PreviewUrlCache(max_entries=2)
+    cache.set(1, "https://example.com/1.mp3")
+    cache.set(2, "https://example.com/2.mp3")
+    cache.get(1)
+    cache.set(3, "https://example.com/3.mp3")
+    assert len(cache) == 2
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    assert cache.get(3) is not None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_fetch():
+    cache = PreviewUrlCache()
+    calls = 0
+    release = asyncio.Event()
+
+    async def fetch() -> str:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "https://example.com/1.mp3"
+
+    lookups = [asyncio.ensure_future(cache.get_or_fetch(1, fetch)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    assert await asyncio.gather(*lookups) == ["https://example.com/1.mp3"] * 5
+    assert calls == 1
+    # Served from the cache afterwards
+    assert await cache.get_or_fetch(1, fetch) == "https://example.com/1.mp3"
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_fetch():
+    cache = PreviewUrlCache()
+    release = asyncio.Event()
+
+    async def fetch() -> str:
+        await release.wait()
+        return "https://example.com/1.mp3"
+
+    first = asyncio.ensure_future(cache.get_or_fetch(1, fetch))
+    second = asyncio.ensure_future(cache.get_or_fetch(1, fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+    assert await second == "https://example.com/1.mp3"
+
+
+@pytest.mark.asyncio
+async def test_failed_fetches_are_not_cached():
+    cache = PreviewUrlCache()
+    results = iter([None, "https://example.com/1.mp3"])
+
+    async def fetch():
+        return next(results)
+
+    assert await cache.get_or_fetch(1, fetch) == ""
+    assert cache.get(1) is None
+    assert await cache.get_or_fetch(1, fetch) == "https://example.com/1.mp3"
@@ -0,0 +1,78 @@
+"""Seeded games and the daily challenge must be reproducible."""
+from datetime import date
+from typing import List, Tuple
+
+import pytest
+
+from app.models.game import GameQuestion, GameSettings
+from app.services.game_pool import GamePool
+from app.services.game_service import GameService
+from app.services.session_store import InMemorySessionStore
+
+
+def new_game_service() -> GameService:
+    return GameService(session_store=InMemorySessionStore(), game_pool=GamePool(size=0))
+
+
+def layout(questions: List[GameQuestion]) -> List[Tuple[int, Tuple[int, ...], int]]:
+    """What makes a game: each question's song, options and right answer."""
+    return [
+        (question.song_id, tuple(option.song_id for option in question.options), question.correct_option_index)
+        for question in questions
+    ]
+
+
+@pytest.mark.asyncio
+async def test_same_seed_same_questions_across_services():
+    settings = GameSettings(num_songs=10, seed=42)
+    first = await new_game_service().generate_questions(settings)
+    second = await new_game_service().generate_questions(settings)
+    assert len(first) == 10
+    assert layout(first) == layout(second)
+
+
+@pytest.mark.asyncio
+async def test_seeded_game_is_rebuilt_identically():
+    games = new_game_service()
+    settings = GameSettings(num_songs=5, seed=7, difficulty="hard")
+    cached = await games.generate_questions(settings)
+    games.seeded_games.clear()
+    rebuilt = await games.generate_questions(settings)
+    unresolved = await games.generate_questions(settings, resolve_previews=False)
+    assert layout(rebuilt) == layout(cached)
+    assert layout(unresolved) == layout(cached)
+    assert all(question.preview_url == "" for question in unresolved)
+
+
+@pytest.mark.asyncio
+async def test_different_seeds_or_settings_differ():
+    games = new_game_service()
+    base = layout(await games.generate_questions(GameSettings(num_songs=10, seed=1)))
+    assert layout(await games.generate_questions(GameSettings(num_songs=10, seed=2))) != base
+    assert layout(await games.generate_questions(GameSettings(num_songs=10, seed=1, num_choices=4))) != base
+
+
+@pytest.mark.asyncio
+async def test_sessions_of_a_seeded_game_share_questions_not_state():
+    games = new_game_service()
+    first = await games.create_game(GameSettings(num_songs=5, seed=99))
+    second = await games.create_game(GameSettings(num_songs=5, seed=99))
+    assert first.session_id != second.session_id
+    assert layout(first.questions) == layout(second.questions)
+
+    await games.start_game(first.session_id)
+    await games.answer_question(first.session_id, 0, first.questions[0].correct_option_index)
+    assert (await games.sessions.aget(first.session_id)).current_question == 1
+    assert (await games.sessions.aget(second.session_id)).current_question == 0
+
+
+@pytest.mark.asyncio
+async def test_daily_challenge_is_the_same_all_day():
+    games = new_game_service()
+    day = date(2024, 1, 31)
+    assert games.daily_seed(day) == 20240131
+    first = await games.create_daily_challenge(day)
+    second = await new_game_service().create_daily_challenge(day)
+    other_day = await games.create_daily_challenge(date(2024, 2, 1))
+    assert layout(first.questions) == layout(second.questions)
+    assert layout(first.questions) != layout(other_day.questions)
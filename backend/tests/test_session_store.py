@@ -0,0 +1,186 @@
+"""Session stores: idle expiry, the session cap and copy semantics, for every backend."""
+import sqlite3
+import threading
+
+import pytest
+
+from app.models.game import GameOption, GameQuestion, GameSession
+from app.services import game_service as game_service_module
+from app.services import session_store
+from app.services.game_pool import GamePool
+from app.services.game_service import GameService
+from app.services.session_store import InMemorySessionStore, SQLiteSessionStore
+
+
+class Clock:
+    """Stands in for the time module, so last activity times are chosen by the test."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(session_store, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    stores = []
+
+    def make(max_sessions: int = 0):
+        if request.param == "memory":
+            store = InMemorySessionStore(max_sessions=max_sessions)
+        else:
+            store = SQLiteSessionStore(str(tmp_path / f"sessions-{len(stores)}.db"), max_sessions=max_sessions)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def new_session() -> GameSession:
+    question = GameQuestion(
+        song_id=1,
+        preview_url="",
+        blurred_cover_url="",
+        correct_option_index=0,
+        options=[GameOption(song_id=1, name="One", is_correct=True), GameOption(song_id=2, name="Two", is_correct=False)]
+    )
+    return GameSession.create([question, question])
+
+
+def test_expire_idle_removes_only_inactive_sessions(make_store, clock):
+    store = make_store()
+    old, active, touched = new_session(), new_session(), new_session()
+    store.put(old)
+    store.put(touched)
+    clock.now += 100
+    store.put(active)
+    # Updating a session counts as activity
+    store.update(touched.session_id, lambda session: None)
+
+    assert store.expire_idle(clock.now - 50) == 1
+    assert old.session_id not in store
+    assert active.session_id in store
+    assert touched.session_id in store
+    assert len(store) == 2
+
+
+def test_cap_evicts_least_recently_active(make_store, clock):
+    store = make_store(max_sessions=3)
+    sessions = [new_session() for _ in range(4)]
+    for session in sessions[:3]:
+        store.put(session)
+        clock.now += 1
+    store.update(sessions[0].session_id, lambda session: None)
+    clock.now += 1
+    store.put(sessions[3])
+    store.evict_over_limit()
+
+    assert len(store) == 3
+    assert sessions[1].session_id not in store
+    assert all(session.session_id in store for session in (sessions[0], sessions[2], sessions[3]))
+
+
+def test_uncapped_store_keeps_everything(make_store):
+    store = make_store(max_sessions=0)
+    for _ in range(50):
+        store.put(new_session())
+    assert store.evict_over_limit() == 0
+    assert len(store) == 50
+
+
+def test_sessions_are_copies(make_store):
+    store = make_store()
+    session = new_session()
+    store.put(session)
+    session.score = 5
+    fetched = store.get(session.session_id)
+    fetched.score = 10
+    assert store.get(session.session_id).score == 0
+
+    def fail(session: GameSession) -> None:
+        session.score = 20
+        raise RuntimeError("mutation failed")
+
+    with pytest.raises(RuntimeError):
+        store.update(session.session_id, fail)
+    assert store.get(session.session_id).score == 0
+
+
+def test_concurrent_updates_are_not_lost(make_store):
+    store = make_store()
+    session = new_session()
+    store.put(session)
+
+    def increment(session: GameSession) -> None:
+        session.score += 1
+
+    def worker() -> None:
+        for _ in range(25):
+            store.update(session.session_id, increment)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.get(session.session_id).score == 100
+
+
+@pytest.mark.asyncio
+async def test_async_methods_match_sync_ones(make_store):
+    store = make_store()
+    session = new_session()
+    await store.aput(session)
+    assert (await store.aget(session.session_id)).session_id == session.session_id
+    assert await store.aupdate(session.session_id, lambda session: session.total_questions) == 2
+    assert await store.aget("missing") is None
+    assert await store.aupdate("missing", lambda session: 1) is None
+
+
+def test_sqlite_close_closes_every_thread_connection(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    threads = [threading.Thread(target=len, args=(store,)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    connections = list(store._connections)
+    # One per thread, plus the one that created the table
+    assert len(connections) == len(threads) + 1
+
+    store.close()
+    for connection in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
+    # The store can still be used afterwards
+    assert len(store) == 0
+    store.close()
+
+
+def test_game_service_expires_idle_sessions_and_enforces_cap(clock, monkeypatch):
+    monkeypatch.setattr(game_service_module, "time", clock)
+    games = GameService(session_store=InMemorySessionStore(max_sessions=2), game_pool=GamePool(size=0))
+    games.session_idle_timeout = 60
+    sessions = [new_session() for _ in range(3)]
+    for session in sessions:
+        games.sessions.put(session)
+        clock.now += 1
+    # The cap applies as sessions are added
+    assert len(games.sessions) == 2
+
+    clock.now += 59
+    assert games.expire_sessions() == 1
+    assert sessions[2].session_id in games.sessions
+    clock.now += 1
+    assert games.expire_sessions() == 1
+    assert len(games.sessions) == 0